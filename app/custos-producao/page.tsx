@@ -1,5 +1,5 @@
 import { ProductionInputContent } from "@/components/costs/production-input-content"
-import { costsApi, productsApi } from "@/lib/api"
+import { batchGet, listFrom } from "@/lib/api/batch"
 import type { Product } from "@/lib/types"
 
 export const dynamic = 'force-dynamic'
@@ -7,10 +7,12 @@ export const revalidate = 0
 
 export default async function ProductionCostsPage() {
   try {
-    const [groups, products] = await Promise.all([
-      costsApi.getRefinements(undefined, true, "production"),
-      productsApi.getAll(),
-    ])
+    const batch = await batchGet({
+      groups: "/production-costs/refinements/?include_locked=true&cost_category=production",
+      products: "/products/",
+    })
+    const groups = batch.groups.body
+    const products = listFrom<Product>(batch.products.body)
 
     const activeProducts = products.filter((p: Product) => p.active)
 
@@ -1,6 +1,6 @@
 import { SalesContent } from "@/components/sales/sales-content"
-import { salesApi, customersApi, productsApi } from "@/lib/api"
-import type { Customer, Product } from "@/lib/types"
+import { batchGet, listFrom } from "@/lib/api/batch"
+import type { Customer, Product, Sale } from "@/lib/types"
 
 // Desabilitar cache para sempre buscar dados frescos
 export const dynamic = 'force-dynamic'
@@ -8,11 +8,16 @@ export const revalidate = 0
 
 export default async function SalesPage() {
   try {
-    const [sales, customers, products] = await Promise.all([
-      salesApi.getAll(),
-      customersApi.getAll(),
-      productsApi.getAll(),
-    ])
+    // Uma única requisição ao backend em vez de três; a listagem de vendas é
+    // compacta (sem itens), que vêm do detalhe da venda selecionada
+    const batch = await batchGet({
+      sales: "/sales/",
+      customers: "/customers/sync/",
+      products: "/products/",
+    })
+    const sales = listFrom<Sale>(batch.sales.body)
+    const customers = listFrom<Customer>(batch.customers.body).sort((a, b) => a.name.localeCompare(b.name))
+    const products = listFrom<Product>(batch.products.body)
 
     const activeCustomers = customers.filter((c: Customer) => c.active)
     const activeProducts = products.filter((p: Product) => p.active)
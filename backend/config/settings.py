@@ -3,6 +3,7 @@ Django settings for config project.
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config, Csv
 import dj_database_url
 
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'inventory.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'inventory.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -66,6 +69,39 @@ DATABASES = {
     )
 }
 
+# SQLite: pragmas de produção (WAL etc., veja inventory/sqlite.py) e
+# BEGIN IMMEDIATE nas transações. SQLITE_PRAGMAS sobrescreve valores do perfil.
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+if SQLITE_TUNING and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
+# Réplica somente leitura para listagens, relatórios e dashboard (opcional).
+# Localmente pode ser uma cópia do SQLite: sqlite:///db.replica.sqlite3
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['inventory.routers.ReplicaRouter']
+
+# Segundos em que um cliente lê do primário depois de gravar algo
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+# Cache padrão: LocMem, um por processo. Para coalescer leituras entre workers
+# (inventory/singleflight.py) aponte para um cache compartilhado, ex.:
+# CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache e
+# CACHE_LOCATION=inventory_cache (depois: python manage.py createcachetable)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -106,10 +142,32 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'inventory.renderers.FastJSONRenderer',
     ],
 }
 
+# Exclusões ficam registradas por este número de dias para a sincronização
+# incremental; cursores mais antigos recebem a lista completa
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Limites do endpoint /api/batch/ (sub-requisições por lote e threads no modo paralelo)
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Respostas da API menores que este tamanho (em bytes) não são comprimidas
+RESPONSE_COMPRESSION_MIN_SIZE = config('RESPONSE_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+# Vendas liquidadas mais antigas que isso (em dias) vão para o arquivo
+# (python manage.py archive_sales)
+ARCHIVE_AFTER_DAYS = config('ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# Segundos em que a navegação por datas das listagens do admin fica em cache
+ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT = 300
+
+# Método de valoração do estoque: 'average' (custo médio ponderado) ou 'fifo' (PEPS)
+# Após alterar, execute: python manage.py rebuild_valuations
+INVENTORY_VALUATION_METHOD = config('INVENTORY_VALUATION_METHOD', default='average')
+
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
     default='http://localhost:3000,http://127.0.0.1:3000',
@@ -117,3 +175,12 @@ CORS_ALLOWED_ORIGINS = config(
 )
 
 CORS_ALLOW_CREDENTIALS = True
+
+# If-Match (controle de concorrência) e Idempotency-Key (POSTs repetidos)
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['ETag', 'Idempotent-Replayed']
+
+# Horas em que a resposta de um POST com Idempotency-Key é reaproveitada
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+# Segundos sem resposta até uma execução ser dada como abandonada (acima do GUNICORN_TIMEOUT)
+IDEMPOTENCY_LEASE_SECONDS = config('IDEMPOTENCY_LEASE_SECONDS', default=150, cast=int)
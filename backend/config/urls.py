@@ -6,10 +6,13 @@ from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.static import serve
+from inventory.views import serve_immutable_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('inventory.urls')),
+    # Variantes do logo (nome com hash do conteúdo): cache imutável
+    re_path(r'^media/(?P<path>company_logos/variants/.*)$', serve_immutable_media),
     # Servir arquivos de mídia em produção
     re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
 ]
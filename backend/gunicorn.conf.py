@@ -0,0 +1,64 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir deste diretório).
+
+- workers: 2 x CPUs + 1 (GUNICORN_WORKERS sobrescreve);
+- gthread: cada worker atende GUNICORN_THREADS requisições ao mesmo tempo,
+  que passam a maior parte do tempo esperando o banco;
+- preload: o Django é carregado e aquecido uma vez no processo mestre e os
+  workers herdam a memória (fork); conexões com o banco nunca são herdadas;
+- max_requests: workers são reciclados periodicamente (vazamentos de memória).
+
+Com GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker o app servido passa
+a ser o ASGI (config.asgi).
+"""
+import multiprocessing
+
+import decouple
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = decouple.config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+worker_class = decouple.config('GUNICORN_WORKER_CLASS', default='gthread')
+threads = decouple.config('GUNICORN_THREADS', default=4, cast=int)
+wsgi_app = 'config.asgi:application' if 'uvicorn' in worker_class else 'config.wsgi:application'
+
+preload_app = True
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = max_requests // 10
+# Relatórios pesados podem passar de 30s; tarefas longas vão para os jobs
+timeout = decouple.config('GUNICORN_TIMEOUT', default=120, cast=int)
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def warm_up():
+    """Popula os caches do resolvedor de URLs e dos metadados do ORM"""
+    from django.apps import apps
+    from django.urls import get_resolver, reverse
+
+    get_resolver().reverse_dict  # força o _populate()
+    reverse('dashboard')
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta.related_objects
+        model._meta.concrete_fields
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    warm_up()
+    # Nada de conexão aberta no mestre: seria compartilhada pelos workers
+    connections.close_all()
+    server.log.info('Django pré-carregado e aquecido')
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    # Garantia: o worker abre as próprias conexões, nunca reusa as do mestre
+    connections.close_all()
@@ -1,23 +1,97 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Category, Product, Customer, Supplier, ProductionCost, Sale, SaleItem, StockMovement
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from .models import (
+    Category, Product, Customer, Supplier, Expense, ProductionCost, Sale, SaleItem, StockMovement, Company, Job
+)
+
+
+class CachedDateHierarchy:
+    """
+    Envolve o queryset da listagem para que as consultas da navegação por
+    datas (faixa min/max e datas distintas) fiquem em cache por alguns
+    minutos. O resto do queryset é repassado sem alteração.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        sql = str(queryset.query).encode()
+        self.key_prefix = f'admin_dates:{queryset.model._meta.label_lower}:{hashlib.md5(sql).hexdigest()}'
+
+    def _cached(self, name, compute):
+        timeout = getattr(settings, 'ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT', 300)
+        return cache.get_or_set(f'{self.key_prefix}:{name}', compute, timeout)
+
+    def aggregate(self, *args, **kwargs):
+        return self._cached('range', lambda: self.queryset.aggregate(*args, **kwargs))
+
+    def dates(self, field_name, kind, *args, **kwargs):
+        return self._cached(
+            f'dates:{field_name}:{kind}', lambda: list(self.queryset.dates(field_name, kind, *args, **kwargs))
+        )
+
+    def datetimes(self, field_name, kind, *args, **kwargs):
+        return self._cached(
+            f'datetimes:{field_name}:{kind}', lambda: list(self.queryset.datetimes(field_name, kind, *args, **kwargs))
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
+
+
+class CachedDateHierarchyChangeList(ChangeList):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Os resultados já foram carregados; daqui em diante o queryset só é
+        # usado pelo template tag date_hierarchy
+        if self.date_hierarchy:
+            self.queryset = CachedDateHierarchy(self.queryset)
+
+
+class BaseAdmin(admin.ModelAdmin):
+    """
+    Padrões para tabelas grandes: sem o COUNT(*) da tabela inteira ao filtrar
+    e navegação por datas em cache. As subclasses devem declarar
+    `list_select_related` para as FKs exibidas e `autocomplete_fields` no
+    lugar dos <select> com todos os registros.
+    """
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_changelist(self, request, **kwargs):
+        return CachedDateHierarchyChangeList
+
+    def save_model(self, request, obj, form, change):
+        # Edições pelo admin também invalidam a versão lida pelos clientes da API
+        if change and hasattr(obj, 'version'):
+            obj.version += 1
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(BaseAdmin):
     list_display = ['name', 'created_at']
     search_fields = ['name']
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(BaseAdmin):
     list_display = ['code', 'name', 'category', 'current_stock', 'min_stock', 'purchase_price', 'active']
     list_filter = ['active', 'category']
+    list_select_related = ['category']
     search_fields = ['code', 'name']
     list_editable = ['active']
+    autocomplete_fields = ['category']
+    # O estoque muda pelo razão (movimentações), nunca editado direto
+    readonly_fields = ['current_stock', 'version']
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(BaseAdmin):
     list_display = ['code', 'name', 'document', 'email', 'phone', 'city', 'active']
     list_filter = ['active', 'state']
     search_fields = ['code', 'name', 'document', 'email']
@@ -25,19 +99,31 @@ class CustomerAdmin(admin.ModelAdmin):
 
 
 @admin.register(Supplier)
-class SupplierAdmin(admin.ModelAdmin):
+class SupplierAdmin(BaseAdmin):
     list_display = ['code', 'name', 'document', 'contact_name', 'email', 'phone', 'active']
     list_filter = ['active', 'state']
     search_fields = ['code', 'name', 'document', 'email']
     list_editable = ['active']
 
 
+@admin.register(Expense)
+class ExpenseAdmin(BaseAdmin):
+    list_display = ['name', 'expense_type', 'amount', 'date', 'active']
+    list_filter = ['expense_type', 'active']
+    search_fields = ['name', 'notes']
+    date_hierarchy = 'date'
+    list_editable = ['active']
+
+
 @admin.register(ProductionCost)
-class ProductionCostAdmin(admin.ModelAdmin):
-    list_display = ['product', 'description', 'cost_type', 'value', 'date']
-    list_filter = ['cost_type', 'date']
-    search_fields = ['product__name', 'description']
+class ProductionCostAdmin(BaseAdmin):
+    list_display = ['product', 'description', 'cost_type', 'value', 'date', 'is_locked']
+    list_filter = ['cost_type', 'cost_category', 'is_locked', 'date']
+    list_select_related = ['product']
+    search_fields = ['refinement_code', 'product__name', 'description']
     date_hierarchy = 'date'
+    autocomplete_fields = ['product', 'customer', 'locked_by_sale']
+    readonly_fields = ['version']
 
 
 class SaleItemInline(admin.TabularInline):
@@ -45,22 +131,46 @@ class SaleItemInline(admin.TabularInline):
     extra = 1
     fields = ['product', 'quantity', 'unit_price', 'discount', 'total_price']
     readonly_fields = ['total_price']
+    autocomplete_fields = ['product']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
 
 
 @admin.register(Sale)
-class SaleAdmin(admin.ModelAdmin):
+class SaleAdmin(BaseAdmin):
     list_display = ['sale_number', 'customer', 'sale_date', 'total_amount', 'discount', 'final_amount', 'status']
     list_filter = ['status', 'payment_method', 'sale_date']
+    list_select_related = ['customer']
     search_fields = ['sale_number', 'customer__name']
     date_hierarchy = 'sale_date'
-    readonly_fields = ['final_amount']
+    autocomplete_fields = ['customer']
+    readonly_fields = ['final_amount', 'version']
     inlines = [SaleItemInline]
 
 
 @admin.register(StockMovement)
-class StockMovementAdmin(admin.ModelAdmin):
-    list_display = ['product', 'movement_type', 'quantity', 'reference_type', 'created_at']
-    list_filter = ['movement_type', 'reference_type', 'created_at']
+class StockMovementAdmin(BaseAdmin):
+    list_display = ['product', 'movement_type', 'quantity', 'reference_type', 'reference_id', 'automatic', 'created_at']
+    list_filter = ['movement_type', 'reference_type', 'automatic', 'created_at']
+    list_select_related = ['product']
     search_fields = ['product__name', 'notes']
     date_hierarchy = 'created_at'
+    autocomplete_fields = ['product']
     readonly_fields = ['total_price', 'created_at']
+
+
+@admin.register(Company)
+class CompanyAdmin(BaseAdmin):
+    list_display = ['razao_social', 'nome_fantasia', 'cnpj', 'city', 'state', 'active']
+    list_filter = ['active']
+    search_fields = ['razao_social', 'nome_fantasia', 'cnpj']
+    readonly_fields = ['logo_variants', 'created_at', 'updated_at']
+
+
+@admin.register(Job)
+class JobAdmin(BaseAdmin):
+    list_display = ['id', 'name', 'status', 'progress', 'attempts', 'run_after', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name']
+    readonly_fields = ['progress', 'progress_message', 'result', 'error', 'started_at', 'finished_at', 'created_at', 'updated_at']
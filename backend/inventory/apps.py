@@ -7,4 +7,10 @@ class InventoryConfig(AppConfig):
     verbose_name = 'Sistema de Controle de Estoque'
     
     def ready(self):
+        from django.db.backends.signals import connection_created
+
+        import inventory.checks
         import inventory.signals
+        from inventory.sqlite import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid='inventory_sqlite_tuning')
@@ -0,0 +1,125 @@
+"""
+Arquivamento de vendas liquidadas antigas.
+
+Cada lote de vendas é movido numa transação: venda, itens, custos de
+produção travados por ela e movimentações de estoque da venda são copiados
+para as tabelas Archived* (mesmos ids) e apagados das tabelas de uso diário
+sem disparar sinais. Nada muda no estoque nem na valoração: razão, snapshots
+e relatórios leem as views *History, que unem as duas tabelas.
+
+Custos de produção só são arquivados se nenhum item de venda ainda ativo usa
+o mesmo refinamento, e as entradas de produção (cost_category='production')
+ficam sempre nas tabelas ativas, junto com a movimentação que geraram; os
+que ficam perdem o `locked_by_sale` (continuam travados).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    ArchivedProductionCost, ArchivedSale, ArchivedSaleItem, ArchivedStockMovement,
+    ProductionCost, Sale, SaleItem, StockMovement, Tombstone,
+)
+
+# Dias depois da venda a partir dos quais uma venda liquidada é arquivada
+ARCHIVE_AFTER_DAYS = 365
+
+
+def get_horizon(days=None):
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', ARCHIVE_AFTER_DAYS)
+    return timezone.now().date() - timedelta(days=days)
+
+
+def candidates(horizon):
+    return Sale.objects.filter(status='liquidado', sale_date__lt=horizon)
+
+
+def copy_rows(queryset, archive_model):
+    """Copia as linhas para o arquivo (mesmas colunas e ids); retorna os ids"""
+    columns = [field.attname for field in archive_model._meta.concrete_fields]
+    rows = list(queryset.order_by().values_list(*columns))
+    archive_model.objects.bulk_create(
+        [archive_model(**dict(zip(columns, row))) for row in rows], batch_size=500
+    )
+    return [row[0] for row in rows]
+
+
+def delete_rows(model, ids, batch_size=500):
+    """DELETE direto, sem sinais: o registro continua existindo no arquivo"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        for index in range(0, len(ids), batch_size):
+            batch = ids[index:index + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', batch)
+
+
+def archive_batch(sale_ids):
+    """Move um lote de vendas para o arquivo numa transação; retorna as contagens"""
+    with transaction.atomic():
+        # Revalida dentro da transação: a venda pode ter mudado de status
+        sales = Sale.objects.select_for_update().filter(pk__in=sale_ids, status='liquidado')
+        sale_ids = list(sales.values_list('pk', flat=True))
+        if not sale_ids:
+            return {'sales': 0, 'items': 0, 'costs': 0, 'movements': 0}
+
+        items = SaleItem.objects.filter(sale_id__in=sale_ids)
+        active_codes = (
+            SaleItem.objects.exclude(sale_id__in=sale_ids)
+            .filter(cost_refinement_code__isnull=False)
+            .values('cost_refinement_code')
+        )
+        costs = (
+            ProductionCost.objects.filter(locked_by_sale_id__in=sale_ids)
+            .exclude(cost_category='production')
+            .exclude(refinement_code__in=active_codes)
+        )
+        movements = StockMovement.objects.filter(reference_type='venda', reference_id__in=sale_ids)
+
+        moved = {
+            'sales': copy_rows(Sale.objects.filter(pk__in=sale_ids), ArchivedSale),
+            'items': copy_rows(items, ArchivedSaleItem),
+            'costs': copy_rows(costs, ArchivedProductionCost),
+            'movements': copy_rows(movements, ArchivedStockMovement),
+        }
+        # Filhos antes da venda (FKs de itens e custos)
+        delete_rows(StockMovement, moved['movements'])
+        delete_rows(ProductionCost, moved['costs'])
+        # Os custos que ficam ativos (entradas de produção, refinamentos ainda
+        # usados) continuam travados, mas sem apontar para a venda arquivada:
+        # o mesmo que o on_delete=SET_NULL faria
+        ProductionCost.objects.filter(locked_by_sale_id__in=sale_ids).update(
+            locked_by_sale=None, version=F('version') + 1
+        )
+        delete_rows(SaleItem, moved['items'])
+        delete_rows(Sale, moved['sales'])
+
+        # Clientes com cache local (sync) deixam de listar as vendas arquivadas
+        Tombstone.objects.bulk_create([Tombstone(resource='sale', object_id=pk) for pk in sale_ids])
+    return {name: len(ids) for name, ids in moved.items()}
+
+
+def archive_sales(horizon, chunk_size=200, progress=None):
+    """
+    Arquiva as vendas liquidadas com data anterior a `horizon`, em lotes de
+    `chunk_size` vendas (uma transação por lote). `progress(totais)` é
+    chamado após cada lote.
+    """
+    totals = {'sales': 0, 'items': 0, 'costs': 0, 'movements': 0}
+    last_id = 0
+    while True:
+        sale_ids = list(
+            candidates(horizon).filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not sale_ids:
+            break
+        for name, count in archive_batch(sale_ids).items():
+            totals[name] += count
+        last_id = sale_ids[-1]
+        if progress is not None:
+            progress(totals)
+    return totals
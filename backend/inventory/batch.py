@@ -0,0 +1,133 @@
+"""
+Execução de várias leituras (GET) da API numa única requisição.
+
+Cada sub-requisição é resolvida pelas URLs do próprio projeto e executada
+direto na view, sem passar de novo pela cadeia de middlewares. Só GET é
+aceito, então o que fica de fora não muda o resultado:
+
+- roteamento para a réplica: reaplicado aqui em cada sub-requisição, com a
+  mesma regra do ReplicaRoutingMiddleware (views seguras, cliente não preso
+  ao primário); o lote em si não prende o cliente ao primário;
+- compressão: vale para a resposta do lote inteiro, não para cada corpo;
+- Idempotency-Key: só existe nos POSTs de criação, nunca num GET;
+- CSRF, sessão, cabeçalhos de segurança e APPEND_SLASH: já aplicados à
+  requisição do lote (a sub-requisição herda usuário e cookies).
+
+Em modo sequencial todas compartilham a conexão com o banco da requisição
+principal; em modo paralelo cada thread usa a sua.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+
+from . import routers
+from .middleware import ReplicaRoutingMiddleware
+
+# Limites padrão (podem ser alterados em settings)
+MAX_REQUESTS = 20
+MAX_WORKERS = 4
+
+
+# Só a decisão de rota é usada (process_view), nunca a cadeia de respostas
+replica_routing = ReplicaRoutingMiddleware(get_response=None)
+
+
+class BatchError(ValueError):
+    pass
+
+
+def normalize_path(path):
+    """Aceita caminhos relativos à raiz da API (/products/) ou completos (/api/products/)"""
+    api_root = reverse('api-root')
+    if not isinstance(path, str) or not path.startswith('/'):
+        raise BatchError(f'Caminho inválido: {path!r}')
+    if not path.startswith(api_root):
+        path = api_root.rstrip('/') + path
+    return path
+
+
+def build_subrequest(request, path):
+    parts = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = parts.path
+    sub.META = {
+        **request.META,
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+    }
+    sub.GET = QueryDict(parts.query)
+    sub.COOKIES = request.COOKIES
+    sub.user = getattr(request, 'user', None)
+    return sub
+
+
+def execute(request, spec, batch_path):
+    """Executa uma sub-requisição e retorna {id, status, body}"""
+    request_id = spec.get('id')
+    try:
+        if str(spec.get('method', 'GET')).upper() != 'GET':
+            raise BatchError('Requisições em lote aceitam apenas GET')
+        path = normalize_path(spec.get('path'))
+        match = resolve(urlsplit(path).path)
+        if urlsplit(path).path == batch_path:
+            raise BatchError('Requisições em lote não podem ser aninhadas')
+    except BatchError as e:
+        return {'id': request_id, 'status': 400, 'body': {'detail': str(e)}}
+    except (Resolver404, Http404):
+        return {'id': request_id, 'status': 404, 'body': {'detail': 'Não encontrado.'}}
+
+    response = run_view(build_subrequest(request, path), match)
+    body = getattr(response, 'data', None)
+    if body is None and not getattr(response, 'streaming', False) and response.content:
+        try:
+            body = json.loads(response.content)
+        except ValueError:
+            body = response.content.decode(response.charset, errors='replace')
+    return {'id': request_id, 'status': response.status_code, 'body': body}
+
+
+def run_view(sub, match):
+    """Executa a view com a mesma rota de leitura que o middleware daria a ela"""
+    sub.replica_token = None
+    replica_routing.process_view(sub, match.func, match.args, match.kwargs)
+    try:
+        return match.func(sub, *match.args, **match.kwargs)
+    finally:
+        if sub.replica_token is not None:
+            routers.reset(sub.replica_token)
+
+
+def run_in_thread(request, spec, batch_path):
+    try:
+        return execute(request, spec, batch_path)
+    finally:
+        # Cada thread abre a própria conexão; fecha ao terminar
+        connections.close_all()
+
+
+def run_batch(request, specs, parallel=False):
+    max_requests = getattr(settings, 'BATCH_MAX_REQUESTS', MAX_REQUESTS)
+    if not isinstance(specs, list) or not specs:
+        raise BatchError('Informe uma lista de requisições em "requests".')
+    if len(specs) > max_requests:
+        raise BatchError(f'Máximo de {max_requests} requisições por lote.')
+    if not all(isinstance(spec, dict) for spec in specs):
+        raise BatchError('Cada requisição deve ser um objeto com "path".')
+    for index, spec in enumerate(specs):
+        spec.setdefault('id', index)
+
+    batch_path = request.path_info
+    # Só leituras: o ReplicaRoutingMiddleware não prende o cliente ao primário
+    request.reads_only = True
+    if not parallel or len(specs) == 1:
+        return [execute(request, spec, batch_path) for spec in specs]
+    workers = min(len(specs), getattr(settings, 'BATCH_MAX_WORKERS', MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda spec: run_in_thread(request, spec, batch_path), specs))
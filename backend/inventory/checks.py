@@ -0,0 +1,50 @@
+"""
+Checks de sistema que dependem do banco (rodam com `check --database` e no
+`migrate`).
+"""
+from django.apps import apps
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+from .history import HISTORY_VIEWS, view_columns
+
+
+@register(Tags.database)
+def check_history_views(app_configs=None, databases=None, **kwargs):
+    """As colunas das views *History no banco devem ser as dos models"""
+    errors = []
+    for alias in databases or []:
+        connection = connections[alias]
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            # Migrações pendentes recriam (ou ainda vão criar) as views
+            continue
+        with connection.cursor() as cursor:
+            existing = set(connection.introspection.table_names(cursor, include_views=True))
+            for view in HISTORY_VIEWS:
+                model = apps.get_model('inventory', view)
+                table = model._meta.db_table
+                if table not in existing:
+                    errors.append(Error(
+                        f'A view {table} não existe no banco "{alias}".',
+                        hint='Recrie as views com inventory.history.create_views numa migração.',
+                        obj=model,
+                        id='inventory.E001',
+                    ))
+                    continue
+                columns = {
+                    column.name for column in connection.introspection.get_table_description(cursor, table)
+                }
+                expected = set(view_columns(model))
+                if columns != expected:
+                    missing = ', '.join(sorted(expected - columns)) or '-'
+                    extra = ', '.join(sorted(columns - expected)) or '-'
+                    errors.append(Error(
+                        f'A view {table} no banco "{alias}" não corresponde ao model '
+                        f'(faltando: {missing}; sobrando: {extra}).',
+                        hint='Envolva a migração que alterou o model com inventory.history.around(...).',
+                        obj=model,
+                        id='inventory.E001',
+                    ))
+    return errors
@@ -0,0 +1,62 @@
+"""
+Views *History: UNION ALL de cada tabela de uso diário com o seu arquivo.
+
+O SQL é gerado a partir do `_meta` do model da tabela de uso diário, no
+estado da migração que o executa (os models *History não são gerenciados e
+não têm as FKs no estado das migrações; os Archived* têm as mesmas colunas).
+Uma migração que altera Sale, SaleItem, ProductionCost ou StockMovement (e
+os Archived* correspondentes) envolve as operações com `around`:
+
+    operations = history.around(
+        migrations.AddField('sale', 'campo', ...),
+        migrations.AddField('archivedsale', 'campo', ...),
+    )
+
+As views são derrubadas antes (o SQLite recria tabelas em alguns ALTERs) e
+recriadas depois com as colunas novas. O check `inventory.E001` aponta views
+desatualizadas no banco.
+"""
+from django.db import migrations
+
+# View -> (tabela de uso diário, tabela do arquivo)
+HISTORY_VIEWS = {
+    'SaleHistory': ('Sale', 'ArchivedSale'),
+    'SaleItemHistory': ('SaleItem', 'ArchivedSaleItem'),
+    'ProductionCostHistory': ('ProductionCost', 'ArchivedProductionCost'),
+    'StockMovementHistory': ('StockMovement', 'ArchivedStockMovement'),
+}
+
+
+def view_columns(view_model):
+    return [field.column for field in view_model._meta.concrete_fields]
+
+
+def view_sql(apps, view, quote):
+    hot, cold = HISTORY_VIEWS[view]
+    hot_model = apps.get_model('inventory', hot)
+    columns = ', '.join(quote(column) for column in view_columns(hot_model))
+    return (
+        f'CREATE VIEW {quote(apps.get_model("inventory", view)._meta.db_table)} AS '
+        f'SELECT {columns} FROM {quote(hot_model._meta.db_table)} '
+        f'UNION ALL SELECT {columns} FROM {quote(apps.get_model("inventory", cold)._meta.db_table)}'
+    )
+
+
+def create_views(apps, schema_editor):
+    for view in HISTORY_VIEWS:
+        schema_editor.execute(view_sql(apps, view, schema_editor.quote_name))
+
+
+def drop_views(apps, schema_editor):
+    for view in HISTORY_VIEWS:
+        table = apps.get_model('inventory', view)._meta.db_table
+        schema_editor.execute(f'DROP VIEW IF EXISTS {schema_editor.quote_name(table)}')
+
+
+def around(*operations):
+    """Operações de migração entre a remoção e a recriação das views"""
+    return [
+        migrations.RunPython(drop_views, create_views),
+        *operations,
+        migrations.RunPython(create_views, drop_views),
+    ]
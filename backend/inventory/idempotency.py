@@ -0,0 +1,159 @@
+"""
+Idempotency-Key em POSTs que criam registros (vendas, entradas de produção).
+
+A primeira requisição com uma chave reserva a linha de IdempotencyKey
+(INSERT fora da transação da view, visível para os outros workers), executa
+a view e guarda a resposta. Repetições com a mesma chave:
+
+- já concluída: recebem a resposta guardada (cabeçalho Idempotent-Replayed);
+- ainda em andamento: esperam a primeira terminar e recebem a mesma resposta;
+- com outro corpo: 422, a chave não pode ser reaproveitada.
+
+Respostas 5xx (ou exceções) liberam a chave: a transação da view foi
+desfeita e a repetição executa de novo. Se o worker morrer no meio (timeout,
+falta de memória, deploy), a reserva vence depois de LEASE_SECONDS (mais que
+o timeout do gunicorn) e a próxima repetição assume a chave. As chaves valem
+por IDEMPOTENCY_KEY_TTL_HOURS horas.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+TTL_HOURS = 24
+# Tempo máximo que uma repetição espera pela requisição em andamento
+WAIT_SECONDS = 30
+# Reserva sem resposta há mais que isso: o worker morreu (timeout do gunicorn: 120s)
+LEASE_SECONDS = 150
+POLL_INTERVAL = 0.1
+
+
+def get_ttl():
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', TTL_HOURS))
+
+
+def get_lease():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LEASE_SECONDS', LEASE_SECONDS))
+
+
+def is_abandoned(record):
+    return record.status_code is None and record.claimed_at <= timezone.now() - get_lease()
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def claim(key, scope, signature):
+    """
+    Reserva a chave; retorna (registro, True) ou o registro existente e False.
+    Uma reserva abandonada com o mesmo corpo é assumida por esta requisição.
+    """
+    while True:
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key=key, scope=scope, fingerprint=signature, expires_at=timezone.now() + get_ttl()
+                )
+            return record, True
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(key=key, scope=scope).first()
+        if record is None:
+            # Liberada entre o INSERT e a leitura: tenta de novo
+            continue
+        if record.expires_at <= timezone.now():
+            IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=timezone.now()).delete()
+            continue
+        if record.fingerprint == signature and is_abandoned(record):
+            # Só uma das repetições assume: a que trocar o claimed_at lido
+            claimed_at = timezone.now()
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, status_code__isnull=True, claimed_at=record.claimed_at
+            ).update(claimed_at=claimed_at)
+            if taken:
+                record.claimed_at = claimed_at
+                return record, True
+            continue
+        return record, False
+
+
+def wait_for(record):
+    """Espera a requisição em andamento; None se ela falhou (chave liberada ou abandonada)"""
+    deadline = time.monotonic() + WAIT_SECONDS
+    while record.status_code is None:
+        if is_abandoned(record):
+            return None
+        if time.monotonic() >= deadline:
+            return record
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None
+    return record
+
+
+def replay(record):
+    response = HttpResponse(record.content, status=record.status_code, content_type=record.content_type or None)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def execute(request, scope, handler):
+    """Executa `handler()` (a view) uma única vez por chave e escopo"""
+    key = request.headers.get(HEADER, '').strip()
+    if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+        return error(f'{HEADER} muito longa (máximo de 255 caracteres).', 400)
+    signature = fingerprint(request)
+
+    while True:
+        record, created = claim(key, scope, signature)
+        if created:
+            break
+        if record.fingerprint != signature:
+            return error(f'{HEADER} já usada com outro conteúdo.', 422)
+        record = wait_for(record)
+        if record is None:
+            continue
+        if record.status_code is None:
+            return error('Uma requisição com esta chave ainda está em andamento.', 409)
+        return replay(record)
+
+    # Se a reserva venceu e outra requisição a assumiu, esta não grava nem libera
+    own = IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at)
+    try:
+        response = handler()
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+    except BaseException:
+        own.delete()
+        raise
+    if response.status_code >= 500 or getattr(response, 'streaming', False):
+        own.delete()
+        return response
+    own.update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        content=response.content.decode(response.charset, errors='replace'),
+    )
+    return response
+
+
+def purge_expired():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,79 @@
+"""
+Variantes redimensionadas do logo da empresa.
+
+As variantes são geradas uma única vez, quando o logo muda, e gravadas com
+o hash do conteúdo no nome do arquivo. Como o nome muda junto com o
+conteúdo, elas podem ser servidas com cache "immutable" de longo prazo.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Nome da variante -> (largura, altura) máximas; a proporção é mantida
+LOGO_VARIANTS = {
+    'thumbnail': (128, 128),
+    'pdf': (400, 160),
+    'retina': (800, 320),
+}
+
+VARIANTS_DIR = 'company_logos/variants'
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size, Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    if variant.mode in ('RGBA', 'LA', 'P'):
+        variant.convert('RGBA').save(buffer, format='PNG', optimize=True)
+        extension = 'png'
+    else:
+        variant.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True, progressive=True)
+        extension = 'jpg'
+    return buffer.getvalue(), extension
+
+
+def generate_logo_variants(logo):
+    """
+    Gera as variantes do arquivo de logo e retorna {variante: caminho no storage},
+    incluindo a chave `source` com o arquivo original usado
+    """
+    logo.open('rb')
+    try:
+        image = ImageOps.exif_transpose(Image.open(logo))
+        image.load()
+    finally:
+        logo.close()
+
+    variants = {'source': logo.name}
+    for name, size in LOGO_VARIANTS.items():
+        content, extension = render_variant(image, size)
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        path = f'{VARIANTS_DIR}/{name}.{digest}.{extension}'
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(content))
+        variants[name] = path
+    return variants
+
+
+def refresh_company_logo_variants(company):
+    """Regera as variantes se o logo mudou desde a última geração"""
+    from .models import Company
+
+    current = company.logo_variants or {}
+    if not company.logo:
+        variants = {}
+    elif current.get('source') == company.logo.name:
+        return current
+    else:
+        try:
+            variants = generate_logo_variants(company.logo)
+        except OSError:
+            # Arquivo ilegível: mantém só o original, sem tentar de novo
+            variants = {'source': company.logo.name}
+    if variants != current:
+        Company.objects.filter(pk=company.pk).update(logo_variants=variants)
+        company.logo_variants = variants
+    return variants
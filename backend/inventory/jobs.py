@@ -0,0 +1,246 @@
+"""
+Execução de tarefas pesadas em segundo plano, usando o próprio banco como fila.
+
+As views enfileiram uma tarefa com `enqueue()` e respondem imediatamente; o
+comando `runjobs` consome a fila fora dos workers do gunicorn.
+"""
+import traceback
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job, ProductionCost, Sale, SaleItem
+
+# Registro das tarefas disponíveis: nome -> função(job, **payload)
+JOB_HANDLERS = {}
+# Parâmetros aceitos pela API em cada tarefa: nome -> {parâmetro: tipo}
+JOB_PAYLOADS = {}
+
+# Intervalo base entre tentativas (dobra a cada falha)
+RETRY_BASE_DELAY = 30
+
+# Tarefas "executando" sem atualização após este tempo voltam para a fila
+STALE_TIMEOUT = timedelta(minutes=30)
+
+
+def job_handler(name, payload=None):
+    """
+    Registra uma função como tarefa executável pelo `runjobs`. `payload`
+    lista os parâmetros ({nome: tipo}) que clientes da API podem informar.
+    """
+    def decorator(func):
+        JOB_HANDLERS[name] = func
+        JOB_PAYLOADS[name] = payload or {}
+        return func
+    return decorator
+
+
+def validate_payload(name, payload):
+    """Confere o payload vindo da API; levanta ValueError com a mensagem de erro"""
+    if name not in JOB_HANDLERS:
+        raise ValueError(f'Tarefa desconhecida: {name}')
+    if not isinstance(payload, dict):
+        raise ValueError('payload deve ser um objeto')
+    allowed = JOB_PAYLOADS[name]
+    unknown = sorted(set(payload) - set(allowed))
+    if unknown:
+        raise ValueError(f'Parâmetros não permitidos para {name}: {", ".join(unknown)}')
+    for key, value in payload.items():
+        expected = allowed[key]
+        # bool é subclasse de int: não vale como número
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError(f'Parâmetro inválido: {key}')
+        if expected is int and value <= 0:
+            raise ValueError(f'Parâmetro inválido: {key} deve ser maior que zero')
+        if expected is list and not all(isinstance(item, str) for item in value):
+            raise ValueError(f'Parâmetro inválido: {key} deve ser uma lista de textos')
+    return payload
+
+
+def enqueue(name, max_attempts=3, **payload):
+    if name not in JOB_HANDLERS:
+        raise ValueError(f'Tarefa desconhecida: {name}')
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=timezone.now(),
+    )
+
+
+def report_progress(job, done, total, message=''):
+    """Atualiza o progresso da tarefa (também serve como sinal de vida)"""
+    job.progress = int(done * 100 / total) if total else 100
+    job.progress_message = message[:200]
+    Job.objects.filter(pk=job.pk).update(
+        progress=job.progress,
+        progress_message=job.progress_message,
+        updated_at=timezone.now(),
+    )
+
+
+def requeue_stale_jobs():
+    return Job.objects.filter(
+        status='executando',
+        updated_at__lt=timezone.now() - STALE_TIMEOUT,
+    ).update(status='pendente', run_after=timezone.now())
+
+
+def claim_next_job():
+    """
+    Reserva a próxima tarefa pendente. O SELECT ... FOR UPDATE SKIP LOCKED
+    evita que workers concorrentes disputem a mesma linha; o UPDATE
+    condicional garante a reserva também em bancos sem FOR UPDATE (SQLite).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='pendente', run_after__lte=now)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        claimed = Job.objects.filter(pk=job.pk, status='pendente').update(
+            status='executando',
+            attempts=job.attempts + 1,
+            started_at=now,
+            updated_at=now,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise ValueError(f'Tarefa desconhecida: {job.name}')
+        result = handler(job, **job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'pendente'
+            job.run_after = timezone.now() + timedelta(
+                seconds=RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = 'falhou'
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'run_after', 'finished_at', 'updated_at'])
+        return False
+
+    job.status = 'concluido'
+    job.result = result
+    job.error = None
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'progress', 'finished_at', 'updated_at'])
+    return True
+
+
+@job_handler('recalculate_profits', payload={'batch_size': int})
+def recalculate_profits(job, batch_size=1000):
+    """Recalcula total_price, total_cost e lucro de todos os itens de venda"""
+    fields = ['total_price', 'total_cost', 'profit']
+    total_items = SaleItem.objects.count()
+    processed = 0
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(SaleItem.objects.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            break
+        changed = []
+        for item in batch:
+            old_values = [getattr(item, field) for field in fields]
+            # Mesmas fórmulas de SaleItem.save()
+            item.total_price = (item.quantity * item.unit_price) - item.discount
+            item.total_cost = item.quantity * item.unit_cost
+            item.profit = item.total_price - item.total_cost - item.tax - item.freight
+            if [getattr(item, field) for field in fields] != old_values:
+                changed.append(item)
+        SaleItem.objects.bulk_update(changed, fields)
+        # bulk_update não dispara sinais: atualiza os totais das vendas afetadas
+        Sale.refresh_totals({item.sale_id for item in changed})
+        updated += len(changed)
+        processed += len(batch)
+        last_id = batch[-1].id
+        report_progress(job, processed, total_items, f'{processed} de {total_items} itens')
+    return {'total_items': total_items, 'updated_items': updated}
+
+
+@job_handler('backfill_cost_snapshots', payload={'batch_size': int})
+def backfill_cost_snapshots(job, batch_size=500):
+    """Cria o snapshot de custos dos itens de venda que ainda não têm"""
+    from .transitions import build_cost_snapshots
+
+    pending = SaleItem.objects.filter(
+        cost_snapshot__isnull=True,
+        cost_refinement_code__isnull=False,
+    ).exclude(cost_refinement_code='')
+    total_items = pending.count()
+    processed = 0
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            break
+        SaleItem.objects.bulk_update(build_cost_snapshots(batch), ['cost_snapshot', 'cost_calculated_at'])
+        processed += len(batch)
+        last_id = batch[-1].id
+        report_progress(job, processed, total_items, f'{processed} de {total_items} itens')
+    return {'total_items': total_items}
+
+
+@job_handler('propagate_refinement_costs', payload={'refinement_codes': list})
+def propagate_refinement_costs(job, refinement_codes=None):
+    """Reaplica o custo dos refinamentos nos itens de venda que os utilizam"""
+    from .signals import update_sale_item_costs_for_refinement
+
+    if refinement_codes is None:
+        refinement_codes = list(
+            ProductionCost.objects.filter(refinement_code__isnull=False)
+            .exclude(refinement_code='')
+            .order_by()
+            .values_list('refinement_code', flat=True)
+            .distinct()
+        )
+    total = len(refinement_codes)
+    for done, code in enumerate(refinement_codes, start=1):
+        with transaction.atomic():
+            update_sale_item_costs_for_refinement(code)
+        if done % 50 == 0 or done == total:
+            report_progress(job, done, total, f'{done} de {total} refinamentos')
+    return {'refinements': total}
+
+
+@job_handler('update_cost_quantities', payload={'batch_size': int, 'dry_run': bool, 'chunked': bool})
+def update_cost_quantities(job, **options):
+    call_command('update_cost_quantities', **options)
+    return {'status': 'ok'}
+
+
+@job_handler('snapshot_stock', payload={'date': str, 'batch_size': int})
+def snapshot_stock(job, **options):
+    call_command('snapshot_stock', **options)
+    return {'status': 'ok'}
+
+
+@job_handler('archive_sales', payload={'days': int, 'chunk_size': int})
+def archive_sales(job, days=None, chunk_size=200):
+    """Move as vendas liquidadas antigas para o arquivo"""
+    from . import archive
+
+    horizon = archive.get_horizon(days)
+    total = archive.candidates(horizon).count()
+    totals = archive.archive_sales(
+        horizon, chunk_size,
+        progress=lambda done: report_progress(job, done['sales'], total, f'{done["sales"]} de {total} vendas'),
+    )
+    return {'horizon': horizon.isoformat(), **totals}
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from inventory import archive
+
+
+class Command(BaseCommand):
+    help = 'Move vendas liquidadas antigas (com itens, custos travados e movimentações) para as tabelas de arquivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Arquiva vendas liquidadas com data anterior a este número de dias (padrão: ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Vendas movidas por transação (padrão: 200)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Só informa quantas vendas seriam arquivadas'
+        )
+
+    def handle(self, *args, **options):
+        horizon = archive.get_horizon(options['days'])
+        pending = archive.candidates(horizon).count()
+        if options['dry_run'] or not pending:
+            self.stdout.write(f'{pending} vendas liquidadas anteriores a {horizon:%d/%m/%Y} para arquivar.')
+            return
+
+        started = time.monotonic()
+
+        def progress(totals):
+            self.stdout.write(f'  {totals["sales"]} de {pending} vendas arquivadas...')
+
+        totals = archive.archive_sales(horizon, options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'{totals["sales"]} vendas, {totals["items"]} itens, {totals["costs"]} custos e '
+            f'{totals["movements"]} movimentações arquivados ({time.monotonic() - started:.1f}s).'
+        ))
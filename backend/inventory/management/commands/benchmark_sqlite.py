@@ -0,0 +1,136 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from inventory.sqlite import apply_pragmas, get_pragmas
+
+# Leitura típica das listagens e do dashboard
+READ_SQL = (
+    'SELECT p.id, p.code, p.name, p.current_stock, c.name '
+    'FROM inventory_product p LEFT JOIN inventory_category c ON c.id = p.category_id '
+    'ORDER BY p.name LIMIT 100'
+)
+READ_AGGREGATE_SQL = 'SELECT status, COUNT(*), SUM(final_amount) FROM inventory_sale GROUP BY status'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede leituras e escritas concorrentes numa cópia do banco SQLite com o perfil padrão '
+        'e com o perfil de produção (WAL + BEGIN IMMEDIATE)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5, help='Duração de cada rodada (padrão: 5)')
+        parser.add_argument('--readers', type=int, default=4, help='Threads de leitura (padrão: 4)')
+        parser.add_argument('--writers', type=int, default=2, help='Threads de escrita (padrão: 2)')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('O banco padrão não é SQLite.')
+        source = connection.settings_dict['NAME']
+
+        workdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+        try:
+            path = os.path.join(workdir, 'bench.sqlite3')
+            # Cópia consistente mesmo com o servidor rodando
+            with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+                src.backup(dst)
+            for profile in ('padrao', 'producao'):
+                result = self.run_profile(path, profile, options)
+                self.report(profile, result, options['seconds'])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def connect(self, path, profile):
+        # isolation_level=None: BEGIN/COMMIT explícitos, como o Django faz em atomic()
+        db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        if profile == 'producao':
+            apply_pragmas(db, get_pragmas())
+        else:
+            db.execute('PRAGMA journal_mode = DELETE')
+        return db
+
+    def run_profile(self, path, profile, options):
+        setup = self.connect(path, profile)
+        setup.execute(
+            'CREATE TABLE IF NOT EXISTS bench_write (id INTEGER PRIMARY KEY, product_id INTEGER, quantity REAL)'
+        )
+        product_ids = [row[0] for row in setup.execute('SELECT id FROM inventory_product LIMIT 100')] or [0]
+        setup.close()
+
+        begin = 'BEGIN IMMEDIATE' if profile == 'producao' else 'BEGIN'
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0, 'read_latency': [], 'write_latency': []}
+
+        def reader():
+            db = self.connect(path, profile)
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    db.execute(READ_SQL).fetchall()
+                    db.execute(READ_AGGREGATE_SQL).fetchall()
+                    key = 'reads'
+                except sqlite3.OperationalError:
+                    key = 'read_errors'
+                with lock:
+                    stats[key] += 1
+                    stats['read_latency'].append(time.perf_counter() - started)
+            db.close()
+
+        def writer(offset):
+            db = self.connect(path, profile)
+            index = offset
+            while not stop.is_set():
+                product_id = product_ids[index % len(product_ids)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    # Lê e depois grava, como a venda que confere o estoque antes da baixa
+                    db.execute(begin)
+                    db.execute('SELECT current_stock FROM inventory_product WHERE id = ?', [product_id]).fetchone()
+                    db.execute('INSERT INTO bench_write (product_id, quantity) VALUES (?, 1)', [product_id])
+                    db.execute(
+                        'UPDATE inventory_product SET current_stock = current_stock WHERE id = ?', [product_id]
+                    )
+                    db.execute('COMMIT')
+                    key = 'writes'
+                except sqlite3.OperationalError:
+                    if db.in_transaction:
+                        db.execute('ROLLBACK')
+                    key = 'write_errors'
+                with lock:
+                    stats[key] += 1
+                    stats['write_latency'].append(time.perf_counter() - started)
+            db.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return stats
+
+    def report(self, profile, stats, seconds):
+        def p95(values):
+            if not values:
+                return 0
+            values = sorted(values)
+            return values[min(len(values) - 1, int(len(values) * 0.95))] * 1000
+
+        line = (
+            f'{profile:>8}: {stats["reads"] / seconds:8.0f} leituras/s (p95 {p95(stats["read_latency"]):6.2f} ms), '
+            f'{stats["writes"] / seconds:6.0f} escritas/s (p95 {p95(stats["write_latency"]):6.2f} ms), '
+            f'erros "database is locked": {stats["read_errors"] + stats["write_errors"]}'
+        )
+        errors = stats['read_errors'] + stats['write_errors']
+        self.stdout.write(self.style.WARNING(line) if errors else self.style.SUCCESS(line))
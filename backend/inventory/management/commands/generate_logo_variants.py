@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from inventory.images import refresh_company_logo_variants
+from inventory.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Gera as versões redimensionadas dos logos das empresas que ainda não as têm'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regera as variantes mesmo quando o logo não mudou'
+        )
+
+    def handle(self, *args, **options):
+        generated = 0
+        for company in Company.objects.exclude(logo='').exclude(logo__isnull=True):
+            if options['force']:
+                company.logo_variants = {}
+            before = company.logo_variants
+            if refresh_company_logo_variants(company) != before:
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Variantes geradas para {generated} empresas.'))
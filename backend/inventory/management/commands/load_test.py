@@ -0,0 +1,85 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ['/api/sales/', '/api/products/']
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera carga de leitura contra um servidor em execução (ex.: gunicorn) e mede '
+        'requisições/s, latência (p50/p95/p99) e erros por endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Servidor (padrão: http://127.0.0.1:8000)')
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help='Endpoints (padrão: vendas e produtos)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Clientes simultâneos (padrão: 16)')
+        parser.add_argument('--seconds', type=float, default=10, help='Duração por endpoint (padrão: 10)')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Informe --url no formato http://host:porta')
+        try:
+            probe = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=5)
+            probe.request('GET', options['paths'][0])
+            probe.getresponse().read()
+            probe.close()
+        except OSError as e:
+            raise CommandError(f'Servidor indisponível em {options["url"]}: {e}')
+
+        for path in options['paths']:
+            stats = self.run_path(url, path, options['concurrency'], options['seconds'])
+            self.report(path, stats, options['seconds'])
+
+    def run_path(self, url, path, concurrency, seconds):
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'ok': 0, 'errors': 0, 'latency': []}
+
+        def client():
+            # Uma conexão keep-alive por cliente, como um navegador
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers={'Accept-Encoding': 'identity'})
+                    response = connection.getresponse()
+                    response.read()
+                    key = 'ok' if response.status < 400 else 'errors'
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    key = 'errors'
+                with lock:
+                    stats[key] += 1
+                    stats['latency'].append(time.perf_counter() - started)
+            connection.close()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return stats
+
+    def report(self, path, stats, seconds):
+        latency = stats['latency']
+        line = (
+            f'{path}: {stats["ok"] / seconds:8.1f} req/s, '
+            f'p50 {percentile(latency, 0.50):7.1f} ms, p95 {percentile(latency, 0.95):7.1f} ms, '
+            f'p99 {percentile(latency, 0.99):7.1f} ms, erros: {stats["errors"]}'
+        )
+        self.stdout.write(self.style.WARNING(line) if stats['errors'] else self.style.SUCCESS(line))
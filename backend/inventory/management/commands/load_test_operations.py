@@ -0,0 +1,346 @@
+import http.client
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from inventory.management.commands.load_test import percentile
+from inventory.models import Product, Sale, StockMovement
+
+OPERATIONS = ('sale', 'production', 'movement', 'product')
+DEFAULT_MIX = 'sale=5,production=2,movement=2,product=1'
+# Diferenças menores que isso são arredondamento
+TOLERANCE = Decimal('0.005')
+
+
+def parse_mix(value):
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS or not weight.strip().isdigit():
+            raise CommandError(f'--mix inválido: "{part}" (operações: {", ".join(OPERATIONS)})')
+        weights[name] = int(weight)
+    if not any(weights.values()):
+        raise CommandError('--mix precisa de ao menos uma operação com peso maior que zero')
+    return weights
+
+
+class Client:
+    """Conexão keep-alive com o servidor; retorna (status, corpo JSON)"""
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = None
+
+    def request(self, method, path, data=None):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        body = json.dumps(data) if data is not None else None
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'identity'}
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        try:
+            return response.status, json.loads(content) if content else None
+        except ValueError:
+            return response.status, None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe o servidor (gunicorn.conf.py) sobre uma cópia do banco SQLite (ou um banco novo) e simula operadores '
+        'simultâneos criando vendas, entradas de produção, movimentações e produtos. Mede vazão, '
+        'latência e erros e confere estoque negativo, códigos duplicados e divergência de estoque'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operators', type=int, default=8, help='Operadores simultâneos (padrão: 8)')
+        parser.add_argument('--seconds', type=float, default=20, help='Duração da carga (padrão: 20)')
+        parser.add_argument('--workers', type=int, default=3, help='Workers do gunicorn (padrão: 3)')
+        parser.add_argument('--products', type=int, default=10, help='Produtos disputados (padrão: 10)')
+        parser.add_argument(
+            '--initial-stock', type=int, default=20, help='Estoque inicial de cada produto (padrão: 20)'
+        )
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Peso de cada operação (padrão: {DEFAULT_MIX})')
+        parser.add_argument(
+            '--fresh', action='store_true', help='Banco novo (migrate), só com os produtos do teste, em vez da cópia'
+        )
+        parser.add_argument('--port', type=int, default=8765, help='Porta do servidor de teste (padrão: 8765)')
+        parser.add_argument('--keep', action='store_true', help='Mantém o banco de teste para inspeção')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('O banco padrão não é SQLite.')
+        weights = parse_mix(options['mix'])
+
+        workdir = tempfile.mkdtemp(prefix='load-test-')
+        path = os.path.join(workdir, 'load.sqlite3')
+        env = {
+            **os.environ,
+            'DATABASE_URL': f'sqlite:///{path}',
+            'REPLICA_DATABASE_URL': '',
+            'DEBUG': 'False',
+            'ALLOWED_HOSTS': '127.0.0.1',
+            'GUNICORN_WORKERS': str(options['workers']),
+        }
+        try:
+            if options['fresh']:
+                self.stdout.write('Criando banco de teste (migrate)...')
+                result = subprocess.run(
+                    [sys.executable, 'manage.py', 'migrate', '--noinput'], cwd=settings.BASE_DIR, env=env,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                )
+                if result.returncode:
+                    raise CommandError(f'Falha ao criar o banco de teste:\n{result.stderr[-2000:]}')
+            else:
+                # Cópia consistente mesmo com o servidor rodando
+                with sqlite3.connect(connection.settings_dict['NAME']) as src, sqlite3.connect(path) as dst:
+                    src.backup(dst)
+
+            server = self.start_server(env, options['port'], workdir)
+            try:
+                client = Client(options['port'])
+                products = self.create_products(client, options['products'], options['initial_stock'])
+                client.close()
+                start = self.capture(path, products)
+                stats, elapsed = self.run_operators(options, weights, products)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+            self.report(stats, elapsed)
+            self.check_invariants(path, start)
+        finally:
+            if options['keep']:
+                self.stdout.write(f'Banco de teste mantido em {path}')
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    def start_server(self, env, port, workdir):
+        log_path = os.path.join(workdir, 'gunicorn.log')
+        log = open(log_path, 'w')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+             '--bind', f'127.0.0.1:{port}', '--access-logfile', '/dev/null'],
+            cwd=settings.BASE_DIR, env=env, stdout=log, stderr=log,
+        )
+        log.close()
+        client = Client(port)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                break
+            try:
+                if client.request('GET', '/api/products/?page_size=1')[0] == 200:
+                    client.close()
+                    return server
+            except (OSError, http.client.HTTPException):
+                pass
+            time.sleep(0.5)
+        server.kill()
+        with open(log_path) as log:
+            tail = ''.join(log.readlines()[-20:])
+        raise CommandError(f'O servidor de teste não respondeu na porta {port}:\n{tail}')
+
+    def create_products(self, client, count, initial_stock):
+        token = uuid.uuid4().hex[:6].upper()
+        products = []
+        for index in range(count):
+            # Código gerado pelo sistema, como num cadastro pela tela
+            status, body = client.request('POST', '/api/products/', {
+                'name': f'Carga {token} {index + 1}',
+                'unit': 'UN',
+                'purchase_price': '10.00',
+                'current_stock': str(initial_stock),
+            })
+            if status != 201:
+                raise CommandError(f'Falha ao criar os produtos de teste ({status}): {body}')
+            products.append(body['id'])
+        return products
+
+    def capture(self, path, products):
+        """Estoque dos produtos e última movimentação antes da carga"""
+        with sqlite3.connect(path) as db:
+            placeholders = ', '.join(['?'] * len(products))
+            stock = {
+                pk: Decimal(str(quantity)) for pk, quantity in db.execute(
+                    f'SELECT id, current_stock FROM {Product._meta.db_table} WHERE id IN ({placeholders})',
+                    products,
+                )
+            }
+            last_movement = db.execute(f'SELECT COALESCE(MAX(id), 0) FROM {StockMovement._meta.db_table}')
+            return {'stock': stock, 'last_movement': last_movement.fetchone()[0]}
+
+    def run_operators(self, options, weights, products):
+        names = [name for name in OPERATIONS if weights.get(name)]
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = defaultdict(lambda: {'ok': 0, 'statuses': Counter(), 'latency': []})
+
+        def operator():
+            client = Client(options['port'])
+            rng = random.Random()
+            while not stop.is_set():
+                name = rng.choices(names, [weights[name] for name in names])[0]
+                started = time.perf_counter()
+                try:
+                    status = getattr(self, f'op_{name}')(client, rng, products)
+                except (OSError, http.client.HTTPException):
+                    status = 'conexão'
+                with lock:
+                    entry = stats[name]
+                    entry['latency'].append(time.perf_counter() - started)
+                    if isinstance(status, int) and status < 400:
+                        entry['ok'] += 1
+                    else:
+                        entry['statuses'][status] += 1
+            client.close()
+
+        threads = [threading.Thread(target=operator) for _ in range(options['operators'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return stats, time.perf_counter() - started
+
+    # Operações: o mesmo fluxo de tela do frontend (consulta e depois grava)
+
+    def op_sale(self, client, rng, products):
+        status, body = client.request('GET', '/api/sales/next_number/')
+        if status != 200:
+            return status
+        items = [
+            {'product': pk, 'quantity': str(rng.randint(1, 3)), 'unit_price': '25.00'}
+            for pk in rng.sample(products, min(len(products), rng.randint(1, 3)))
+        ]
+        total = sum(Decimal(item['quantity']) * 25 for item in items)
+        status, _ = client.request('POST', '/api/sales/', {
+            'sale_number': body['next_number'],
+            'sale_type': 'venda',
+            'sale_date': timezone.now().date().isoformat(),
+            'total_amount': str(total),
+            'payment_method': 'pix',
+            'items': items,
+        })
+        return status
+
+    def op_production(self, client, rng, products):
+        status, _ = client.request('POST', '/api/production-costs/save_production_entry/', {
+            'product_id': rng.choice(products),
+            'date': timezone.now().date().isoformat(),
+            'quantity': str(rng.randint(1, 5)),
+            'costs': [{'cost_type': 'Matéria-prima', 'value': '12.50'}],
+        })
+        return status
+
+    def op_movement(self, client, rng, products):
+        pk = rng.choice(products)
+        _, product = client.request('GET', f'/api/products/{pk}/?fields=id,current_stock')
+        quantity = rng.randint(1, 3)
+        # Saída (perda) só com estoque suficiente na tela; senão, reposição
+        movement_type = 'saida' if Decimal(product['current_stock']) >= quantity else 'entrada'
+        status, _ = client.request('POST', '/api/stock-movements/', {
+            'product': pk,
+            'movement_type': movement_type,
+            'quantity': str(quantity),
+            'reference_type': 'perda' if movement_type == 'saida' else 'compra',
+        })
+        return status
+
+    def op_product(self, client, rng, products):
+        # Sem código: o código sequencial é gerado em Product.save
+        status, _ = client.request('POST', '/api/products/', {
+            'name': f'Produto carga {uuid.uuid4().hex[:8]}',
+            'unit': 'UN',
+            'purchase_price': '10.00',
+            'current_stock': '0',
+        })
+        return status
+
+    def report(self, stats, elapsed):
+        self.stdout.write(f'\nCarga: {elapsed:.1f}s')
+        for name in OPERATIONS:
+            if name not in stats:
+                continue
+            entry = stats[name]
+            latency = entry['latency']
+            failures = ', '.join(f'{status}: {count}' for status, count in entry['statuses'].most_common())
+            line = (
+                f'{name:>10}: {entry["ok"] / elapsed:7.1f} ops/s, '
+                f'p50 {percentile(latency, 0.50):7.1f} ms, p95 {percentile(latency, 0.95):7.1f} ms, '
+                f'p99 {percentile(latency, 0.99):7.1f} ms, '
+                f'falhas {sum(entry["statuses"].values()) / max(len(latency), 1):6.1%}'
+                + (f' ({failures})' if failures else '')
+            )
+            server_errors = any(not isinstance(status, int) or status >= 500 for status in entry['statuses'])
+            self.stdout.write(self.style.WARNING(line) if server_errors else line)
+
+    def check_invariants(self, path, start):
+        product_table = Product._meta.db_table
+        movement_table = StockMovement._meta.db_table
+        violations = []
+        with sqlite3.connect(path) as db:
+            for code, name, quantity in db.execute(
+                f'SELECT code, name, current_stock FROM {product_table} WHERE current_stock < 0'
+            ):
+                violations.append(f'Estoque negativo: {code} - {name} ({quantity})')
+            for code, count in db.execute(
+                f'SELECT code, COUNT(*) FROM {product_table} GROUP BY code HAVING COUNT(*) > 1'
+            ):
+                violations.append(f'Código de produto duplicado: {code} ({count}x)')
+            for number, count in db.execute(
+                f'SELECT sale_number, COUNT(*) FROM {Sale._meta.db_table} GROUP BY sale_number HAVING COUNT(*) > 1'
+            ):
+                violations.append(f'Número de venda duplicado: {number} ({count}x)')
+
+            # Estoque final x estoque inicial + movimentações gravadas durante a carga
+            products = list(start['stock'])
+            placeholders = ', '.join(['?'] * len(products))
+            deltas = defaultdict(Decimal, {
+                pk: Decimal(str(total)) for pk, total in db.execute(
+                    f"SELECT product_id, SUM(CASE WHEN movement_type = 'saida' THEN -quantity ELSE quantity END) "
+                    f'FROM {movement_table} WHERE id > ? AND product_id IN ({placeholders}) '
+                    f"AND movement_type IN ('entrada', 'saida') GROUP BY product_id",
+                    [start['last_movement'], *products],
+                )
+            })
+            for pk, code, quantity in db.execute(
+                f'SELECT id, code, current_stock FROM {product_table} WHERE id IN ({placeholders})', products
+            ):
+                expected = start['stock'][pk] + deltas[pk]
+                if abs(Decimal(str(quantity)) - expected) > TOLERANCE:
+                    violations.append(f'Divergência de estoque: {code} (atual {quantity}, razão {expected})')
+
+        if violations:
+            self.stdout.write(self.style.ERROR(f'\n{len(violations)} violação(ões) de invariantes:'))
+            for violation in violations:
+                self.stdout.write(f'  {violation}')
+        else:
+            self.stdout.write(self.style.SUCCESS('\nInvariantes OK: sem estoque negativo, duplicidades ou divergências'))
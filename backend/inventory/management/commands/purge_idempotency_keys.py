@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from inventory import idempotency
+
+
+class Command(BaseCommand):
+    help = 'Remove as chaves de idempotência expiradas (IDEMPOTENCY_KEY_TTL_HOURS)'
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} chaves de idempotência removidas.'))
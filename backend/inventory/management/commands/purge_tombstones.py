@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Remove os registros de exclusão mais antigos que a retenção da sincronização incremental'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30),
+            help='Mantém as exclusões dos últimos N dias (padrão: SYNC_TOMBSTONE_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} registros de exclusão removidos.'))
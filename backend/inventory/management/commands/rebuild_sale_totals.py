@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from inventory.models import Sale
+
+
+class Command(BaseCommand):
+    help = 'Confere e recalcula os totais de custo, lucro, imposto, frete e itens das vendas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Apenas lista as vendas com totais divergentes, sem corrigir'
+        )
+
+    def handle(self, *args, **options):
+        expected = {f'expected_{field}': expr for field, expr in Sale.item_totals_expressions().items()}
+        divergent = Q()
+        for field in Sale.ITEM_TOTALS:
+            divergent |= ~Q(**{field: F(f'expected_{field}')})
+        mismatched = Sale.objects.annotate(**expected).filter(divergent)
+
+        count = mismatched.count()
+        if options['verify']:
+            for sale in mismatched.order_by('id')[:50]:
+                self.stdout.write(
+                    f'Venda {sale.sale_number}: lucro {sale.total_profit} (esperado {sale.expected_total_profit}), '
+                    f'custo {sale.total_cost} (esperado {sale.expected_total_cost}), '
+                    f'itens {sale.item_count} (esperado {sale.expected_item_count})'
+                )
+            style = self.style.WARNING if count else self.style.SUCCESS
+            self.stdout.write(style(f'{count} vendas com totais divergentes.'))
+            return
+
+        updated = Sale.refresh_totals(mismatched.values('id'))
+        self.stdout.write(self.style.SUCCESS(f'Concluído! {updated} vendas recalculadas.'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from inventory.valuation import get_method, rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Refaz a valoração de estoque (custo médio ou FIFO) de todos os produtos a partir do razão'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Lançamentos gravados por lote (padrão: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Refazendo valoração pelo método "{get_method()}"...')
+        started = time.monotonic()
+        products, entries = rebuild_all(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Concluído! {products} produtos e {entries} lançamentos em '
+                f'{time.monotonic() - started:.1f}s.'
+            )
+        )
@@ -0,0 +1,65 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from inventory.reconcile import SOURCES, fix_drift, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Compara o current_stock dos produtos com o estoque esperado e informa (ou corrige) divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=SOURCES,
+            default='ledger',
+            help='ledger: razão de movimentações (padrão); documents: ajustes manuais, produção e vendas'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(os.cpu_count() or 1, 8),
+            help='Processos em paralelo (padrão: núcleos da máquina, até 8)'
+        )
+        parser.add_argument(
+            '--partitions',
+            type=int,
+            default=None,
+            help='Faixas de id em que o catálogo é dividido (padrão: 4 por processo)'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Corrige o current_stock dos produtos divergentes'
+        )
+        parser.add_argument(
+            '--show',
+            type=int,
+            default=20,
+            help='Quantidade de produtos divergentes listados (padrão: 20)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        workers = max(1, options['workers'])
+        partitions = options['partitions'] or workers * 4
+        checked, drifted = reconcile(options['source'], workers, partitions)
+        drifted.sort(key=lambda row: abs(row[3] - row[4]), reverse=True)
+
+        for pk, code, name, current, expected in drifted[:options['show']]:
+            self.stdout.write(
+                f'  {code} - {name}: atual {current}, esperado {expected} (diferença {current - expected:+})'
+            )
+        if len(drifted) > options['show']:
+            self.stdout.write(f'  ... e mais {len(drifted) - options["show"]} produtos')
+
+        total_drift = sum(abs(current - expected) for _, _, _, current, expected in drifted)
+        summary = (
+            f'{checked} produtos verificados ({options["source"]}), {len(drifted)} divergentes, '
+            f'diferença absoluta total {total_drift} ({time.monotonic() - started:.1f}s).'
+        )
+        self.stdout.write(self.style.WARNING(summary) if drifted else self.style.SUCCESS(summary))
+
+        if options['fix'] and drifted:
+            fixed = fix_drift(options['source'], drifted)
+            self.stdout.write(self.style.SUCCESS(f'{fixed} produtos corrigidos.'))
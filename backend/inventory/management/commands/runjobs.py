@@ -0,0 +1,67 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from inventory.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em segundo plano enfileiradas na tabela Job'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Processa as tarefas pendentes e encerra quando a fila esvaziar'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Segundos de espera quando não há tarefas (padrão: 2)'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=0,
+            help='Encerra após processar esta quantidade de tarefas (0 = sem limite)'
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write('Worker de tarefas iniciado')
+        processed = 0
+        while self.running:
+            close_old_connections()
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'{requeued} tarefas travadas voltaram para a fila'))
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            started = time.monotonic()
+            ok = run_job(job)
+            elapsed = time.monotonic() - started
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f'✓ {job} em {elapsed:.1f}s'))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ {job} (tentativa {job.attempts}/{job.max_attempts})'))
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(f'Worker encerrado ({processed} tarefas processadas)')
+
+    def _stop(self, signum, frame):
+        # Termina a tarefa atual antes de sair
+        self.running = False
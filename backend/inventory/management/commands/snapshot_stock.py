@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from inventory.stock import take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Grava o snapshot de estoque e custo de todos os produtos no fim de uma data (agende diariamente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Data do snapshot no formato AAAA-MM-DD (padrão: hoje)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Snapshots gravados por lote (padrão: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        date = timezone.now().date() if options['date'] is None else parse_date(options['date'])
+        if date is None:
+            raise CommandError('Data inválida; use o formato AAAA-MM-DD')
+        started = time.monotonic()
+        count = take_snapshot(date, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot de {date:%d/%m/%Y}: {count} produtos ({time.monotonic() - started:.1f}s).'
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from inventory.sqlite import maintain
+
+
+class Command(BaseCommand):
+    help = 'Checkpoint do WAL e PRAGMA optimize nos bancos SQLite (agende a cada hora)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Alias do banco (padrão: default)'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+            default='TRUNCATE',
+            help='Modo do wal_checkpoint (padrão: TRUNCATE, que também zera o arquivo -wal)'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'O banco "{options["database"]}" não é SQLite ({connection.vendor}).')
+        started = time.monotonic()
+        busy, wal_pages, checkpointed = maintain(connection, options['mode'])
+        summary = (
+            f'Checkpoint {options["mode"]}: {checkpointed} de {wal_pages} páginas do WAL copiadas; '
+            f'optimize executado ({time.monotonic() - started:.2f}s).'
+        )
+        if busy:
+            self.stdout.write(self.style.WARNING(summary + ' Havia leitores ativos; o WAL não foi zerado.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -1,48 +1,149 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import DatabaseError, transaction
+from django.db.models import Exists, OuterRef, Subquery
 from inventory.models import ProductionCost, SaleItem
 
 
 class Command(BaseCommand):
     help = 'Atualiza o campo quantity em custos de produção antigos baseado nas vendas associadas'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas informa quantos custos seriam atualizados'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de custos processados por lote no modo em lotes (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--chunked',
+            action='store_true',
+            help='Força o processamento em lotes em vez do UPDATE único'
+        )
+        parser.add_argument(
+            '--checkpoint-file',
+            default=str(Path(settings.BASE_DIR) / '.update_cost_quantities.checkpoint'),
+            help='Arquivo onde o último ID processado é salvo para retomar a execução'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Ignora o checkpoint salvo e recomeça do início'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write('Iniciando atualização de quantities em custos de produção...')
-        
-        # Busca todos os custos que têm venda associada mas não têm quantity
+        started = time.monotonic()
+
+        # Custos que têm venda associada mas não têm quantity
         costs_without_quantity = ProductionCost.objects.filter(
             locked_by_sale__isnull=False,
             quantity__isnull=True
-        ).select_related('locked_by_sale', 'product')
-        
-        total_costs = costs_without_quantity.count()
-        self.stdout.write(f'Encontrados {total_costs} custos sem quantity vinculados a vendas')
-        
-        updated_count = 0
-        
-        for cost in costs_without_quantity:
-            # Busca o item da venda correspondente ao produto deste custo
-            sale_item = SaleItem.objects.filter(
-                sale=cost.locked_by_sale,
-                product=cost.product
-            ).first()
-            
-            if sale_item:
-                old_quantity = cost.quantity
-                cost.quantity = sale_item.quantity
-                cost.save(update_fields=['quantity'])
-                updated_count += 1
-                self.stdout.write(
-                    f'✓ Custo ID {cost.id}: quantity {old_quantity} -> {sale_item.quantity} (Produto: {cost.product.name})'
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'✗ Custo ID {cost.id}: Não encontrado SaleItem correspondente'
+        )
+        # Item da venda correspondente ao produto de cada custo
+        matching_items = SaleItem.objects.filter(
+            sale=OuterRef('locked_by_sale'),
+            product=OuterRef('product')
+        )
+
+        if options['dry_run']:
+            total_costs = costs_without_quantity.count()
+            matched = costs_without_quantity.filter(Exists(matching_items)).count()
+            self.stdout.write(
+                f'[dry-run] {matched} custos seriam atualizados de {total_costs} sem quantity '
+                f'({total_costs - matched} sem SaleItem correspondente).'
+            )
+            return
+
+        checkpoint = Path(options['checkpoint_file'])
+        if options['reset'] and checkpoint.exists():
+            checkpoint.unlink()
+
+        if not options['chunked'] and not checkpoint.exists():
+            try:
+                with transaction.atomic():
+                    updated_count = costs_without_quantity.filter(Exists(matching_items)).update(
+                        quantity=Subquery(matching_items.order_by('id').values('quantity')[:1])
                     )
+                unmatched = costs_without_quantity.count()
+                self._summary('UPDATE único', updated_count, unmatched, started)
+                return
+            except DatabaseError as e:
+                self.stdout.write(
+                    self.style.WARNING(f'UPDATE com subquery não suportado ({e}); usando lotes')
                 )
-        
+
+        updated_count, unmatched = self._update_in_batches(
+            costs_without_quantity, options['batch_size'], checkpoint
+        )
+        self._summary('lotes', updated_count, unmatched, started)
+
+    def _update_in_batches(self, queryset, batch_size, checkpoint):
+        """
+        Processa os custos em ordem de ID, um lote por transação, salvando o
+        último ID confirmado no checkpoint para permitir retomar a execução.
+        """
+        last_id = 0
+        if checkpoint.exists():
+            last_id = json.loads(checkpoint.read_text())['last_id']
+            self.stdout.write(f'Retomando a partir do custo ID {last_id}')
+
+        updated_count = 0
+        unmatched = 0
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'locked_by_sale_id', 'product_id')[:batch_size]
+            )
+            if not batch:
+                break
+
+            # Um único SELECT resolve os itens de venda de todo o lote
+            quantities = {}
+            items = SaleItem.objects.filter(
+                sale_id__in={cost.locked_by_sale_id for cost in batch},
+                product_id__in={cost.product_id for cost in batch}
+            ).order_by('-id').values_list('sale_id', 'product_id', 'quantity')
+            for sale_id, product_id, quantity in items:
+                quantities[(sale_id, product_id)] = quantity
+
+            to_update = []
+            for cost in batch:
+                quantity = quantities.get((cost.locked_by_sale_id, cost.product_id))
+                if quantity is None:
+                    unmatched += 1
+                    continue
+                cost.quantity = quantity
+                to_update.append(cost)
+
+            last_id = batch[-1].id
+            with transaction.atomic():
+                ProductionCost.objects.bulk_update(to_update, ['quantity'])
+            checkpoint.write_text(json.dumps({'last_id': last_id}))
+            updated_count += len(to_update)
+
+        if checkpoint.exists():
+            checkpoint.unlink()
+        return updated_count, unmatched
+
+    def _summary(self, mode, updated_count, unmatched, started):
+        if unmatched:
+            self.stdout.write(
+                self.style.WARNING(f'{unmatched} custos sem SaleItem correspondente')
+            )
         self.stdout.write(
             self.style.SUCCESS(
-                f'Concluído! {updated_count} custos atualizados de {total_costs} totais.'
+                f'Concluído! {updated_count} custos atualizados ({mode}, '
+                f'{time.monotonic() - started:.1f}s).'
             )
         )
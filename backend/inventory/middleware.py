@@ -0,0 +1,115 @@
+"""
+Middlewares da API.
+
+- CompressionMiddleware: usa brotli quando o pacote está instalado e o
+  cliente aceita `br`; caso contrário, gzip. Respostas pequenas, em
+  streaming ou já comprimidas passam sem alteração. Os arquivos estáticos
+  continuam sendo servidos já comprimidos pelo WhiteNoise.
+- ReplicaRoutingMiddleware: leituras seguras na réplica (veja routers.py).
+"""
+import re
+from gzip import compress as gzip_compress
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+from . import routers
+
+ACCEPTS_BR = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        min_size = getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        if len(response.content) < min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and ACCEPTS_BR.search(accept_encoding):
+            # Qualidade 4: boa taxa de compressão com custo de CPU próximo ao gzip
+            compressed, encoding = brotli.compress(response.content, quality=4), 'br'
+        elif ACCEPTS_GZIP.search(accept_encoding):
+            compressed, encoding = gzip_compress(response.content, compresslevel=6, mtime=0), 'gzip'
+        else:
+            return response
+
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # ETag forte deixa de valer para o corpo comprimido
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Envia para a réplica as leituras de GET/HEAD de views seguras: ações
+    listadas em `replica_actions` da viewset (padrão: só `list`) e views de
+    função marcadas com `@replica_reads`.
+
+    Depois de uma escrita bem-sucedida o cliente fica preso ao primário por
+    `REPLICA_PIN_SECONDS`, para ler o que acabou de gravar. O pino é só o
+    cookie: vale para qualquer worker sem estado compartilhado e não prende
+    ao primário outros clientes atrás do mesmo endereço (NAT, proxy).
+    Clientes que não guardam cookies leem da réplica logo após gravar.
+    """
+    PIN_COOKIE = 'primary_pin'
+    DEFAULT_ACTIONS = ('list',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not routers.replica_enabled():
+            return self.get_response(request)
+
+        request.replica_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.replica_token is not None:
+                routers.reset(request.replica_token)
+
+        # POSTs que só leem (lote de GETs) marcam `request.reads_only`
+        writes = request.method not in ('GET', 'HEAD', 'OPTIONS') and not getattr(request, 'reads_only', False)
+        if writes and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not routers.replica_enabled() or request.method not in ('GET', 'HEAD'):
+            return None
+        if self.is_pinned(request) or not self.is_replica_safe(view_func):
+            return None
+        request.replica_token = routers.use_replica()
+        return None
+
+    def is_replica_safe(self, view_func):
+        if getattr(view_func, 'replica_reads', False):
+            return True
+        actions = getattr(view_func, 'actions', None)
+        if not actions or 'get' not in actions:
+            return False
+        allowed = getattr(view_func.cls, 'replica_actions', self.DEFAULT_ACTIONS)
+        return actions['get'] in allowed
+
+    def is_pinned(self, request):
+        return self.PIN_COOKIE in request.COOKIES
+
+    def pin(self, request, response):
+        seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        response.set_cookie(self.PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
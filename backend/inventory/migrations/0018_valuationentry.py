@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('priority', models.PositiveSmallIntegerField(default=0, verbose_name='Prioridade')),
+                ('source_type', models.CharField(choices=[('producao', 'Entrada de Produção'), ('movimentacao', 'Movimentação de Estoque'), ('venda', 'Item de Venda')], max_length=20, verbose_name='Origem')),
+                ('source_id', models.BigIntegerField(verbose_name='ID de Origem')),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Quantidade')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Custo Unitário')),
+                ('balance_quantity', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Saldo (Quantidade)')),
+                ('balance_value', models.DecimalField(decimal_places=4, max_digits=16, verbose_name='Saldo (Valor)')),
+                ('balance_unit_cost', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Custo Médio')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entries', to='inventory.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Lançamento de Valoração',
+                'verbose_name_plural': 'Lançamentos de Valoração',
+                'ordering': ['product', 'date', 'priority', 'source_id'],
+                'indexes': [models.Index(fields=['product', 'date', 'priority', 'source_id'], name='inventory_v_product_fd2bb5_idx'), models.Index(fields=['source_type', 'source_id'], name='inventory_v_source__9b6ce0_idx')],
+            },
+        ),
+    ]
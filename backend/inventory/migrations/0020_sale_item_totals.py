@@ -0,0 +1,67 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_sale_totals(apps, schema_editor):
+    Sale = apps.get_model('inventory', 'Sale')
+    SaleItem = apps.get_model('inventory', 'SaleItem')
+    totals = {
+        'total_cost': (Sum, 'total_cost'),
+        'total_profit': (Sum, 'profit'),
+        'total_tax': (Sum, 'tax'),
+        'total_freight': (Sum, 'freight'),
+        'item_count': (Count, 'id'),
+    }
+    expressions = {}
+    for field, (aggregate, item_field) in totals.items():
+        subquery = (
+            SaleItem.objects.filter(sale=OuterRef('pk'))
+            .order_by().values('sale').annotate(total=aggregate(item_field)).values('total')
+        )
+        expressions[field] = Coalesce(
+            Subquery(subquery), 0, output_field=Sale._meta.get_field(field)
+        )
+    Sale.objects.update(**expressions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Quantidade de Itens'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Custo Total'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='total_freight',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Frete Total'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='total_profit',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Lucro Total'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='total_tax',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Imposto Total'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['total_profit'], name='inventory_s_total_p_f575a9_idx'),
+        ),
+        migrations.RunPython(fill_sale_totals, migrations.RunPython.noop),
+    ]
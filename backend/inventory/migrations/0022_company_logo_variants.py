@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Caminhos das versões redimensionadas do logo (geradas automaticamente)', verbose_name='Variantes do Logo'),
+        ),
+    ]
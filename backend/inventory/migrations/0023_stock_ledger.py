@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:57
+
+from django.db import migrations, models
+
+
+def open_stock_ledger(apps, schema_editor):
+    """
+    Saldo de abertura do razão: vendas e entradas de produção anteriores não
+    têm movimentação, então cada produto recebe um ajuste com o estoque atual
+    """
+    Product = apps.get_model('inventory', 'Product')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    movements = [
+        StockMovement(
+            product_id=product_id,
+            movement_type='ajuste',
+            quantity=current_stock,
+            reference_type='ajuste_inventario',
+            notes='Saldo de abertura do razão de estoque',
+            automatic=True,
+        )
+        for product_id, current_stock in Product.objects.values_list('id', 'current_stock').iterator()
+    ]
+    StockMovement.objects.bulk_create(movements, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_company_logo_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='automatic',
+            field=models.BooleanField(default=False, help_text='Movimentação registrada por uma venda ou entrada de produção', verbose_name='Gerada pelo Sistema'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reference_type',
+            field=models.CharField(blank=True, choices=[('compra', 'Compra'), ('venda', 'Venda'), ('devolucao', 'Devolução'), ('transferencia', 'Transferência'), ('ajuste_inventario', 'Ajuste de Inventário'), ('perda', 'Perda'), ('producao', 'Entrada de Produção'), ('outros', 'Outros')], max_length=30, null=True, verbose_name='Tipo de Referência'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['reference_type', 'reference_id'], name='inventory_s_referen_5aaa1a_idx'),
+        ),
+        migrations.RunPython(open_stock_ledger, migrations.RunPython.noop),
+    ]
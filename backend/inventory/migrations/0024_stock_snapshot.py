@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-19 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Estoque')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Custo Unitário')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=16, verbose_name='Valor')),
+                ('last_movement_id', models.BigIntegerField(default=0, verbose_name='Última Movimentação')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Estoque',
+                'verbose_name_plural': 'Snapshots de Estoque',
+                'ordering': ['-date', 'product'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'created_at'], name='inventory_s_product_5919a9_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.product', verbose_name='Produto'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'date'), name='unique_stock_snapshot_per_day'),
+        ),
+    ]
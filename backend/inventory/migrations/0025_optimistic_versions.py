@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0024_stock_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Versão'),
+        ),
+        migrations.AddField(
+            model_name='productioncost',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Versão'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Versão'),
+        ),
+    ]
@@ -0,0 +1,246 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:10
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+from inventory import history
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0025_optimistic_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionCostHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(blank=True, default='', max_length=200, verbose_name='Descrição')),
+                ('cost_type', models.CharField(max_length=50, verbose_name='Tipo de Custo')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Valor')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('quantity', models.DecimalField(blank=True, decimal_places=2, help_text='Quantidade da venda vinculada a este custo', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Quantidade')),
+                ('refinement_code', models.CharField(blank=True, help_text='Código único que agrupa custos do mesmo refinamento', max_length=50, null=True, verbose_name='Código de Refinamento')),
+                ('refinement_name', models.CharField(blank=True, help_text='Nome descritivo do refinamento', max_length=200, null=True, verbose_name='Nome do Refinamento')),
+                ('is_locked', models.BooleanField(default=False, help_text='Indica se este custo foi usado em uma venda liquidada', verbose_name='Travado')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Travado em')),
+                ('cost_category', models.CharField(choices=[('sale', 'Custo de Venda'), ('production', 'Custo de Produção')], default='sale', help_text='sale = vinculado a venda; production = entrada de estoque/produção', max_length=20, verbose_name='Categoria')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versão')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Custos de Produção',
+                'verbose_name_plural': 'Histórico de Custos de Produção',
+                'ordering': ['-date'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SaleHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('sale_number', models.CharField(max_length=50, verbose_name='Número da Venda')),
+                ('sale_type', models.CharField(choices=[('venda', 'Venda'), ('dispensa', 'Dispensa'), ('pregao', 'Pregão')], default='venda', max_length=20, verbose_name='Tipo de Venda')),
+                ('sale_date', models.DateField(verbose_name='Data da Venda')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Valor Total')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Desconto')),
+                ('final_amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Valor Final')),
+                ('payment_method', models.CharField(blank=True, choices=[('dinheiro', 'Dinheiro'), ('cartao_credito', 'Cartão de Crédito'), ('cartao_debito', 'Cartão de Débito'), ('pix', 'PIX'), ('boleto', 'Boleto'), ('transferencia', 'Transferência')], max_length=20, null=True, verbose_name='Forma de Pagamento')),
+                ('nf', models.CharField(blank=True, help_text='Número da Nota Fiscal', max_length=50, null=True, verbose_name='Nota Fiscal')),
+                ('tax_percentage', models.DecimalField(decimal_places=2, default=0, help_text='Percentual de imposto aplicado sobre o valor total', max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('100.00'))], verbose_name='Percentual de Imposto (%)')),
+                ('status', models.CharField(choices=[('disputa', 'Disputa'), ('aguardando_julgamento', 'Aguardando Julgamento'), ('homologado', 'Homologado'), ('em_producao', 'Em Produção'), ('em_transito', 'Em Trânsito'), ('aguardando_pagamento', 'Aguardando Pagamento'), ('liquidado', 'Liquidado')], default='disputa', max_length=30, verbose_name='Status')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Custo Total')),
+                ('total_profit', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Lucro Total')),
+                ('total_tax', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Imposto Total')),
+                ('total_freight', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Frete Total')),
+                ('item_count', models.PositiveIntegerField(default=0, verbose_name='Quantidade de Itens')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versão')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Vendas',
+                'verbose_name_plural': 'Histórico de Vendas',
+                'ordering': ['-sale_date', '-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SaleItemHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Quantidade')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Unitário')),
+                ('unit_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Custo Unitário')),
+                ('cost_refinement_code', models.CharField(blank=True, help_text='Código do refinamento de custo usado neste item', max_length=50, null=True, verbose_name='Código de Refinamento de Custo')),
+                ('cost_snapshot', models.JSONField(blank=True, help_text='Detalhamento dos custos no momento da venda', null=True, verbose_name='Snapshot do Custo')),
+                ('cost_calculated_at', models.DateTimeField(blank=True, null=True, verbose_name='Custo Calculado em')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Desconto')),
+                ('tax', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Imposto')),
+                ('freight', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Frete')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Total')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Custo Total')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Lucro')),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Itens de Venda',
+                'verbose_name_plural': 'Histórico de Itens de Venda',
+                'ordering': [],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovementHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída'), ('ajuste', 'Ajuste')], max_length=20, verbose_name='Tipo de Movimentação')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Quantidade')),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Unitário')),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Total')),
+                ('reference_type', models.CharField(blank=True, choices=[('compra', 'Compra'), ('venda', 'Venda'), ('devolucao', 'Devolução'), ('transferencia', 'Transferência'), ('ajuste_inventario', 'Ajuste de Inventário'), ('perda', 'Perda'), ('producao', 'Entrada de Produção'), ('outros', 'Outros')], max_length=30, null=True, verbose_name='Tipo de Referência')),
+                ('reference_id', models.IntegerField(blank=True, null=True, verbose_name='ID de Referência')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('automatic', models.BooleanField(default=False, help_text='Movimentação registrada por uma venda ou entrada de produção', verbose_name='Gerada pelo Sistema')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Movimentações',
+                'verbose_name_plural': 'Histórico de Movimentações',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('sale_number', models.CharField(max_length=50, verbose_name='Número da Venda')),
+                ('sale_type', models.CharField(choices=[('venda', 'Venda'), ('dispensa', 'Dispensa'), ('pregao', 'Pregão')], default='venda', max_length=20, verbose_name='Tipo de Venda')),
+                ('sale_date', models.DateField(verbose_name='Data da Venda')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Valor Total')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Desconto')),
+                ('final_amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Valor Final')),
+                ('payment_method', models.CharField(blank=True, choices=[('dinheiro', 'Dinheiro'), ('cartao_credito', 'Cartão de Crédito'), ('cartao_debito', 'Cartão de Débito'), ('pix', 'PIX'), ('boleto', 'Boleto'), ('transferencia', 'Transferência')], max_length=20, null=True, verbose_name='Forma de Pagamento')),
+                ('nf', models.CharField(blank=True, help_text='Número da Nota Fiscal', max_length=50, null=True, verbose_name='Nota Fiscal')),
+                ('tax_percentage', models.DecimalField(decimal_places=2, default=0, help_text='Percentual de imposto aplicado sobre o valor total', max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.00')), django.core.validators.MaxValueValidator(Decimal('100.00'))], verbose_name='Percentual de Imposto (%)')),
+                ('status', models.CharField(choices=[('disputa', 'Disputa'), ('aguardando_julgamento', 'Aguardando Julgamento'), ('homologado', 'Homologado'), ('em_producao', 'Em Produção'), ('em_transito', 'Em Trânsito'), ('aguardando_pagamento', 'Aguardando Pagamento'), ('liquidado', 'Liquidado')], default='disputa', max_length=30, verbose_name='Status')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Custo Total')),
+                ('total_profit', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Lucro Total')),
+                ('total_tax', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Imposto Total')),
+                ('total_freight', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Frete Total')),
+                ('item_count', models.PositiveIntegerField(default=0, verbose_name='Quantidade de Itens')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versão')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Atualizado em')),
+                ('customer', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.customer', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Vendas Arquivadas',
+                'verbose_name_plural': 'Vendas Arquivadas',
+                'ordering': ['-sale_date', '-created_at'],
+                'managed': True,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedProductionCost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(blank=True, default='', max_length=200, verbose_name='Descrição')),
+                ('cost_type', models.CharField(max_length=50, verbose_name='Tipo de Custo')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Valor')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('quantity', models.DecimalField(blank=True, decimal_places=2, help_text='Quantidade da venda vinculada a este custo', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Quantidade')),
+                ('refinement_code', models.CharField(blank=True, help_text='Código único que agrupa custos do mesmo refinamento', max_length=50, null=True, verbose_name='Código de Refinamento')),
+                ('refinement_name', models.CharField(blank=True, help_text='Nome descritivo do refinamento', max_length=200, null=True, verbose_name='Nome do Refinamento')),
+                ('is_locked', models.BooleanField(default=False, help_text='Indica se este custo foi usado em uma venda liquidada', verbose_name='Travado')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Travado em')),
+                ('cost_category', models.CharField(choices=[('sale', 'Custo de Venda'), ('production', 'Custo de Produção')], default='sale', help_text='sale = vinculado a venda; production = entrada de estoque/produção', max_length=20, verbose_name='Categoria')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Versão')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+                ('customer', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.customer', verbose_name='Cliente')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.product', verbose_name='Produto')),
+                ('locked_by_sale', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='locked_costs', to='inventory.archivedsale', verbose_name='Venda que Travou')),
+            ],
+            options={
+                'verbose_name': 'Custos de Produção Arquivados',
+                'verbose_name_plural': 'Custos de Produção Arquivados',
+                'ordering': ['-date'],
+                'managed': True,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSaleItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Quantidade')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Unitário')),
+                ('unit_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Custo Unitário')),
+                ('cost_refinement_code', models.CharField(blank=True, help_text='Código do refinamento de custo usado neste item', max_length=50, null=True, verbose_name='Código de Refinamento de Custo')),
+                ('cost_snapshot', models.JSONField(blank=True, help_text='Detalhamento dos custos no momento da venda', null=True, verbose_name='Snapshot do Custo')),
+                ('cost_calculated_at', models.DateTimeField(blank=True, null=True, verbose_name='Custo Calculado em')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Desconto')),
+                ('tax', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Imposto')),
+                ('freight', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Frete')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Total')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Custo Total')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Lucro')),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Atualizado em')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.product', verbose_name='Produto')),
+                ('sale', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='items', to='inventory.archivedsale', verbose_name='Venda')),
+            ],
+            options={
+                'verbose_name': 'Itens de Venda Arquivados',
+                'verbose_name_plural': 'Itens de Venda Arquivados',
+                'ordering': [],
+                'managed': True,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedStockMovement',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída'), ('ajuste', 'Ajuste')], max_length=20, verbose_name='Tipo de Movimentação')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Quantidade')),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Unitário')),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Preço Total')),
+                ('reference_type', models.CharField(blank=True, choices=[('compra', 'Compra'), ('venda', 'Venda'), ('devolucao', 'Devolução'), ('transferencia', 'Transferência'), ('ajuste_inventario', 'Ajuste de Inventário'), ('perda', 'Perda'), ('producao', 'Entrada de Produção'), ('outros', 'Outros')], max_length=30, null=True, verbose_name='Tipo de Referência')),
+                ('reference_id', models.IntegerField(blank=True, null=True, verbose_name='ID de Referência')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('automatic', models.BooleanField(default=False, help_text='Movimentação registrada por uma venda ou entrada de produção', verbose_name='Gerada pelo Sistema')),
+                ('created_at', models.DateTimeField(verbose_name='Criado em')),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.product', verbose_name='Produto')),
+            ],
+            options={
+                'verbose_name': 'Movimentações Arquivadas',
+                'verbose_name_plural': 'Movimentações Arquivadas',
+                'ordering': ['-created_at'],
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['sale_date'], name='archived_sale_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedproductioncost',
+            index=models.Index(fields=['refinement_code'], name='archived_cost_refinement_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedstockmovement',
+            index=models.Index(fields=['product', 'created_at'], name='archived_move_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedstockmovement',
+            index=models.Index(fields=['reference_type', 'reference_id'], name='archived_move_reference_idx'),
+        ),
+        migrations.RunPython(history.create_views, history.drop_views),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0026_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='Chave')),
+                ('scope', models.CharField(max_length=255, verbose_name='Endpoint')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Assinatura da Requisição')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status HTTP')),
+                ('content_type', models.CharField(blank=True, default='', max_length=100, verbose_name='Content-Type')),
+                ('content', models.TextField(blank=True, default='', verbose_name='Resposta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expira em')),
+            ],
+            options={
+                'verbose_name': 'Chave de Idempotência',
+                'verbose_name_plural': 'Chaves de Idempotência',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('key', 'scope'), name='unique_idempotency_key_per_scope')],
+            },
+        ),
+    ]
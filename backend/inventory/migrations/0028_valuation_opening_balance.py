@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:34
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_entries(apps, schema_editor):
+    """Reprocessamentos simultâneos podiam gravar a mesma origem duas vezes"""
+    ValuationEntry = apps.get_model('inventory', 'ValuationEntry')
+    duplicates = (
+        ValuationEntry.objects.values('source_type', 'source_id')
+        .annotate(count=Count('id'), keep=Min('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        ValuationEntry.objects.filter(
+            source_type=duplicate['source_type'], source_id=duplicate['source_id']
+        ).exclude(pk=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0027_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='valuationentry',
+            name='source_type',
+            field=models.CharField(choices=[('abertura', 'Saldo de Abertura'), ('producao', 'Entrada de Produção'), ('movimentacao', 'Movimentação de Estoque'), ('venda', 'Item de Venda')], max_length=20, verbose_name='Origem'),
+        ),
+        migrations.RunPython(remove_duplicate_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='valuationentry',
+            constraint=models.UniqueConstraint(fields=('source_type', 'source_id'), name='unique_valuation_entry_per_source'),
+        ),
+    ]
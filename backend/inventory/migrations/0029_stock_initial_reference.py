@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0028_valuation_opening_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedstockmovement',
+            name='reference_type',
+            field=models.CharField(blank=True, choices=[('compra', 'Compra'), ('venda', 'Venda'), ('devolucao', 'Devolução'), ('transferencia', 'Transferência'), ('ajuste_inventario', 'Ajuste de Inventário'), ('perda', 'Perda'), ('producao', 'Entrada de Produção'), ('estoque_inicial', 'Estoque Inicial'), ('outros', 'Outros')], max_length=30, null=True, verbose_name='Tipo de Referência'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reference_type',
+            field=models.CharField(blank=True, choices=[('compra', 'Compra'), ('venda', 'Venda'), ('devolucao', 'Devolução'), ('transferencia', 'Transferência'), ('ajuste_inventario', 'Ajuste de Inventário'), ('perda', 'Perda'), ('producao', 'Entrada de Produção'), ('estoque_inicial', 'Estoque Inicial'), ('outros', 'Outros')], max_length=30, null=True, verbose_name='Tipo de Referência'),
+        ),
+    ]
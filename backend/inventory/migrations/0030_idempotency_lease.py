@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_stock_initial_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='claimed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Reservada em'),
+        ),
+    ]
@@ -0,0 +1,291 @@
+"""
+Mixins compartilhados pelas viewsets do inventário.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+from . import idempotency
+from .models import Tombstone
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=id,name restringe os campos retornados nas leituras (GET).
+    ?expand=items inclui relações caras que a viewset só carrega sob pedido
+    (veja `expandable_fields`).
+    """
+    expandable_fields = ()
+
+    def get_sparse_fields(self):
+        value = self.request.query_params.get('fields') if self.request else None
+        if not value:
+            return None
+        return [field.strip() for field in value.split(',') if field.strip()]
+
+    def get_expand(self):
+        value = self.request.query_params.get('expand', '') if self.request else ''
+        return {name.strip() for name in value.split(',') if name.strip()} & set(self.expandable_fields)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method == 'GET':
+            fields = self.get_sparse_fields()
+            if fields is not None:
+                kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class RowPlan:
+    """
+    Plano pré-compilado para montar a saída de um serializer direto das
+    tuplas de `.values_list()`, sem instanciar models nem passar campo a campo
+    pelo `to_representation` do serializer.
+
+    Reproduz a semântica do DRF para fontes com vários níveis
+    (ex.: `category.name` com categoria nula): default, null ou campo omitido.
+    """
+    # Campos cujo valor vindo do banco já é a representação final
+    IDENTITY_FIELDS = (
+        serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+        serializers.ChoiceField, serializers.JSONField, serializers.PrimaryKeyRelatedField,
+    )
+    # Campos que dependem da instância, de request ou de relações N:N
+    UNSUPPORTED_FIELDS = (
+        serializers.SerializerMethodField, serializers.BaseSerializer,
+        serializers.ManyRelatedField, serializers.FileField, serializers.HiddenField,
+    )
+
+    def __init__(self, serializer, model):
+        self.columns = []
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, self.UNSUPPORTED_FIELDS) or field.source == '*':
+                raise NotImplementedError(name)
+            if isinstance(field, serializers.RelatedField) and not isinstance(
+                field, serializers.PrimaryKeyRelatedField
+            ):
+                raise NotImplementedError(name)
+            path = field.source_attrs
+            value_index = self._column('__'.join(path))
+            # Colunas dos níveis intermediários, para distinguir "relação nula"
+            # de "valor nulo"
+            parents = [self._column('__'.join(path[:i])) for i in range(1, len(path))]
+            converter = None if isinstance(field, self.IDENTITY_FIELDS) else field.to_representation
+            self.fields.append((name, field, value_index, parents, converter))
+        # Valida as colunas (métodos como get_status_display não são colunas)
+        model._default_manager.none().values_list(*self.columns)
+
+    def _column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    def build(self, row):
+        data = {}
+        for name, field, value_index, parents, converter in self.fields:
+            if any(row[index] is None for index in parents):
+                if field.default is not empty:
+                    data[name] = field.get_default()
+                elif field.allow_null:
+                    data[name] = None
+                continue
+            value = row[value_index]
+            if value is None:
+                data[name] = None
+            else:
+                data[name] = value if converter is None else converter(value)
+        return data
+
+
+class FastListMixin:
+    """
+    Listagens somente leitura montadas a partir de `.values_list()` com o
+    `RowPlan` do serializer da viewset. Serializers com campos não suportados
+    (métodos, aninhados, arquivos) seguem pelo caminho padrão do DRF.
+    """
+    _row_plans = {}
+
+    def get_row_plan(self, serializer):
+        key = (type(serializer), tuple(serializer.fields))
+        if key not in self._row_plans:
+            try:
+                self._row_plans[key] = RowPlan(serializer, self.get_queryset().model)
+            except (NotImplementedError, FieldError):
+                self._row_plans[key] = None
+        return self._row_plans[key]
+
+    def fast_list(self, queryset, serializer):
+        plan = self.get_row_plan(serializer)
+        if plan is None:
+            return None
+        rows = queryset.prefetch_related(None).values_list(*plan.columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([plan.build(row) for row in page])
+        return Response([plan.build(row) for row in rows])
+
+    def list(self, request, *args, **kwargs):
+        response = self.fast_list(self.filter_queryset(self.get_queryset()), self.get_serializer())
+        if response is None:
+            return super().list(request, *args, **kwargs)
+        return response
+
+
+class DeltaSyncMixin:
+    """
+    GET <recurso>/sync/?changed_since=<cursor> retorna só as linhas alteradas
+    (por `updated_at`) e os ids excluídos desde o cursor, mais o novo cursor.
+    Sem cursor, ou com cursor mais antigo que a retenção das exclusões, a
+    resposta traz todas as linhas e `reset: true`.
+
+    Os filtros da viewset (ex.: ?active=) valem, mas busca, ordenação e
+    paginação não. Requer o FastListMixin.
+    """
+    # Margem para transações que gravaram `updated_at` antes do cursor mas
+    # só confirmaram depois dele; linhas repetidas são inofensivas no cliente
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def get_sync_serializer(self):
+        return self.get_serializer()
+
+    def sync_rows(self, queryset):
+        serializer = self.get_sync_serializer()
+        plan = self.get_row_plan(serializer)
+        if plan is None:
+            return self.get_serializer(queryset, many=True).data
+        return [plan.build(row) for row in queryset.prefetch_related(None).values_list(*plan.columns)]
+
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        now = timezone.now()
+        retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+        changed_since = request.query_params.get('changed_since')
+        if changed_since:
+            since = parse_datetime(changed_since)
+            if since is None:
+                raise ValidationError({'changed_since': 'Cursor inválido.'})
+            if timezone.is_aware(since) and not settings.USE_TZ:
+                # Cursor com fuso (ex.: ...+00:00): compara na hora local, como `updated_at`
+                since = timezone.make_naive(since)
+        else:
+            since = None
+        reset = since is None or since < now - retention
+
+        queryset = self.get_queryset().order_by('updated_at', 'pk')
+        deleted = []
+        if not reset:
+            queryset = queryset.filter(updated_at__gte=since)
+            deleted = list(
+                Tombstone.objects.filter(
+                    resource=queryset.model._meta.model_name, deleted_at__gte=since
+                ).order_by().values_list('object_id', flat=True).distinct()
+            )
+        return Response({
+            'cursor': (now - self.SYNC_OVERLAP).isoformat(),
+            'reset': reset,
+            'changed': self.sync_rows(queryset),
+            'deleted': deleted,
+        })
+
+
+class IdempotencyMixin:
+    """
+    Suporte ao cabeçalho Idempotency-Key nas ações de `idempotent_actions`
+    (veja inventory/idempotency.py): repetições de um POST recebem a resposta
+    da primeira execução em vez de criar o registro de novo. Sem o cabeçalho
+    nada muda.
+    """
+    idempotent_actions = ('create',)
+
+    def dispatch(self, request, *args, **kwargs):
+        dispatch = super().dispatch
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if action not in self.idempotent_actions or not request.headers.get(idempotency.HEADER, '').strip():
+            return dispatch(request, *args, **kwargs)
+        scope = f'{request.method} {request.path}'
+        return idempotency.execute(request, scope, lambda: dispatch(request, *args, **kwargs))
+
+
+class VersionConflict(Exception):
+    pass
+
+
+class OptimisticLockMixin:
+    """
+    Controle de concorrência otimista pelo campo `version` do model.
+
+    A versão esperada vem do cabeçalho `If-Match` (ETag `"N"` devolvido nas
+    leituras) ou do campo `version` do corpo. A gravação só acontece se a
+    versão no banco ainda for a esperada; caso contrário a resposta é 409 com
+    a representação atual do registro. Sem versão informada a edição segue
+    como antes (última gravação vence), mas a versão é incrementada.
+    """
+    IF_MATCH = re.compile(r'^(?:W/)?"?(\d+)"?$')
+
+    def get_expected_version(self, request):
+        header = request.META.get('HTTP_IF_MATCH', '').strip()
+        if header and header != '*':
+            match = self.IF_MATCH.match(header)
+            if match is None:
+                raise ValidationError({'version': 'Cabeçalho If-Match inválido.'})
+            return int(match.group(1))
+        value = request.data.get('version') if hasattr(request.data, 'get') else None
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({'version': 'Versão inválida.'})
+
+    def get_conflict_serializer(self, instance):
+        return self.get_serializer(instance)
+
+    def set_etag(self, response, version):
+        response['ETag'] = f'"{version}"'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return self.set_etag(Response(serializer.data), instance.version)
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        expected = self.get_expected_version(request)
+        try:
+            with transaction.atomic():
+                instance = self.get_object()
+                # UPDATE condicional: trava a linha e só passa se ninguém gravou antes
+                rows = type(instance).objects.filter(pk=instance.pk)
+                if expected is not None:
+                    rows = rows.filter(version=expected)
+                if not rows.update(version=F('version') + 1):
+                    raise VersionConflict
+                instance.refresh_from_db()
+                serializer = self.get_serializer(instance, data=request.data, partial=partial)
+                serializer.is_valid(raise_exception=True)
+                self.perform_update(serializer)
+        except VersionConflict:
+            current = self.get_object()
+            response = Response({
+                'error': 'O registro foi alterado por outro usuário. Recarregue e tente novamente.',
+                'current': self.get_conflict_serializer(current).data,
+            }, status=status.HTTP_409_CONFLICT)
+            return self.set_etag(response, current.version)
+
+        if getattr(instance, '_prefetched_objects_cache', None):
+            instance._prefetched_objects_cache = {}
+        return self.set_etag(Response(serializer.data), instance.version)
@@ -1,8 +1,39 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
 
+class Sequence(models.Model):
+    """
+    Contador nomeado para gerar códigos sem colisão entre requisições ou
+    workers concorrentes: o UPDATE trava a linha até o fim da transação.
+    """
+    name = models.CharField(max_length=50, unique=True, verbose_name='Nome')
+    last_value = models.BigIntegerField(default=0, verbose_name='Último Valor')
+
+    class Meta:
+        verbose_name = 'Sequência'
+        verbose_name_plural = 'Sequências'
+
+    def __str__(self):
+        return f'{self.name} ({self.last_value})'
+
+    @classmethod
+    def allocate(cls, name, count=1):
+        """Reserva `count` valores consecutivos e retorna o range reservado"""
+        with transaction.atomic():
+            if not cls.objects.filter(name=name).update(last_value=models.F('last_value') + count):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(name=name, last_value=count)
+                except IntegrityError:
+                    cls.objects.filter(name=name).update(last_value=models.F('last_value') + count)
+            last_value = cls.objects.filter(name=name).values_list('last_value', flat=True).get()
+        return range(last_value - count + 1, last_value + 1)
+
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name='Nome')
     description = models.TextField(blank=True, null=True, verbose_name='Descrição')
@@ -69,8 +100,9 @@ class Product(models.Model):
     )
     location = models.CharField(max_length=100, blank=True, null=True, verbose_name='Localização')
     active = models.BooleanField(default=True, verbose_name='Ativo')
+    version = models.PositiveIntegerField(default=1, verbose_name='Versão')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
-    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
 
     class Meta:
         verbose_name = 'Produto'
@@ -106,6 +138,7 @@ class Customer(models.Model):
     notes = models.TextField(blank=True, null=True, verbose_name='Observações')
     active = models.BooleanField(default=True, verbose_name='Ativo')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
 
     class Meta:
         verbose_name = 'Cliente'
@@ -142,6 +175,7 @@ class Supplier(models.Model):
     notes = models.TextField(blank=True, null=True, verbose_name='Observações')
     active = models.BooleanField(default=True, verbose_name='Ativo')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
 
     class Meta:
         verbose_name = 'Fornecedor'
@@ -185,7 +219,7 @@ class Expense(models.Model):
     notes = models.TextField(blank=True, null=True, verbose_name='Observações')
     active = models.BooleanField(default=True, verbose_name='Ativo')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
-    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
 
     class Meta:
         verbose_name = 'Despesa'
@@ -279,6 +313,7 @@ class ProductionCost(models.Model):
         help_text='sale = vinculado a venda; production = entrada de estoque/produção'
     )
 
+    version = models.PositiveIntegerField(default=1, verbose_name='Versão')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
 
     class Meta:
@@ -292,7 +327,7 @@ class ProductionCost(models.Model):
 
     def __str__(self):
         if self.refinement_code:
-            return f'{self.refinement_code} - {self.product.name} - {self.get_cost_type_display()} - R$ {self.value}'
+            return f'{self.refinement_code} - {self.product.name} - {self.cost_type} - R$ {self.value}'
         return f'{self.product.name} - {self.description} - R$ {self.value}'
 
 
@@ -381,12 +416,34 @@ class Sale(models.Model):
     )
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='disputa', verbose_name='Status')
     notes = models.TextField(blank=True, null=True, verbose_name='Observações')
+
+    # Totais dos itens, mantidos por Sale.refresh_totals()
+    total_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Custo Total')
+    total_profit = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Lucro Total')
+    total_tax = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Imposto Total')
+    total_freight = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Frete Total')
+    item_count = models.PositiveIntegerField(default=0, verbose_name='Quantidade de Itens')
+
+    version = models.PositiveIntegerField(default=1, verbose_name='Versão')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
+
+    # Campo do total -> (agregação, campo do SaleItem)
+    ITEM_TOTALS = {
+        'total_cost': (models.Sum, 'total_cost'),
+        'total_profit': (models.Sum, 'profit'),
+        'total_tax': (models.Sum, 'tax'),
+        'total_freight': (models.Sum, 'freight'),
+        'item_count': (models.Count, 'id'),
+    }
 
     class Meta:
         verbose_name = 'Venda'
         verbose_name_plural = 'Vendas'
         ordering = ['-sale_date', '-created_at']
+        indexes = [
+            models.Index(fields=['total_profit']),
+        ]
 
     def __str__(self):
         return f'{self.sale_number} - R$ {self.final_amount}'
@@ -395,6 +452,26 @@ class Sale(models.Model):
         self.final_amount = self.total_amount - self.discount
         super().save(*args, **kwargs)
 
+    @classmethod
+    def item_totals_expressions(cls):
+        """Subqueries correlacionadas que recalculam os totais a partir dos itens"""
+        expressions = {}
+        for field, (aggregate, item_field) in cls.ITEM_TOTALS.items():
+            subquery = (
+                SaleItem.objects.filter(sale=models.OuterRef('pk'))
+                .order_by().values('sale').annotate(total=aggregate(item_field)).values('total')
+            )
+            expressions[field] = Coalesce(
+                models.Subquery(subquery), 0, output_field=cls._meta.get_field(field)
+            )
+        return expressions
+
+    @classmethod
+    def refresh_totals(cls, sale_ids=None):
+        """Recalcula os totais das vendas informadas (ou de todas) num único UPDATE"""
+        queryset = cls.objects.all() if sale_ids is None else cls.objects.filter(pk__in=sale_ids)
+        return queryset.update(**cls.item_totals_expressions(), updated_at=timezone.now())
+
 
 class SaleItem(models.Model):
     sale = models.ForeignKey(
@@ -486,6 +563,7 @@ class SaleItem(models.Model):
         default=0,
         verbose_name='Lucro'
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')
 
     class Meta:
         verbose_name = 'Item de Venda'
@@ -518,6 +596,8 @@ class StockMovement(models.Model):
         ('transferencia', 'Transferência'),
         ('ajuste_inventario', 'Ajuste de Inventário'),
         ('perda', 'Perda'),
+        ('producao', 'Entrada de Produção'),
+        ('estoque_inicial', 'Estoque Inicial'),
         ('outros', 'Outros'),
     ]
 
@@ -559,12 +639,21 @@ class StockMovement(models.Model):
     )
     reference_id = models.IntegerField(blank=True, null=True, verbose_name='ID de Referência')
     notes = models.TextField(blank=True, null=True, verbose_name='Observações')
+    automatic = models.BooleanField(
+        default=False,
+        verbose_name='Gerada pelo Sistema',
+        help_text='Movimentação registrada por uma venda ou entrada de produção'
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
 
     class Meta:
         verbose_name = 'Movimentação de Estoque'
         verbose_name_plural = 'Movimentações de Estoque'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['reference_type', 'reference_id']),
+            models.Index(fields=['product', 'created_at']),
+        ]
 
     def __str__(self):
         return f'{self.product.name} - {self.movement_type} - {self.quantity}'
@@ -577,14 +666,49 @@ class StockMovement(models.Model):
         super().save(*args, **kwargs)
         
         if is_new:
+            # Só o estoque: o preço de compra é mantido pelo motor de valoração.
+            # O UPDATE com F() não perde movimentações simultâneas do produto.
             if self.movement_type == 'entrada':
-                self.product.current_stock += self.quantity
+                current_stock = models.F('current_stock') + self.quantity
             elif self.movement_type == 'saida':
-                self.product.current_stock -= self.quantity
-            elif self.movement_type == 'ajuste':
-                self.product.current_stock = self.quantity
-            
-            self.product.save()
+                current_stock = models.F('current_stock') - self.quantity
+            else:
+                current_stock = self.quantity
+            Product.objects.filter(pk=self.product_id).update(
+                current_stock=current_stock, version=models.F('version') + 1, updated_at=timezone.now()
+            )
+            self.product.refresh_from_db(fields=['current_stock', 'version', 'updated_at'])
+
+
+class StockSnapshot(models.Model):
+    """
+    Estoque e custo de um produto no fim de um dia. `last_movement_id` é a
+    última movimentação incluída: o estoque em datas posteriores é o snapshot
+    mais as movimentações seguintes (veja stock.stock_at).
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        verbose_name='Produto'
+    )
+    date = models.DateField(verbose_name='Data')
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, verbose_name='Estoque')
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, verbose_name='Custo Unitário')
+    value = models.DecimalField(max_digits=16, decimal_places=2, verbose_name='Valor')
+    last_movement_id = models.BigIntegerField(default=0, verbose_name='Última Movimentação')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+
+    class Meta:
+        verbose_name = 'Snapshot de Estoque'
+        verbose_name_plural = 'Snapshots de Estoque'
+        ordering = ['-date', 'product']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_stock_snapshot_per_day'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} - {self.date}: {self.quantity}'
 
 
 class Company(models.Model):
@@ -613,6 +737,12 @@ class Company(models.Model):
     
     # Logo
     logo = models.ImageField(upload_to='company_logos/', blank=True, null=True, verbose_name='Logo')
+    logo_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Variantes do Logo',
+        help_text='Caminhos das versões redimensionadas do logo (geradas automaticamente)'
+    )
     
     # Metadata
     active = models.BooleanField(default=True, verbose_name='Ativo')
@@ -626,3 +756,215 @@ class Company(models.Model):
 
     def __str__(self):
         return self.razao_social
+
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluido', 'Concluído'),
+        ('falhou', 'Falhou'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name='Tarefa')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Parâmetros')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name='Status')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Tentativas')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='Máximo de Tentativas')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')
+    progress_message = models.CharField(max_length=200, blank=True, default='', verbose_name='Mensagem de Progresso')
+    result = models.JSONField(blank=True, null=True, verbose_name='Resultado')
+    error = models.TextField(blank=True, null=True, verbose_name='Erro')
+    run_after = models.DateTimeField(verbose_name='Executar Após')
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Tarefa em Segundo Plano'
+        verbose_name_plural = 'Tarefas em Segundo Plano'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.get_status_display()})'
+
+
+class ValuationEntry(models.Model):
+    """
+    Linha do razão de valoração de estoque: cada entrada de produção,
+    movimentação ou item de venda gera uma linha com o saldo resultante.
+    O saldo inicial do produto é o lançamento de abertura (source_id = produto).
+    """
+    SOURCE_TYPE_CHOICES = [
+        ('abertura', 'Saldo de Abertura'),
+        ('producao', 'Entrada de Produção'),
+        ('movimentacao', 'Movimentação de Estoque'),
+        ('venda', 'Item de Venda'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='valuation_entries',
+        verbose_name='Produto'
+    )
+    date = models.DateField(verbose_name='Data')
+    priority = models.PositiveSmallIntegerField(default=0, verbose_name='Prioridade')
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPE_CHOICES, verbose_name='Origem')
+    source_id = models.BigIntegerField(verbose_name='ID de Origem')
+    quantity = models.DecimalField(max_digits=14, decimal_places=4, verbose_name='Quantidade')
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, verbose_name='Custo Unitário')
+    balance_quantity = models.DecimalField(max_digits=14, decimal_places=4, verbose_name='Saldo (Quantidade)')
+    balance_value = models.DecimalField(max_digits=16, decimal_places=4, verbose_name='Saldo (Valor)')
+    balance_unit_cost = models.DecimalField(max_digits=14, decimal_places=4, verbose_name='Custo Médio')
+
+    class Meta:
+        verbose_name = 'Lançamento de Valoração'
+        verbose_name_plural = 'Lançamentos de Valoração'
+        ordering = ['product', 'date', 'priority', 'source_id']
+        indexes = [
+            models.Index(fields=['product', 'date', 'priority', 'source_id']),
+            models.Index(fields=['source_type', 'source_id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['source_type', 'source_id'], name='unique_valuation_entry_per_source'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} - {self.date} - {self.get_source_type_display()} #{self.source_id}'
+
+
+class Tombstone(models.Model):
+    """
+    Registro de exclusão usado pela sincronização incremental (?changed_since=):
+    informa aos clientes quais ids sumiram desde o último cursor.
+    """
+    resource = models.CharField(max_length=50, verbose_name='Recurso')
+    object_id = models.BigIntegerField(verbose_name='ID do Objeto')
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name='Excluído em')
+
+    class Meta:
+        verbose_name = 'Registro de Exclusão'
+        verbose_name_plural = 'Registros de Exclusão'
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['resource', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.resource} #{self.object_id} ({self.deleted_at})'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Resposta guardada de um POST enviado com o cabeçalho Idempotency-Key
+    (veja inventory/idempotency.py). `status_code` vazio: requisição em
+    andamento; as repetições esperam por ela e recebem a mesma resposta.
+    """
+    key = models.CharField(max_length=255, verbose_name='Chave')
+    scope = models.CharField(max_length=255, verbose_name='Endpoint')
+    fingerprint = models.CharField(max_length=64, verbose_name='Assinatura da Requisição')
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status HTTP')
+    content_type = models.CharField(max_length=100, blank=True, default='', verbose_name='Content-Type')
+    content = models.TextField(blank=True, default='', verbose_name='Resposta')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    # Início da execução em andamento; reservas antigas sem resposta podem ser assumidas
+    claimed_at = models.DateTimeField(default=timezone.now, verbose_name='Reservada em')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Expira em')
+
+    class Meta:
+        verbose_name = 'Chave de Idempotência'
+        verbose_name_plural = 'Chaves de Idempotência'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'scope'], name='unique_idempotency_key_per_scope'),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} {self.key} ({self.status_code or "em andamento"})'
+
+
+# Arquivo morto: vendas liquidadas antigas (com itens, custos travados e
+# movimentações) saem das tabelas de uso diário para tabelas Archived* com as
+# mesmas colunas e ids (veja inventory/archive.py). As views *History unem as
+# duas (UNION ALL) para relatórios, valoração e razão de estoque.
+#
+# Os campos são copiados dos models originais: um campo novo num deles entra
+# no arquivo pelo makemigrations, mas a view correspondente precisa ser
+# recriada numa migração (veja 0026_archive).
+
+def _cold_field(field, targets):
+    if field.primary_key:
+        return models.BigIntegerField(primary_key=True, verbose_name='ID')
+    if field.is_relation:
+        remote = field.remote_field.model
+        target = targets.get(remote if isinstance(remote, str) else remote.__name__)
+        return models.ForeignKey(
+            target or remote,
+            on_delete=models.DO_NOTHING,
+            db_constraint=False,
+            related_name=field.remote_field.related_name if target else '+',
+            null=field.null,
+            blank=field.blank,
+            verbose_name=field.verbose_name,
+        )
+    name, path, args, kwargs = field.deconstruct()
+    # Datas e unicidade vêm do registro original
+    for option in ('auto_now', 'auto_now_add', 'unique'):
+        kwargs.pop(option, None)
+    return field.__class__(*args, **kwargs)
+
+
+def cold_model(name, source, targets=None, managed=True, verbose_name='', indexes=()):
+    attrs = {
+        field.name: _cold_field(field, targets or {})
+        for field in source._meta.concrete_fields
+    }
+    attrs['__module__'] = __name__
+    attrs['Meta'] = type('Meta', (), {
+        'managed': managed,
+        'verbose_name': verbose_name,
+        'verbose_name_plural': verbose_name,
+        'ordering': source._meta.ordering,
+        'indexes': list(indexes),
+    })
+    return type(name, (models.Model,), attrs)
+
+
+ArchivedSale = cold_model(
+    'ArchivedSale', Sale, verbose_name='Vendas Arquivadas',
+    indexes=[models.Index(fields=['sale_date'], name='archived_sale_date_idx')],
+)
+ArchivedSaleItem = cold_model(
+    'ArchivedSaleItem', SaleItem, {'Sale': 'ArchivedSale'}, verbose_name='Itens de Venda Arquivados',
+)
+ArchivedProductionCost = cold_model(
+    'ArchivedProductionCost', ProductionCost, {'Sale': 'ArchivedSale'},
+    verbose_name='Custos de Produção Arquivados',
+    indexes=[models.Index(fields=['refinement_code'], name='archived_cost_refinement_idx')],
+)
+ArchivedStockMovement = cold_model(
+    'ArchivedStockMovement', StockMovement, verbose_name='Movimentações Arquivadas',
+    indexes=[
+        models.Index(fields=['product', 'created_at'], name='archived_move_product_idx'),
+        models.Index(fields=['reference_type', 'reference_id'], name='archived_move_reference_idx'),
+    ],
+)
+
+# Views (UNION ALL das tabelas de uso diário com o arquivo), somente leitura
+SaleHistory = cold_model('SaleHistory', Sale, managed=False, verbose_name='Histórico de Vendas')
+SaleItemHistory = cold_model(
+    'SaleItemHistory', SaleItem, {'Sale': 'SaleHistory'}, managed=False,
+    verbose_name='Histórico de Itens de Venda',
+)
+ProductionCostHistory = cold_model(
+    'ProductionCostHistory', ProductionCost, {'Sale': 'SaleHistory'}, managed=False,
+    verbose_name='Histórico de Custos de Produção',
+)
+StockMovementHistory = cold_model(
+    'StockMovementHistory', StockMovement, managed=False, verbose_name='Histórico de Movimentações',
+)
@@ -0,0 +1,42 @@
+"""
+Consultas independentes executadas ao mesmo tempo.
+
+Cada função roda numa thread de um pool fixo por processo, com a própria
+conexão com o banco, e o tempo total passa a ser o da consulta mais lenta em
+vez da soma de todas. O contexto (ex.: leitura na réplica) é copiado para a
+thread. O pool é limitado por PARALLEL_MAX_WORKERS (settings): requisições
+simultâneas disputam as mesmas threads e o número de conexões abertas por
+processo não passa desse limite.
+
+As funções não devem chamar `gather_sync` de novo: esperariam por threads do
+mesmo pool.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PARALLEL_MAX_WORKERS', MAX_WORKERS),
+    thread_name_prefix='parallel',
+)
+
+
+def _run(func):
+    try:
+        return func()
+    finally:
+        # A thread volta para o pool: não deixa conexão aberta para trás
+        connections.close_all()
+
+
+def gather_sync(**funcs):
+    """Executa as funções (sem argumentos) em paralelo e retorna {nome: resultado}"""
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, _run, func)
+        for name, func in funcs.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,169 @@
+"""
+Reconciliação do `current_stock` dos produtos.
+
+O catálogo é dividido em faixas de id e cada faixa é calculada por um
+processo do pool com consultas agrupadas (uma por faixa). Duas fontes de
+estoque esperado:
+
+- ledger: projeção do razão de StockMovement (snapshot + movimentações),
+  detecta divergência entre o cache `current_stock` e o razão;
+- documents: último ajuste manual (ou estoque inicial do cadastro) +
+  movimentações manuais + entradas de produção - itens de venda, detecta a
+  divergência histórica que o saldo de abertura do razão absorveu.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+# Diferenças menores que isso são arredondamento
+TOLERANCE = Decimal('0.005')
+SOURCES = ('ledger', 'documents')
+
+
+def init_worker():
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def partition(min_id, max_id, parts):
+    """Divide [min_id, max_id] em até `parts` faixas [início, fim)"""
+    size = max(1, -(-(max_id - min_id + 1) // parts))
+    return [(start, min(start + size, max_id + 1)) for start in range(min_id, max_id + 1, size)]
+
+
+def expected_queryset(source, queryset):
+    """Anota os produtos com `expected_stock` segundo a fonte escolhida"""
+    from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+    from django.utils import timezone
+
+    from .models import ProductionCostHistory, SaleItemHistory, StockMovementHistory
+    from .stock import QUANTITY_FIELD, SIGNED_QUANTITY, stock_at
+
+    if source == 'ledger':
+        return stock_at(timezone.now().date(), queryset).annotate(expected_stock=F('stock_quantity'))
+
+    zero = Value(Decimal('0'))
+    # Ajustes manuais e o estoque inicial do cadastro (o saldo de abertura
+    # gerado pela migração não é documento)
+    adjustment = StockMovementHistory.objects.filter(
+        Q(automatic=False) | Q(reference_type='estoque_inicial'), product=OuterRef('pk'), movement_type='ajuste'
+    ).order_by('-id')
+    queryset = queryset.annotate(
+        adjustment_id=Coalesce(Subquery(adjustment.values('id')[:1]), Value(0)),
+        adjustment_quantity=Coalesce(Subquery(adjustment.values('quantity')[:1]), zero,
+                                     output_field=QUANTITY_FIELD),
+        adjustment_at=Coalesce(Subquery(adjustment.values('created_at')[:1]), Value(datetime(1900, 1, 1))),
+    )
+    manual = (
+        StockMovementHistory.objects.filter(product=OuterRef('pk'), automatic=False, id__gt=OuterRef('adjustment_id'))
+        .exclude(movement_type='ajuste')
+        .order_by().values('product').annotate(total=Sum(SIGNED_QUANTITY)).values('total')
+    )
+    production = (
+        ProductionCostHistory.objects.filter(
+            product=OuterRef('pk'), cost_category='production', quantity__isnull=False,
+            created_at__gt=OuterRef('adjustment_at'),
+        )
+        .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    sold = (
+        SaleItemHistory.objects.filter(product=OuterRef('pk'), sale__created_at__gt=OuterRef('adjustment_at'))
+        .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    return queryset.annotate(expected_stock=ExpressionWrapper(
+        F('adjustment_quantity')
+        + Coalesce(Subquery(manual), zero, output_field=QUANTITY_FIELD)
+        + Coalesce(Subquery(production), zero, output_field=QUANTITY_FIELD)
+        - Coalesce(Subquery(sold), zero, output_field=QUANTITY_FIELD),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    ))
+
+
+def reconcile_range(source, start, end):
+    """
+    Executado em um processo do pool: retorna (produtos verificados,
+    [(id, código, nome, estoque atual, estoque esperado), ...] divergentes)
+    """
+    from .models import Product
+
+    rows = expected_queryset(source, Product.objects.filter(pk__gte=start, pk__lt=end)).values_list(
+        'pk', 'code', 'name', 'current_stock', 'expected_stock'
+    )
+    checked = 0
+    drifted = []
+    for pk, code, name, current, expected in rows.iterator():
+        checked += 1
+        expected = Decimal(expected or 0).quantize(Decimal('0.01'))
+        if abs(current - expected) >= TOLERANCE:
+            drifted.append((pk, code, name, current, expected))
+    return checked, drifted
+
+
+def reconcile(source, workers, parts):
+    """Distribui as faixas de id pelo pool e junta os resultados"""
+    from django.db import connections
+    from django.db.models import Max, Min
+
+    from .models import Product
+
+    bounds = Product.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+    if bounds['min_id'] is None:
+        return 0, []
+    ranges = partition(bounds['min_id'], bounds['max_id'], parts)
+    if workers <= 1:
+        results = [reconcile_range(source, start, end) for start, end in ranges]
+    else:
+        # Os processos filhos abrem as próprias conexões
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            results = list(executor.map(
+                reconcile_range, [source] * len(ranges), *zip(*ranges)
+            ))
+    checked = sum(result[0] for result in results)
+    drifted = [row for result in results for row in result[1]]
+    return checked, drifted
+
+
+def fix_drift(source, drifted, batch_size=1000):
+    """
+    Corrige os produtos divergentes com UPDATEs em lote. Na fonte
+    `documents` grava também um ajuste de inventário no razão (como um
+    ajuste manual), para que razão, documentos e `current_stock` coincidam.
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from django.utils import timezone
+
+    from . import valuation
+    from .models import Product, StockMovement
+
+    now = timezone.now()
+    with transaction.atomic():
+        for index in range(0, len(drifted), batch_size):
+            batch = drifted[index:index + batch_size]
+            if source == 'documents':
+                StockMovement.objects.bulk_create([
+                    StockMovement(
+                        product_id=pk,
+                        movement_type='ajuste',
+                        quantity=expected,
+                        reference_type='ajuste_inventario',
+                        notes=f'Reconciliação de estoque (antes: {current})',
+                    )
+                    for pk, code, name, current, expected in batch
+                ])
+                # bulk_create não dispara sinais: a valoração é marcada aqui
+                for pk, *_ in batch:
+                    valuation.mark_dirty(pk, now.date())
+            Product.objects.bulk_update(
+                [
+                    Product(pk=pk, current_stock=expected, version=F('version') + 1, updated_at=now)
+                    for pk, code, name, current, expected in batch
+                ],
+                ['current_stock', 'version', 'updated_at'],
+            )
+    return len(drifted)
@@ -0,0 +1,41 @@
+"""
+Renderer JSON de alta vazão.
+
+Usa o orjson quando instalado e produz exatamente os mesmos bytes do
+`JSONRenderer` do DRF (separadores compactos, UTF-8 sem escape, datas e
+Decimals pelo encoder do DRF). A única diferença conhecida é o expoente de
+floats muito grandes (1e16 em vez de 1e+16). Sem orjson, ou com indentação
+pedida no Accept, cai no renderer padrão.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def __init__(self):
+        super().__init__()
+        # Datas e subclasses não nativas passam pelo encoder do DRF, que
+        # define o formato atual das respostas (ex.: sufixo Z em datetimes UTC)
+        self._default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS,
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            # Inteiros acima de 64 bits, NaN em modo estrito etc.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Mesmo tratamento do JSONRenderer para separadores de linha Unicode
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,59 @@
+"""
+Roteamento de leituras para a réplica.
+
+Só as leituras marcadas pelo `ReplicaRoutingMiddleware` (GET de listagens,
+relatórios e dashboard) vão para o alias `replica`; todo o resto, inclusive
+qualquer escrita, usa o `default`. Sem réplica configurada o roteador não
+altera nada.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+# Ligado pelo middleware durante as requisições que podem ler da réplica
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_enabled():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def reading_from_replica():
+    """Se as leituras do contexto atual vão para a réplica"""
+    return _use_replica.get() and replica_enabled()
+
+
+def use_replica(enabled=True):
+    """Liga a leitura na réplica no contexto atual; retorna o token para `reset`"""
+    return _use_replica.set(enabled)
+
+
+def reset(token):
+    _use_replica.reset(token)
+
+
+def replica_reads(view):
+    """Marca uma view de função como segura para ler da réplica"""
+    view.replica_reads = True
+    return view
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mesmos dados nos dois aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Permite `migrate --database=replica` quando a réplica é uma cópia local
+        return True
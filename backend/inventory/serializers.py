@@ -1,15 +1,32 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
-from .models import Category, Product, Customer, Supplier, Expense, ProductionCost, Sale, SaleItem, StockMovement, Company
+from .models import Category, Product, Customer, Supplier, Expense, ProductionCost, Sale, SaleItem, StockMovement, Company, Job
+from . import stock
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    Aceita o argumento `fields` (lista de nomes) e mantém apenas esses campos
+    na saída. Usado pelo parâmetro ?fields= das viewsets.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DynamicFieldsModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     class Meta:
@@ -18,19 +35,37 @@ class ProductSerializer(serializers.ModelSerializer):
             'id', 'code', 'name', 'composition', 'size', 'category', 'category_name',
             'unit', 'purchase_price', 'current_stock',
             'min_stock', 'max_stock', 'location', 'active',
-            'created_at', 'updated_at'
+            'version', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'version', 'created_at', 'updated_at']
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            # O estoque só muda pelo razão: vendas, produção, movimentações
+            # ou a ação adjust_stock
+            fields['current_stock'].read_only = True
+        return fields
 
-class CustomerSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        initial_stock = validated_data.pop('current_stock', 0)
+        with transaction.atomic():
+            product = super().create(validated_data)
+            if initial_stock:
+                stock.record_movements([stock.initial_stock_movement(product, initial_stock)])
+                product.refresh_from_db(fields=['current_stock', 'version', 'updated_at'])
+        return product
+
+
+class CustomerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Customer
         fields = [
             'id', 'code', 'name', 'document', 'email', 'phone',
-            'zipcode', 'address', 'neighborhood', 'city', 'state', 'notes', 'active', 'created_at'
+            'zipcode', 'address', 'neighborhood', 'city', 'state', 'notes', 'active', 'created_at',
+            'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
 
     def validate_document(self, value):
         if not value:
@@ -46,14 +81,15 @@ class CustomerSerializer(serializers.ModelSerializer):
         return value
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Supplier
         fields = [
             'id', 'code', 'name', 'document', 'contact_name', 'email',
-            'phone', 'zipcode', 'address', 'neighborhood', 'city', 'state', 'notes', 'active', 'created_at'
+            'phone', 'zipcode', 'address', 'neighborhood', 'city', 'state', 'notes', 'active', 'created_at',
+            'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
 
     def validate_document(self, value):
         if not value:
@@ -69,7 +105,7 @@ class SupplierSerializer(serializers.ModelSerializer):
         return value
 
 
-class ExpenseSerializer(serializers.ModelSerializer):
+class ExpenseSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Expense
         fields = [
@@ -78,7 +114,7 @@ class ExpenseSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProductionCostSerializer(serializers.ModelSerializer):
+class ProductionCostSerializer(DynamicFieldsModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_code = serializers.CharField(source='product.code', read_only=True)
     customer_name = serializers.CharField(source='customer.name', read_only=True, allow_null=True)
@@ -91,12 +127,13 @@ class ProductionCostSerializer(serializers.ModelSerializer):
             'id', 'product', 'product_name', 'product_code', 'customer', 'customer_name', 'description', 
             'cost_type', 'value', 'date', 'notes', 'quantity', 'cost_category',
             'refinement_code', 'refinement_name', 'is_locked', 
-            'locked_by_sale', 'locked_by_sale_number', 'locked_by_sale_customer', 'locked_at', 'created_at'
+            'locked_by_sale', 'locked_by_sale_number', 'locked_by_sale_customer', 'locked_at', 'version',
+            'created_at'
         ]
-        read_only_fields = ['id', 'created_at', 'is_locked', 'locked_by_sale', 'locked_at']
+        read_only_fields = ['id', 'version', 'created_at', 'is_locked', 'locked_by_sale', 'locked_at']
 
 
-class SaleItemSerializer(serializers.ModelSerializer):
+class SaleItemSerializer(DynamicFieldsModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_code = serializers.CharField(source='product.code', read_only=True)
     
@@ -111,7 +148,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'total_price', 'total_cost', 'profit', 'cost_calculated_at']
 
 
-class SaleSerializer(serializers.ModelSerializer):
+class SaleSerializer(DynamicFieldsModelSerializer):
     customer_name = serializers.CharField(source='customer.name', read_only=True, allow_null=True)
     customer_state = serializers.CharField(source='customer.state', read_only=True, allow_null=True)
     items = SaleItemSerializer(many=True, read_only=True)
@@ -121,9 +158,24 @@ class SaleSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'sale_number', 'sale_type', 'customer', 'customer_name', 'customer_state', 'sale_date',
             'total_amount', 'discount', 'final_amount', 'payment_method', 'nf', 'tax_percentage',
-            'status', 'notes', 'created_at', 'items'
+            'status', 'notes', 'total_cost', 'total_profit', 'total_tax', 'total_freight', 'item_count',
+            'version', 'created_at', 'updated_at', 'items'
+        ]
+        read_only_fields = [
+            'id', 'final_amount', 'total_cost', 'total_profit', 'total_tax', 'total_freight',
+            'item_count', 'version', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'final_amount', 'created_at']
+
+
+class SaleListSerializer(SaleSerializer):
+    """
+    SaleSerializer sem os itens: usado na listagem compacta de vendas, que
+    é montada direto de `.values_list()` (veja FastListMixin)
+    """
+    items = None
+
+    class Meta(SaleSerializer.Meta):
+        fields = [field for field in SaleSerializer.Meta.fields if field != 'items']
 
 
 class SaleCreateSerializer(serializers.ModelSerializer):
@@ -134,8 +186,9 @@ class SaleCreateSerializer(serializers.ModelSerializer):
         model = Sale
         fields = [
             'sale_number', 'sale_type', 'customer', 'sale_date', 'total_amount',
-            'discount', 'payment_method', 'nf', 'tax_percentage', 'status', 'notes', 'items'
+            'discount', 'payment_method', 'nf', 'tax_percentage', 'status', 'notes', 'items', 'id', 'version'
         ]
+        read_only_fields = ['id', 'version']
     
     def validate(self, attrs):
         items_data = attrs.get('items', [])
@@ -172,52 +225,46 @@ class SaleCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        sale = Sale.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            sale_item = SaleItem.objects.create(sale=sale, **item_data)
-            
-            # Reduzir estoque do produto automaticamente
-            product = sale_item.product
-            quantity = float(sale_item.quantity)
-            
-            # Atualizar estoque atual do produto
-            product.current_stock = float(product.current_stock) - quantity
-            product.save()
-        
+        with transaction.atomic():
+            sale = Sale.objects.create(**validated_data)
+            items = [SaleItem.objects.create(sale=sale, **item_data) for item_data in items_data]
+            # Baixa do estoque registrada no razão (uma saída por item)
+            stock.record_movements(stock.sale_movements(sale, items))
         return sale
     
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
         
-        # Reverter estoque dos itens antigos
-        for old_item in instance.items.all():
-            product = old_item.product
-            product.current_stock = float(product.current_stock) + float(old_item.quantity)
-            product.save()
-        
-        # Atualizar campos da venda
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Deletar itens antigos e criar novos
-        if items_data is not None:
-            instance.items.all().delete()
+        with transaction.atomic():
+            # Atualizar campos da venda
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
             
-            for item_data in items_data:
-                sale_item = SaleItem.objects.create(sale=instance, **item_data)
-                
-                # Reduzir estoque do produto
-                product = sale_item.product
-                quantity = float(sale_item.quantity)
-                product.current_stock = float(product.current_stock) - quantity
-                product.save()
+            # Estornar os itens antigos e criar os novos
+            if items_data is not None:
+                old_items = list(instance.items.all())
+                movements = stock.sale_movements(instance, old_items, reverse=True)
+                instance.items.all().delete()
+                items = [SaleItem.objects.create(sale=instance, **item_data) for item_data in items_data]
+                movements += stock.sale_movements(instance, items)
+                stock.record_movements(movements)
         
         return instance
 
 
-class StockMovementSerializer(serializers.ModelSerializer):
+class StockAtDateSerializer(serializers.Serializer):
+    """Linha do relatório de estoque em uma data (veja stock.stock_at)"""
+    id = serializers.IntegerField()
+    code = serializers.CharField()
+    name = serializers.CharField()
+    unit = serializers.CharField()
+    stock_quantity = serializers.DecimalField(max_digits=14, decimal_places=2)
+    stock_unit_cost = serializers.DecimalField(max_digits=14, decimal_places=4)
+    stock_value = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+class StockMovementSerializer(DynamicFieldsModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_code = serializers.CharField(source='product.code', read_only=True)
     
@@ -226,13 +273,14 @@ class StockMovementSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'product', 'product_name', 'product_code', 'movement_type',
             'quantity', 'unit_price', 'total_price', 'reference_type',
-            'reference_id', 'notes', 'created_at'
+            'reference_id', 'notes', 'automatic', 'created_at'
         ]
-        read_only_fields = ['id', 'total_price', 'created_at']
+        read_only_fields = ['id', 'total_price', 'automatic', 'created_at']
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsModelSerializer):
     logo_url = serializers.SerializerMethodField()
+    logo_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Company
@@ -240,9 +288,9 @@ class CompanySerializer(serializers.ModelSerializer):
             'id', 'razao_social', 'nome_fantasia', 'cnpj', 'inscricao_estadual',
             'cep', 'street', 'number', 'complement',
             'neighborhood', 'city', 'state', 'phone', 'email', 'website',
-            'responsavel', 'logo', 'logo_url', 'active', 'created_at', 'updated_at'
+            'responsavel', 'logo', 'logo_url', 'logo_variants', 'active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'logo_url', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'logo_url', 'logo_variants', 'created_at', 'updated_at']
     
     def get_logo_url(self, obj):
         if obj.logo:
@@ -251,3 +299,29 @@ class CompanySerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.logo.url)
             return obj.logo.url
         return None
+
+    def get_logo_variants(self, obj):
+        """URLs das versões redimensionadas (thumbnail, pdf, retina) do logo"""
+        if not obj.logo:
+            return {}
+        request = self.context.get('request')
+        variants = {}
+        for name, path in (obj.logo_variants or {}).items():
+            if name == 'source':
+                continue
+            url = default_storage.url(path)
+            variants[name] = request.build_absolute_uri(url) if request else url
+        return variants
+
+
+class JobSerializer(DynamicFieldsModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'payload', 'status', 'status_display', 'attempts', 'max_attempts',
+            'progress', 'progress_message', 'result', 'error', 'run_after',
+            'started_at', 'finished_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -1,8 +1,15 @@
+import threading
+
+from django.db import transaction
 from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.db.models import Sum
-from .models import Sale, ProductionCost, SaleItem
+from .models import (
+    Company, Customer, Expense, Product, Sale, ProductionCost, SaleItem, StockMovement, Supplier, Tombstone
+)
+from . import valuation
+from .images import refresh_company_logo_variants
 
 
 @receiver(pre_save, sender=Sale)
@@ -36,6 +43,28 @@ def lock_production_costs_on_liquidation(sender, instance, **kwargs):
             pass
 
 
+def build_cost_snapshot(refinement_code, costs):
+    """
+    Monta o snapshot (detalhamento por tipo de custo) de um refinamento
+    """
+    breakdown = {}
+    total = 0
+    cost_ids = []
+    
+    for cost in costs:
+        breakdown[cost.cost_type] = float(cost.value)
+        total += float(cost.value)
+        cost_ids.append(cost.id)
+    
+    return {
+        'refinement_code': refinement_code,
+        'breakdown': breakdown,
+        'total': total,
+        'cost_ids': cost_ids,
+        'calculated_at': timezone.now().isoformat()
+    }
+
+
 @receiver(post_save, sender=Sale)
 def create_cost_snapshot_on_sale(sender, instance, created, **kwargs):
     """
@@ -50,22 +79,7 @@ def create_cost_snapshot_on_sale(sender, instance, created, **kwargs):
                 )
                 
                 # Cria o snapshot
-                breakdown = {}
-                total = 0
-                cost_ids = []
-                
-                for cost in costs:
-                    breakdown[cost.cost_type] = float(cost.value)
-                    total += float(cost.value)
-                    cost_ids.append(cost.id)
-                
-                item.cost_snapshot = {
-                    'refinement_code': item.cost_refinement_code,
-                    'breakdown': breakdown,
-                    'total': total,
-                    'cost_ids': cost_ids,
-                    'calculated_at': timezone.now().isoformat()
-                }
+                item.cost_snapshot = build_cost_snapshot(item.cost_refinement_code, costs)
                 item.cost_calculated_at = timezone.now()
                 item.save(update_fields=['cost_snapshot', 'cost_calculated_at'])
 
@@ -120,3 +134,94 @@ def update_sale_costs_on_production_cost_delete(sender, instance, **kwargs):
     """
     if instance.refinement_code:
         update_sale_item_costs_for_refinement(instance.refinement_code)
+
+
+@receiver(post_save, sender=SaleItem)
+def update_valuation_on_sale_item_save(sender, instance, **kwargs):
+    """
+    Reprocessa a valoração do produto a partir da data da venda
+    """
+    valuation.mark_dirty(instance.product_id, instance.sale.sale_date, 'venda', instance.pk)
+
+
+@receiver(post_delete, sender=SaleItem)
+def update_valuation_on_sale_item_delete(sender, instance, **kwargs):
+    valuation.mark_dirty(instance.product_id, None, 'venda', instance.pk)
+
+
+@receiver(post_save, sender=StockMovement)
+def update_valuation_on_movement_save(sender, instance, **kwargs):
+    valuation.mark_dirty(instance.product_id, instance.created_at.date(), 'movimentacao', instance.pk)
+
+
+@receiver(post_delete, sender=StockMovement)
+def update_valuation_on_movement_delete(sender, instance, **kwargs):
+    valuation.mark_dirty(instance.product_id, None, 'movimentacao', instance.pk)
+
+
+@receiver(post_save, sender=ProductionCost)
+@receiver(post_delete, sender=ProductionCost)
+def update_valuation_on_production_cost_change(sender, instance, **kwargs):
+    """
+    Entradas de produção alteram o custo médio do produto; qualquer custo do
+    grupo muda o custo unitário da entrada
+    """
+    if instance.cost_category == 'production':
+        valuation.mark_dirty(instance.product_id, instance.date, 'producao', instance.pk)
+
+
+_pending_sales = threading.local()
+
+
+def schedule_sale_totals_refresh(sale_id):
+    """
+    Agenda o recálculo dos totais da venda para o commit da transação: vários
+    itens alterados na mesma transação geram um único UPDATE
+    """
+    pending = getattr(_pending_sales, 'ids', None)
+    if pending is None:
+        pending = _pending_sales.ids = set()
+    pending.add(sale_id)
+    transaction.on_commit(flush_sale_totals)
+
+
+def flush_sale_totals():
+    pending = getattr(_pending_sales, 'ids', None)
+    _pending_sales.ids = None
+    if pending:
+        Sale.refresh_totals(pending)
+
+
+@receiver(post_save, sender=SaleItem)
+@receiver(post_delete, sender=SaleItem)
+def update_sale_totals_on_item_change(sender, instance, **kwargs):
+    """
+    Mantém os totais de custo, lucro, imposto, frete e itens da venda
+    """
+    schedule_sale_totals_refresh(instance.sale_id)
+
+
+# Recursos com sincronização incremental (veja DeltaSyncMixin)
+SYNCED_MODELS = (Product, Customer, Supplier, Expense, Sale)
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """
+    Registra a exclusão para que os clientes com cache local removam o id
+    na próxima sincronização
+    """
+    Tombstone.objects.create(resource=sender._meta.model_name, object_id=instance.pk)
+
+
+for synced_model in SYNCED_MODELS:
+    post_delete.connect(
+        record_tombstone, sender=synced_model, dispatch_uid=f'tombstone_{synced_model._meta.model_name}'
+    )
+
+
+@receiver(post_save, sender=Company)
+def generate_company_logo_variants(sender, instance, **kwargs):
+    """
+    Gera as versões redimensionadas do logo quando ele é enviado ou trocado
+    """
+    refresh_company_logo_variants(instance)
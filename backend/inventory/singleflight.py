@@ -0,0 +1,117 @@
+"""
+Coalescência de leituras caras idênticas (single-flight).
+
+Requisições simultâneas com a mesma chave (view + parâmetros normalizados)
+esperam uma única execução e recebem o mesmo resultado:
+
+- no processo: a primeira thread calcula, as demais esperam por ela;
+- entre workers, só com um cache compartilhado em CACHES (veja settings.py):
+  quem calcula segura um lease no cache (`cache.add`) e publica o resultado
+  sob o token do lease; os outros processos esperam esse resultado. Com o
+  LocMem padrão cada processo tem o próprio cache e a coordenação fica
+  restrita ao processo.
+
+Só compartilham o resultado as requisições que chegaram durante o cálculo:
+depois dele a próxima requisição calcula outra vez (não é um cache). Quem
+espera desiste depois de LEASE_SECONDS e calcula sozinho.
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+# Tempo máximo de um cálculo: depois disso o lease expira e outro assume
+LEASE_SECONDS = 30
+# Quanto tempo o resultado fica disponível para quem estava esperando
+RESULT_SECONDS = 10
+POLL_INTERVAL = 0.05
+
+_MISSING = object()
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def make_key(name, params):
+    """Chave estável: nome da view + parâmetros (valor ou lista de valores) ordenados"""
+    normalized = sorted(
+        (param, sorted(map(str, value)) if isinstance(value, (list, tuple)) else [str(value)])
+        for param, value in params.items()
+    )
+    digest = hashlib.sha256(repr(normalized).encode()).hexdigest()[:32]
+    return f'singleflight:{name}:{digest}'
+
+
+def do(key, compute):
+    """Executa `compute()` uma vez para todas as chamadas simultâneas com `key`"""
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+    if not leader:
+        if not call.done.wait(LEASE_SECONDS):
+            # Quem calculava travou: calcula sem esperar mais
+            return compute()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _across_processes(key, compute)
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+    return call.result
+
+
+def _across_processes(key, compute):
+    lease_key = f'{key}:lease'
+    deadline = time.monotonic() + LEASE_SECONDS
+    while True:
+        token = uuid.uuid4().hex
+        if cache.add(lease_key, token, LEASE_SECONDS):
+            try:
+                result = compute()
+                cache.set(f'{key}:result:{token}', result, RESULT_SECONDS)
+                return result
+            finally:
+                if cache.get(lease_key) == token:
+                    cache.delete(lease_key)
+
+        holder = cache.get(lease_key)
+        if holder is None:
+            # Liberado entre o add e o get: tenta pegar o lease de novo
+            continue
+        result = _wait_result(key, lease_key, holder, deadline)
+        if result is not _MISSING:
+            return result
+        if time.monotonic() >= deadline:
+            # Quem calculava travou ou morreu: calcula sem coordenação
+            return compute()
+
+
+def _wait_result(key, lease_key, holder, deadline):
+    """Espera o resultado de `holder`; _MISSING se ele falhou ou demorou demais"""
+    result_key = f'{key}:result:{holder}'
+    while time.monotonic() < deadline:
+        result = cache.get(result_key, _MISSING)
+        if result is not _MISSING:
+            return result
+        if cache.get(lease_key) != holder:
+            # Terminou (ou falhou) entre as duas leituras
+            return cache.get(result_key, _MISSING)
+        time.sleep(POLL_INTERVAL)
+    return _MISSING
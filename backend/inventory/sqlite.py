@@ -0,0 +1,57 @@
+"""
+Perfil de ajuste do SQLite para produção.
+
+Aplicado em cada conexão nova pelo sinal `connection_created`:
+
+- WAL: leitores não bloqueiam o escritor e vice-versa;
+- synchronous=NORMAL: seguro com WAL, sem fsync a cada commit;
+- mmap/cache/temp_store em memória para as leituras de relatórios;
+- busy_timeout: espera o lock em vez de falhar com "database is locked".
+
+As transações de escrita começam com BEGIN IMMEDIATE (`transaction_mode`
+nas OPTIONS do banco, veja settings), para que o lock de escrita seja pego no
+início e não na primeira escrita, quando o SQLite não consegue mais esperar.
+"""
+from django.conf import settings
+
+# Pragma -> valor. journal_mode=WAL é persistente no arquivo; os demais valem por conexão.
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -65536,  # KiB (64 MB)
+    'mmap_size': 268435456,  # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+
+def get_pragmas():
+    return {**PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNING', True):
+        return
+    # Banco em memória (testes) não suporta WAL
+    if connection.is_in_memory_db():
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, get_pragmas())
+
+
+def maintain(connection, checkpoint_mode='TRUNCATE'):
+    """
+    Checkpoint do WAL (devolve as páginas ao arquivo principal e encolhe o
+    -wal) e `PRAGMA optimize` (ANALYZE só onde as estatísticas mudaram).
+    Retorna (busy, páginas no WAL, páginas copiadas).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({checkpoint_mode})')
+        result = cursor.fetchone()
+        cursor.execute('PRAGMA optimize')
+    return result
@@ -0,0 +1,221 @@
+"""
+Razão de estoque.
+
+Toda alteração de estoque gera um `StockMovement`. As movimentações geradas
+pelo sistema (vendas e entradas de produção) são gravadas com `bulk_create`
+e marcadas como automáticas; o `current_stock` do produto é uma projeção
+desse razão, atualizada com um UPDATE por produto. As consultas históricas
+(estoque em uma data) leem a view que inclui as movimentações arquivadas.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockMovementHistory, StockSnapshot, ValuationEntry
+
+QUANTITY_FIELD = DecimalField(max_digits=14, decimal_places=2)
+COST_FIELD = DecimalField(max_digits=14, decimal_places=4)
+
+# Quantidade com sinal de uma movimentação de entrada/saída
+SIGNED_QUANTITY = Case(
+    When(movement_type='saida', then=-F('quantity')),
+    default=F('quantity'),
+    output_field=QUANTITY_FIELD,
+)
+
+
+def signed_quantity(movement):
+    if movement.movement_type == 'entrada':
+        return movement.quantity
+    if movement.movement_type == 'saida':
+        return -movement.quantity
+    raise ValueError('Ajustes não têm sinal: substituem o saldo do produto')
+
+
+def record_movements(movements):
+    """
+    Grava as movimentações em lote e aplica o saldo de cada produto ao
+    `current_stock`. Um ajuste substitui o saldo; as movimentações seguintes
+    do mesmo produto somam sobre ele. Deve ser chamado dentro de uma transação.
+    """
+    if not movements:
+        return []
+    # produto -> [saldo do último ajuste (ou None), soma das movimentações seguintes]
+    balances = defaultdict(lambda: [None, Decimal('0')])
+    for movement in movements:
+        movement.automatic = True
+        if movement.unit_price is not None:
+            movement.total_price = movement.unit_price * movement.quantity
+        balance = balances[movement.product_id]
+        if movement.movement_type == 'ajuste':
+            balance[:] = [Decimal(str(movement.quantity)), Decimal('0')]
+        else:
+            balance[1] += signed_quantity(movement)
+    created = StockMovement.objects.bulk_create(movements, batch_size=500)
+    now = timezone.now()
+    for product_id, (adjusted, delta) in balances.items():
+        if adjusted is None and not delta:
+            continue
+        current_stock = F('current_stock') + delta if adjusted is None else adjusted + delta
+        Product.objects.filter(pk=product_id).update(
+            current_stock=current_stock, version=F('version') + 1, updated_at=now
+        )
+    return created
+
+
+def initial_stock_movement(product, quantity):
+    """Estoque informado no cadastro do produto, ao preço de compra"""
+    return StockMovement(
+        product_id=product.pk,
+        movement_type='ajuste',
+        quantity=Decimal(str(quantity)),
+        unit_price=product.purchase_price,
+        reference_type='estoque_inicial',
+        reference_id=product.pk,
+        notes='Estoque inicial do cadastro',
+    )
+
+
+def sale_movements(sale, items, reverse=False):
+    """Saídas dos itens da venda (ou entradas, no estorno)"""
+    notes = f'Estorno da venda {sale.sale_number}' if reverse else f'Venda {sale.sale_number}'
+    return [
+        StockMovement(
+            product_id=item.product_id,
+            movement_type='entrada' if reverse else 'saida',
+            quantity=Decimal(str(item.quantity)),
+            unit_price=item.unit_price,
+            reference_type='venda',
+            reference_id=sale.pk,
+            notes=notes,
+        )
+        for item in items
+    ]
+
+
+def production_movement(cost, quantity, reverse=False):
+    """Entrada de um grupo de produção (ou saída, na exclusão do grupo)"""
+    code = cost.refinement_code
+    return StockMovement(
+        product_id=cost.product_id,
+        movement_type='saida' if reverse else 'entrada',
+        quantity=Decimal(str(quantity)),
+        reference_type='producao',
+        reference_id=cost.pk,
+        notes=f'Exclusão da entrada de produção {code}' if reverse else f'Entrada de produção {code}',
+    )
+
+
+def end_of_day(date):
+    """Primeiro instante do dia seguinte (limite exclusivo das movimentações da data)"""
+    end = datetime.combine(date + timedelta(days=1), time.min)
+    if timezone.is_naive(end) and timezone.now().tzinfo is not None:
+        end = timezone.make_aware(end)
+    return end
+
+
+def stock_at(date, queryset=None):
+    """
+    Anota os produtos com o estoque (`stock_quantity`), o custo unitário
+    (`stock_unit_cost`) e o valor (`stock_value`) no fim de `date`, numa única
+    consulta: snapshot mais recente até a data + movimentações posteriores a
+    ele. Um ajuste no intervalo substitui o saldo anterior.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    snapshot = StockSnapshot.objects.filter(product=OuterRef('pk'), date__lte=date).order_by('-date')
+    queryset = queryset.annotate(
+        snapshot_quantity=Coalesce(Subquery(snapshot.values('quantity')[:1]), Value(Decimal('0')),
+                                   output_field=QUANTITY_FIELD),
+        snapshot_movement_id=Coalesce(Subquery(snapshot.values('last_movement_id')[:1]), Value(0)),
+        snapshot_unit_cost=Subquery(snapshot.values('unit_cost')[:1]),
+    )
+
+    # Movimentações depois do snapshot e até o fim da data
+    window = StockMovementHistory.objects.filter(
+        product=OuterRef('pk'),
+        id__gt=OuterRef('snapshot_movement_id'),
+        created_at__lt=end_of_day(date),
+    )
+    last_adjustment = window.filter(movement_type='ajuste').order_by('-id')
+    queryset = queryset.annotate(
+        adjustment_id=Subquery(last_adjustment.values('id')[:1]),
+        adjustment_quantity=Subquery(last_adjustment.values('quantity')[:1]),
+    )
+    delta = (
+        window.exclude(movement_type='ajuste')
+        .filter(id__gt=Coalesce(OuterRef('adjustment_id'), Value(0)))
+        .order_by().values('product').annotate(total=Sum(SIGNED_QUANTITY)).values('total')
+    )
+    valuation = ValuationEntry.objects.filter(
+        product=OuterRef('pk'), date__lte=date
+    ).order_by('-date', '-priority', '-source_id')
+    queryset = queryset.annotate(
+        stock_quantity=ExpressionWrapper(
+            Coalesce(F('adjustment_quantity'), F('snapshot_quantity'))
+            + Coalesce(Subquery(delta), Value(Decimal('0')), output_field=QUANTITY_FIELD),
+            output_field=QUANTITY_FIELD,
+        ),
+        stock_unit_cost=Coalesce(
+            Subquery(valuation.values('balance_unit_cost')[:1]),
+            F('snapshot_unit_cost'),
+            F('purchase_price'),
+            output_field=COST_FIELD,
+        ),
+    )
+    return queryset.annotate(
+        stock_value=ExpressionWrapper(F('stock_quantity') * F('stock_unit_cost'), output_field=COST_FIELD),
+    )
+
+
+def take_snapshot(date, batch_size=2000):
+    """
+    Grava (ou regrava) o snapshot de todos os produtos no fim de `date`,
+    a partir do snapshot anterior mais recente. Retorna o número de produtos.
+    """
+    last_movement = (
+        StockMovementHistory.objects.filter(product=OuterRef('pk'), created_at__lt=end_of_day(date))
+        .order_by('-id').values('id')[:1]
+    )
+    rows = (
+        stock_at(date)
+        .annotate(last_movement=Coalesce(Subquery(last_movement), Value(0)))
+        .order_by('pk')
+        .values_list('pk', 'stock_quantity', 'stock_unit_cost', 'last_movement')
+    )
+    count = 0
+    with transaction.atomic():
+        batch = []
+        for product_id, quantity, unit_cost, last_movement_id in rows.iterator(chunk_size=batch_size):
+            quantity = quantity or Decimal('0')
+            unit_cost = unit_cost or Decimal('0')
+            batch.append(StockSnapshot(
+                product_id=product_id,
+                date=date,
+                quantity=quantity,
+                unit_cost=unit_cost,
+                value=(quantity * unit_cost).quantize(Decimal('0.01')),
+                last_movement_id=last_movement_id,
+            ))
+            if len(batch) >= batch_size:
+                count += _write_snapshots(batch)
+                batch = []
+        count += _write_snapshots(batch)
+    return count
+
+
+def _write_snapshots(batch):
+    StockSnapshot.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['product', 'date'],
+        update_fields=['quantity', 'unit_cost', 'value', 'last_movement_id'],
+    )
+    return len(batch)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from inventory.archive import archive_sales, get_horizon
+from inventory.checks import check_history_views
+from inventory.models import ArchivedSale, Product, ProductionCost, ProductionCostHistory, Sale, SaleHistory
+
+
+class ArchiveSalesTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Produto', unit='UN', purchase_price=Decimal('10.00'))
+
+    def test_archive_sale_that_locked_a_production_entry(self):
+        old_date = (timezone.now().date() - timedelta(days=400)).isoformat()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/production-costs/save_production_entry/', {
+                'product_id': self.product.pk,
+                'date': old_date,
+                'quantity': '10',
+                'costs': [{'cost_type': 'Matéria-prima', 'value': '50.00'}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        code = response.json()['refinement_code']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sales/', {
+                'sale_number': 'V-1',
+                'sale_type': 'venda',
+                'sale_date': old_date,
+                'total_amount': '50.00',
+                'payment_method': 'pix',
+                'status': 'homologado',
+                'items': [{
+                    'product': self.product.pk, 'quantity': '2', 'unit_price': '25.00',
+                    'cost_refinement_code': code,
+                }],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        sale_id = response.json()['id']
+
+        response = self.client.post('/api/sales/transition/', {'ids': [sale_id], 'status': 'liquidado'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(ProductionCost.objects.filter(refinement_code=code, locked_by_sale_id=sale_id).exists())
+
+        totals = archive_sales(get_horizon(365))
+        connection.check_constraints()
+
+        self.assertEqual(totals['sales'], 1)
+        self.assertFalse(Sale.objects.filter(pk=sale_id).exists())
+        self.assertTrue(ArchivedSale.objects.filter(pk=sale_id).exists())
+        # A entrada de produção fica ativa, travada, sem apontar para a venda arquivada
+        cost = ProductionCost.objects.get(refinement_code=code)
+        self.assertTrue(cost.is_locked)
+        self.assertIsNone(cost.locked_by_sale_id)
+        self.assertEqual(ProductionCostHistory.objects.filter(refinement_code=code).count(), 1)
+
+
+class HistoryViewCheckTests(TestCase):
+    def test_check_reports_view_out_of_sync_with_model(self):
+        self.assertEqual(check_history_views(databases=['default']), [])
+        quote = connection.ops.quote_name
+        table = quote(SaleHistory._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP VIEW {table}')
+            cursor.execute(f'CREATE VIEW {table} AS SELECT id, sale_number FROM {quote(Sale._meta.db_table)}')
+        errors = check_history_views(databases=['default'])
+        self.assertEqual([error.id for error in errors], ['inventory.E001'])
+        self.assertIn('sale_date', errors[0].msg)
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from inventory import routers
+
+
+class BatchReplicaRoutingTests(APITestCase):
+    url = '/api/batch/'
+
+    def run_dashboard(self, **extra):
+        seen = []
+
+        def fake_dashboard(month, year):
+            seen.append(routers.reading_from_replica())
+            return {}
+
+        with mock.patch('inventory.routers.replica_enabled', return_value=True), \
+                mock.patch('inventory.views.dashboard_data', side_effect=fake_dashboard):
+            response = self.client.post(self.url, {'requests': [{'path': '/dashboard/'}]}, format='json', **extra)
+        self.assertEqual(response.data['responses'][0]['status'], 200)
+        return response, seen
+
+    def test_safe_subrequest_reads_from_replica_without_pinning(self):
+        response, seen = self.run_dashboard()
+        self.assertEqual(seen, [True])
+        self.assertNotIn('primary_pin', response.cookies)
+        self.assertFalse(routers.reading_from_replica())
+
+    def test_pinned_client_reads_from_primary(self):
+        self.client.cookies['primary_pin'] = '1'
+        _, seen = self.run_dashboard()
+        self.assertEqual(seen, [False])
+
+    def test_rejects_other_methods(self):
+        response = self.client.post(self.url, {'requests': [{'path': '/products/', 'method': 'DELETE'}]}, format='json')
+        self.assertEqual(response.data['responses'][0]['status'], 400)
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from inventory import parallel, routers
+from inventory.models import Customer, Expense, Product
+
+
+class DashboardTests(APITransactionTestCase):
+    """Sem mocks: as consultas rodam nas threads do pool, com as próprias conexões"""
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.product = Product.objects.create(
+            name='Produto', unit='UN', purchase_price=Decimal('10.00'),
+            current_stock=Decimal('10'), min_stock=Decimal('20'),
+        )
+        Customer.objects.create(name='Cliente')
+        Expense.objects.create(name='Aluguel', amount=Decimal('5.00'), expense_type='FIXO', date=self.today)
+        response = self.client.post('/api/sales/', {
+            'sale_number': 'V-1',
+            'sale_type': 'venda',
+            'sale_date': self.today.isoformat(),
+            'total_amount': '50.00',
+            'payment_method': 'pix',
+            'items': [{'product': self.product.pk, 'quantity': '2', 'unit_price': '25.00'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_dashboard_totals(self):
+        response = self.client.get(f'/api/dashboard/?month={self.today.month}&year={self.today.year}')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(data['totalProducts'], 1)
+        self.assertEqual(data['totalCustomers'], 1)
+        self.assertEqual([row['id'] for row in data['lowStockProducts']], [self.product.pk])
+        self.assertEqual([row['sale_number'] for row in data['recentSales']], ['V-1'])
+        self.assertEqual(data['monthlyProfit'], 50.0)
+        self.assertEqual(data['monthlyExpenses'], 5.0)
+        self.assertEqual(data['monthlyResult'], 45.0)
+        self.assertEqual(data['cumulativeResult'], 45.0)
+
+    def test_gather_copies_the_replica_context(self):
+        with mock.patch('inventory.routers.replica_enabled', return_value=True):
+            token = routers.use_replica()
+            try:
+                results = parallel.gather_sync(replica=routers.reading_from_replica)
+            finally:
+                routers.reset(token)
+        self.assertEqual(results, {'replica': True})
@@ -0,0 +1,122 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+from inventory.middleware import CompressionMiddleware
+from inventory.mixins import FastListMixin, RowPlan
+from inventory.models import (
+    Category, Customer, Expense, Product, ProductionCost, StockMovement, Supplier,
+)
+
+
+def drf_list(self, queryset, serializer):
+    """Caminho padrão do DRF: o mesmo serializer, instância por instância"""
+    page = self.paginate_queryset(queryset)
+    data = type(serializer)(queryset if page is None else page, many=True, **serializer._kwargs).data
+    return Response(data) if page is None else self.get_paginated_response(data)
+
+
+class FastListParityTests(APITestCase):
+    """A listagem rápida (RowPlan + orjson) gera os mesmos bytes do DRF puro"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Tecidos')
+        # Categoria nula, Decimals e textos com acento/aspas
+        self.product = Product.objects.create(
+            name='Camisa "Polo" ção', unit='UN', category=category, purchase_price=Decimal('10.50'),
+            current_stock=Decimal('3'), min_stock=Decimal('1.25'),
+        )
+        Product.objects.create(name='Sem categoria', unit='KG', purchase_price=Decimal('0.00'))
+        customer = Customer.objects.create(name='Cliente', city='São Paulo')
+        Supplier.objects.create(name='Fornecedor')
+        Expense.objects.create(name='Aluguel', amount=Decimal('1234.56'), expense_type='FIXO', date=date(2026, 1, 31))
+        ProductionCost.objects.create(
+            product=self.product, customer=customer, cost_type='Matéria-prima', value=Decimal('7.10'),
+            date=date(2026, 2, 1), quantity=Decimal('2'),
+        )
+        ProductionCost.objects.create(
+            product=self.product, cost_type='Mão de obra', value=Decimal('3.00'), date=date(2026, 2, 2),
+        )
+        StockMovement.objects.create(
+            product=self.product, movement_type='entrada', reference_type='compra', quantity=Decimal('2'),
+        )
+        for number, sale_customer in (('V-1', customer), ('V-2', None)):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/sales/', {
+                    'sale_number': number,
+                    'sale_type': 'venda',
+                    'sale_date': timezone.now().date().isoformat(),
+                    'customer': sale_customer and sale_customer.pk,
+                    'total_amount': '25.00',
+                    'payment_method': 'pix',
+                    'items': [{'product': self.product.pk, 'quantity': '1', 'unit_price': '25.00'}],
+                }, format='json')
+            self.assertEqual(response.status_code, 201, response.content)
+
+    def assert_same_output(self, url, params=None):
+        # O RowPlan precisa ter sido usado, senão a comparação não prova nada
+        with mock.patch.object(RowPlan, 'build', autospec=True, side_effect=RowPlan.build) as build:
+            fast = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200, fast.content)
+        self.assertTrue(build.called, url)
+        with mock.patch.object(FastListMixin, 'fast_list', drf_list), mock.patch('inventory.renderers.orjson', None):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.content, slow.content, url)
+        return fast.json()
+
+    def test_lists_match_drf_output(self):
+        for url in (
+            '/api/categories/', '/api/products/', '/api/customers/', '/api/suppliers/', '/api/expenses/',
+            '/api/production-costs/', '/api/sales/', '/api/stock-movements/',
+        ):
+            with self.subTest(url=url):
+                data = self.assert_same_output(url)
+                self.assertTrue(data['results'], url)
+
+    def test_null_foreign_keys(self):
+        products = self.assert_same_output('/api/products/')['results']
+        self.assertIn(None, [row.get('category') for row in products])
+        sales = self.assert_same_output('/api/sales/')['results']
+        self.assertIn(None, [row.get('customer') for row in sales])
+
+    def test_sparse_fields(self):
+        data = self.assert_same_output('/api/products/', {'fields': 'id,name,purchase_price,category_name'})
+        self.assertEqual(set(data['results'][0]), {'id', 'name', 'purchase_price', 'category_name'})
+        data = self.assert_same_output('/api/sales/', {'fields': 'id,sale_date,created_at,final_amount'})
+        self.assertEqual(set(data['results'][0]), {'id', 'sale_date', 'created_at', 'final_amount'})
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, body, encoding='gzip', etag=None):
+        def view(request):
+            response = HttpResponse(body, content_type='application/json')
+            if etag:
+                response['ETag'] = etag
+            return response
+        request = RequestFactory().get('/api/products/', HTTP_ACCEPT_ENCODING=encoding)
+        return CompressionMiddleware(view)(request)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.respond(b'{"a": 1}')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_large_responses_are_compressed_with_vary_and_weak_etag(self):
+        response = self.respond(b'{"name": "produto"}' * 50, etag='"7"')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"7"')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_client_without_compression(self):
+        response = self.respond(b'{"name": "produto"}' * 50, encoding='identity', etag='"7"')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['ETag'], '"7"')
+        self.assertIn('Accept-Encoding', response['Vary'])
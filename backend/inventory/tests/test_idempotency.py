@@ -0,0 +1,96 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from inventory.models import IdempotencyKey, Product, Sale
+from inventory.views import SaleViewSet
+
+
+class SalePostMixin:
+    url = '/api/sales/'
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Produto', unit='UN', purchase_price=Decimal('10.00'), current_stock=Decimal('10')
+        )
+
+    def payload(self, number='V-1'):
+        return {
+            'sale_number': number,
+            'sale_type': 'venda',
+            'sale_date': timezone.now().date().isoformat(),
+            'total_amount': '25.00',
+            'payment_method': 'pix',
+            'items': [{'product': self.product.pk, 'quantity': '1', 'unit_price': '25.00'}],
+        }
+
+    def post(self, payload=None, key='chave-1'):
+        return self.client.post(self.url, payload or self.payload(), format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+
+class IdempotencyKeyTests(SalePostMixin, APITestCase):
+    def test_repeat_replays_first_response(self):
+        first = self.post()
+        self.assertEqual(first.status_code, 201, first.content)
+        second = self.post()
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_same_key_with_other_body(self):
+        self.post()
+        response = self.post(self.payload('V-2'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_server_error_releases_the_key(self):
+        failure = Response({'error': 'falhou'}, status=500)
+        with mock.patch.object(SaleViewSet, 'create', return_value=failure):
+            self.assertEqual(self.post().status_code, 500)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_abandoned_claim_is_taken_over(self):
+        self.post()
+        # Worker morreu antes de responder: a venda não foi gravada
+        Sale.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, claimed_at=timezone.now() - timedelta(hours=1))
+        response = self.post()
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_recent_claim_is_not_taken_over(self):
+        self.post()
+        IdempotencyKey.objects.update(status_code=None)
+        with mock.patch('inventory.idempotency.WAIT_SECONDS', 0.2):
+            self.assertEqual(self.post().status_code, 409)
+        self.assertEqual(Sale.objects.count(), 1)
+
+
+class IdempotencyWaitTests(SalePostMixin, APITransactionTestCase):
+    def test_repeat_waits_for_request_in_progress(self):
+        first = self.post()
+        record = IdempotencyKey.objects.get()
+        IdempotencyKey.objects.update(status_code=None)
+
+        def finish():
+            time.sleep(0.3)
+            IdempotencyKey.objects.filter(pk=record.pk).update(status_code=record.status_code)
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        second = self.post()
+        thread.join()
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(Sale.objects.count(), 1)
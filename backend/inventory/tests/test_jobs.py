@@ -0,0 +1,34 @@
+from rest_framework.test import APITestCase
+
+from inventory.models import Job
+
+
+class JobCreateTests(APITestCase):
+    url = '/api/jobs/'
+
+    def test_enqueues_with_allowed_payload(self):
+        response = self.client.post(
+            self.url, {'name': 'update_cost_quantities', 'payload': {'batch_size': 100, 'dry_run': True}}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().payload, {'batch_size': 100, 'dry_run': True})
+
+    def test_rejects_keys_outside_whitelist(self):
+        response = self.client.post(
+            self.url,
+            {'name': 'update_cost_quantities', 'payload': {'checkpoint_file': '/etc/passwd', 'reset': True}},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+    def test_rejects_name_and_max_attempts_in_payload(self):
+        for payload in ({'name': 'x'}, {'max_attempts': 99}):
+            response = self.client.post(self.url, {'name': 'recalculate_profits', 'payload': payload}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_rejects_non_dict_payload_and_bad_types(self):
+        for payload in ([1, 2], 'x', {'batch_size': 'mil'}, {'batch_size': True}, {'batch_size': -1}):
+            response = self.client.post(self.url, {'name': 'recalculate_profits', 'payload': payload}, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(Job.objects.exists())
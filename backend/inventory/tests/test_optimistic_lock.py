@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from inventory.models import Product, ProductionCost, Sale
+
+
+class OptimisticLockTests:
+    """Casos comuns; cada subclasse define o registro, uma edição válida e uma inválida"""
+    url = None
+    change = None
+    invalid_change = None
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Produto', unit='UN', purchase_price=Decimal('10.00'), current_stock=Decimal('10')
+        )
+        self.instance = self.create_instance()
+        self.detail = f'{self.url}{self.instance.pk}/'
+
+    def version(self):
+        return type(self.instance).objects.get(pk=self.instance.pk).version
+
+    def patch(self, data, **headers):
+        return self.client.patch(self.detail, data, format='json', **headers)
+
+    def test_retrieve_sends_etag(self):
+        response = self.client.get(self.detail)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{self.version()}"')
+
+    def test_matching_if_match_updates_and_bumps_version(self):
+        version = self.version()
+        response = self.patch(self.change, HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.version(), version + 1)
+        self.assertEqual(response['ETag'], f'"{version + 1}"')
+
+    def test_stale_if_match_returns_current_record(self):
+        version = self.version()
+        type(self.instance).objects.filter(pk=self.instance.pk).update(version=version + 1)
+        response = self.patch(self.change, HTTP_IF_MATCH=f'W/"{version}"')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['current']['id'], self.instance.pk)
+        self.assertEqual(response['ETag'], f'"{version + 1}"')
+        self.assertEqual(self.version(), version + 1)
+
+    def test_stale_body_version(self):
+        version = self.version()
+        type(self.instance).objects.filter(pk=self.instance.pk).update(version=version + 1)
+        response = self.patch({**self.change, 'version': version})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.version(), version + 1)
+
+    def test_malformed_if_match(self):
+        response = self.patch(self.change, HTTP_IF_MATCH='"versão-1"')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('version', response.data)
+
+    def test_validation_error_rolls_back_version(self):
+        version = self.version()
+        response = self.patch(self.invalid_change, HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(self.version(), version)
+
+
+class ProductLockTests(OptimisticLockTests, APITestCase):
+    url = '/api/products/'
+    change = {'name': 'Produto editado'}
+    invalid_change = {'purchase_price': 'caro'}
+
+    def create_instance(self):
+        return self.product
+
+
+class ProductionCostLockTests(OptimisticLockTests, APITestCase):
+    url = '/api/production-costs/'
+    change = {'notes': 'Revisado'}
+    invalid_change = {'value': '-1.00'}
+
+    def create_instance(self):
+        return ProductionCost.objects.create(
+            product=self.product, cost_type='Mão de obra', value=Decimal('3.00'), date=timezone.now().date()
+        )
+
+
+class SaleLockTests(OptimisticLockTests, APITestCase):
+    url = '/api/sales/'
+    change = {'notes': 'Revisada'}
+    invalid_change = {'sale_date': 'ontem'}
+
+    def create_instance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {
+                'sale_number': 'V-1',
+                'sale_type': 'venda',
+                'sale_date': timezone.now().date().isoformat(),
+                'total_amount': '25.00',
+                'payment_method': 'pix',
+                'items': [{'product': self.product.pk, 'quantity': '1', 'unit_price': '25.00'}],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Sale.objects.get()
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from inventory.models import Product, ProductionCost, StockMovement
+
+
+class SaveProductionEntryValidationTests(APITestCase):
+    url = '/api/production-costs/save_production_entry/'
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Produto', unit='UN', purchase_price=Decimal('10.00'))
+
+    def entry(self, **overrides):
+        return {
+            'product_id': self.product.pk,
+            'date': '2026-10-19',
+            'quantity': '5',
+            'costs': [{'cost_type': 'Matéria-prima', 'value': '12.50'}],
+            **overrides,
+        }
+
+    def post(self, data):
+        return self.client.post(self.url, data, format='json')
+
+    def test_valid_batch_is_saved(self):
+        response = self.post({'entries': [self.entry(), self.entry(quantity='2')]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, Decimal('7'))
+
+    def test_invalid_entries_are_reported_by_index_before_any_write(self):
+        response = self.post({'entries': [
+            self.entry(),
+            self.entry(product_id='abc'),
+            self.entry(date='2026-02-30'),
+            self.entry(date='ontem'),
+            self.entry(quantity='0'),
+            self.entry(quantity='-3'),
+            self.entry(costs='12.50'),
+            self.entry(product_id=999999),
+            'texto',
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertFalse(ProductionCost.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_entries_must_be_a_list(self):
+        response = self.post({'entries': {'product_id': self.product.pk}})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProductionCost.objects.exists())
+
+    def test_single_entry_errors(self):
+        self.assertEqual(self.post(self.entry(product_id='1; DROP')).status_code, 400)
+        self.assertEqual(self.post(self.entry(quantity='-1')).status_code, 400)
+        self.assertEqual(self.post(self.entry(product_id=999999)).status_code, 404)
+        self.assertFalse(ProductionCost.objects.exists())
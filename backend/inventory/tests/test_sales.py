@@ -0,0 +1,107 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from rest_framework.test import APITestCase
+
+from inventory.models import Product, Sale, SaleItem
+
+
+class SaleMonthFilterTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Produto', unit='UN', purchase_price=Decimal('10.00'), current_stock=Decimal('10')
+        )
+        for number, sale_date in (('V-1', date(2026, 9, 30)), ('V-2', date(2026, 10, 1)), ('V-3', date(2025, 10, 5))):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/sales/', {
+                    'sale_number': number,
+                    'sale_type': 'venda',
+                    'sale_date': sale_date.isoformat(),
+                    'total_amount': '25.00',
+                    'payment_method': 'pix',
+                    'items': [{'product': self.product.pk, 'quantity': '1', 'unit_price': '25.00'}],
+                }, format='json')
+            self.assertEqual(response.status_code, 201, response.content)
+
+    def test_month_filter_with_items(self):
+        response = self.client.get('/api/sales/', {'month': '2026-10', 'expand': 'items'})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['results']
+        self.assertEqual([row['sale_number'] for row in rows], ['V-2'])
+        self.assertEqual(len(rows[0]['items']), 1)
+
+    def test_invalid_month(self):
+        self.assertEqual(self.client.get('/api/sales/', {'month': 'outubro'}).status_code, 400)
+
+
+class SaleTotalsTests(APITestCase):
+    def setUp(self):
+        self.products = [
+            Product.objects.create(
+                name=f'Produto {index}', unit='UN', purchase_price=Decimal('10.00'), current_stock=Decimal('10')
+            )
+            for index in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sales/', {
+                'sale_number': 'V-1',
+                'sale_type': 'venda',
+                'sale_date': date(2026, 10, 1).isoformat(),
+                'total_amount': '70.00',
+                'payment_method': 'pix',
+                'items': [
+                    {'product': self.products[0].pk, 'quantity': '2', 'unit_price': '25.00'},
+                    {'product': self.products[1].pk, 'quantity': '1', 'unit_price': '20.00'},
+                ],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.sale = Sale.objects.get()
+
+    def assert_totals_match_items(self):
+        expected = SaleItem.objects.filter(sale=self.sale).aggregate(
+            total_cost=Sum('total_cost'), total_profit=Sum('profit'), total_tax=Sum('tax'),
+            total_freight=Sum('freight'), item_count=Count('id'),
+        )
+        sale = Sale.objects.get(pk=self.sale.pk)
+        for field, value in expected.items():
+            self.assertEqual(getattr(sale, field), value or 0, field)
+        return sale
+
+    def test_totals_after_create(self):
+        sale = self.assert_totals_match_items()
+        self.assertEqual(sale.item_count, 2)
+
+    def test_totals_after_item_update_and_create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = SaleItem.objects.get(product=self.products[0])
+            item.unit_cost = Decimal('4.00')
+            item.tax = Decimal('1.50')
+            item.freight = Decimal('2.00')
+            item.save()
+            SaleItem.objects.create(
+                sale=self.sale, product=self.products[2], quantity=Decimal('1'), unit_price=Decimal('9.00'),
+                unit_cost=Decimal('3.00'),
+            )
+        sale = self.assert_totals_match_items()
+        self.assertEqual(sale.item_count, 3)
+        self.assertEqual(sale.total_tax, Decimal('1.50'))
+
+    def test_totals_after_item_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SaleItem.objects.filter(product=self.products[1]).get().delete()
+        sale = self.assert_totals_match_items()
+        self.assertEqual(sale.item_count, 1)
+
+    def test_rebuild_sale_totals(self):
+        Sale.objects.update(total_profit=0, total_cost=999, item_count=0)
+        out = StringIO()
+        call_command('rebuild_sale_totals', '--verify', stdout=out)
+        self.assertIn('1 vendas com totais divergentes', out.getvalue())
+        call_command('rebuild_sale_totals', stdout=StringIO())
+        self.assert_totals_match_items()
+        out = StringIO()
+        call_command('rebuild_sale_totals', '--verify', stdout=out)
+        self.assertIn('0 vendas com totais divergentes', out.getvalue())
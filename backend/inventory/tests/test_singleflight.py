@@ -0,0 +1,78 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from inventory import singleflight
+
+
+def run_threads(count, target):
+    results = [None] * count
+
+    def run(index):
+        results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_calls_share_one_computation(self):
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {'total': 42}
+
+        threads, results = run_threads(8, lambda: singleflight.do('singleflight:test', compute))
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total': 42}] * 8)
+
+    def test_follower_computes_alone_when_leader_hangs(self):
+        release = threading.Event()
+        leader, _ = run_threads(1, lambda: singleflight.do('singleflight:hung', lambda: release.wait(5)))
+        time.sleep(0.1)
+        try:
+            with mock.patch.object(singleflight, 'LEASE_SECONDS', 0.1):
+                self.assertEqual(singleflight.do('singleflight:hung', lambda: 'local'), 'local')
+        finally:
+            release.set()
+            leader[0].join(5)
+
+
+class DashboardCoalescingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_dashboard_requests_compute_once(self):
+        calls = []
+
+        def slow_dashboard(month, year):
+            calls.append((month, year))
+            time.sleep(0.3)
+            return {'selectedMonth': month, 'selectedYear': year}
+
+        def get():
+            response = APIClient().get('/api/dashboard/?month=5&year=2025')
+            return response.status_code, response.json()
+
+        with mock.patch('inventory.views.dashboard_data', side_effect=slow_dashboard):
+            threads, results = run_threads(6, get)
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(calls, [(5, 2025)])
+        self.assertEqual(results, [(200, {'selectedMonth': 5, 'selectedYear': 2025})] * 6)
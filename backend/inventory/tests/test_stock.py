@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from inventory.models import Product, StockMovement
+from inventory.reconcile import reconcile
+
+
+class ProductStockLedgerTests(APITestCase):
+    def create_product(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/', {
+                'name': 'Produto', 'unit': 'UN', 'purchase_price': '10.00', 'current_stock': '100', **data,
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Product.objects.get(pk=response.json()['id'])
+
+    def sell(self, product, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sales/', {
+                'sale_number': 'V-1',
+                'sale_type': 'venda',
+                'sale_date': timezone.now().date().isoformat(),
+                'total_amount': str(quantity * 25),
+                'payment_method': 'pix',
+                'items': [{'product': product.pk, 'quantity': str(quantity), 'unit_price': '25.00'}],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def assertReconciled(self):
+        for source in ('ledger', 'documents'):
+            checked, drifted = reconcile(source, workers=1, parts=1)
+            self.assertEqual(drifted, [], source)
+
+    def test_create_records_initial_stock_and_reconciles_after_sale(self):
+        product = self.create_product()
+        movement = StockMovement.objects.get(product=product)
+        self.assertEqual((movement.movement_type, movement.reference_type), ('ajuste', 'estoque_inicial'))
+        self.assertEqual(movement.quantity, Decimal('100'))
+
+        self.sell(product, 1)
+        product.refresh_from_db()
+        self.assertEqual(product.current_stock, Decimal('99'))
+        self.assertEqual(product.purchase_price, Decimal('10.00'))
+        self.assertReconciled()
+
+    def test_update_does_not_change_stock(self):
+        product = self.create_product()
+        response = self.client.patch(f'/api/products/{product.pk}/', {'current_stock': '500'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        product.refresh_from_db()
+        self.assertEqual(product.current_stock, Decimal('100'))
+        self.assertReconciled()
+
+    def test_adjust_stock(self):
+        product = self.create_product()
+        url = f'/api/products/{product.pk}/adjust_stock/'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'quantity': '40', 'notes': 'Contagem'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Decimal(response.json()['current_stock']), Decimal('40'))
+        self.assertReconciled()
+
+        stale = self.client.post(url, {'quantity': '10'}, format='json', HTTP_IF_MATCH=f'"{product.version}"')
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(self.client.post(url, {'quantity': '-1'}, format='json').status_code, 400)
+        product.refresh_from_db()
+        self.assertEqual(product.current_stock, Decimal('40'))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from inventory.models import Customer, Product
+
+
+class DeltaSyncTests(APITestCase):
+    url = '/api/products/sync/'
+
+    def setUp(self):
+        self.old = Product.objects.create(name='Antigo', unit='UN', purchase_price=Decimal('1.00'))
+        self.new = Product.objects.create(name='Novo', unit='UN', purchase_price=Decimal('1.00'))
+        Product.objects.filter(pk=self.old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+    def sync(self, cursor=None):
+        response = self.client.get(self.url, {'changed_since': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_without_cursor_returns_everything(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual({row['id'] for row in data['changed']}, {self.old.pk, self.new.pk})
+        self.assertEqual(data['deleted'], [])
+
+    def test_cursor_returns_only_changes_and_tombstones(self):
+        cursor = (timezone.now() - timedelta(days=1)).isoformat()
+        Customer.objects.create(name='Cliente').delete()
+        gone = Product.objects.create(name='Excluído', unit='UN', purchase_price=Decimal('1.00'))
+        gone_id = gone.pk
+        gone.delete()
+
+        data = self.sync(cursor)
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['id'] for row in data['changed']], [self.new.pk])
+        self.assertEqual(data['deleted'], [gone_id])
+
+        # O próximo cursor não repete o que já foi entregue (além da margem)
+        Product.objects.filter(pk=self.new.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.sync(data['cursor'])['changed'], [])
+
+    def test_cursor_older_than_retention_resets(self):
+        data = self.sync((timezone.now() - timedelta(days=31)).isoformat())
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['changed']), 2)
+
+    def test_cursor_with_offset(self):
+        cursor = (timezone.now() - timedelta(days=1)).astimezone(timezone.get_default_timezone()).isoformat()
+        data = self.sync(cursor)
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['id'] for row in data['changed']], [self.new.pk])
+        data = self.sync('2026-10-19T10:00:00+00:00')
+        self.assertIn('changed', data)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'changed_since': 'ontem'})
+        self.assertEqual(response.status_code, 400)
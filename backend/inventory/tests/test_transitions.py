@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from inventory import transitions
+from inventory.models import Product, ProductionCost, Sale, SaleItem
+
+
+class SaleTransitionTests(APITestCase):
+    url = '/api/sales/transition/'
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Produto', unit='UN', purchase_price=Decimal('10.00'), current_stock=Decimal('100')
+        )
+        for code, values in (('R1', ('5.00', '2.50')), ('R2', ('8.00',))):
+            for index, value in enumerate(values):
+                ProductionCost.objects.create(
+                    product=self.product, cost_type=f'Custo {index}', value=Decimal(value),
+                    date=timezone.now().date(), refinement_code=code,
+                )
+        # V-2 e V-3 usam o mesmo refinamento R1; a trava fica com a de menor id
+        self.sales = [self.create_sale(number, codes) for number, codes in (
+            ('V-1', ['R2']), ('V-2', ['R1']), ('V-3', ['R1', 'R2']),
+        )]
+        Sale.objects.update(status='homologado')
+
+    def create_sale(self, number, codes):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sales/', {
+                'sale_number': number,
+                'sale_type': 'venda',
+                'sale_date': timezone.now().date().isoformat(),
+                'total_amount': '50.00',
+                'payment_method': 'pix',
+                'items': [
+                    {'product': self.product.pk, 'quantity': '1', 'unit_price': '25.00'} for _ in codes
+                ],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        sale = Sale.objects.get(sale_number=number)
+        for item, code in zip(sale.items.order_by('id'), codes):
+            SaleItem.objects.filter(pk=item.pk).update(cost_refinement_code=code, cost_snapshot=None)
+        return sale.pk
+
+    def transition(self, ids, target):
+        return self.client.post(self.url, {'ids': ids, 'status': target}, format='json')
+
+    def statuses(self):
+        return dict(Sale.objects.values_list('pk', 'status'))
+
+    def outcome(self):
+        """Travas por custo e snapshots por item (sem o horário do cálculo)"""
+        locks = dict(ProductionCost.objects.values_list('pk', 'locked_by_sale_id'))
+        snapshots = {}
+        for item in SaleItem.objects.order_by('id'):
+            snapshot = dict(item.cost_snapshot or {})
+            snapshot.pop('calculated_at', None)
+            snapshots[item.pk] = snapshot
+        return self.statuses(), locks, snapshots
+
+    def test_rejects_whole_batch(self):
+        Sale.objects.filter(pk=self.sales[2]).update(status='disputa')
+        before = self.statuses()
+        response = self.transition([self.sales[0], self.sales[2], 999999], 'liquidado')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['id'] for row in response.data['rejected']], [self.sales[2], 999999])
+        self.assertEqual(self.statuses(), before)
+        self.assertFalse(ProductionCost.objects.filter(is_locked=True).exists())
+
+    def test_invalid_target(self):
+        self.assertEqual(self.transition([self.sales[0]], 'cancelado').status_code, 400)
+
+    def test_skips_sales_already_at_target(self):
+        Sale.objects.filter(pk=self.sales[0]).update(status='em_transito')
+        version = Sale.objects.get(pk=self.sales[0]).version
+        response = self.transition([self.sales[0], self.sales[1]], 'em_transito')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['updated'], [self.sales[1]])
+        self.assertEqual(response.data['unchanged'], [self.sales[0]])
+        self.assertEqual(Sale.objects.get(pk=self.sales[0]).version, version)
+        self.assertEqual(Sale.objects.get(pk=self.sales[1]).version, version + 1)
+
+    def test_liquidation_matches_sale_by_sale(self):
+        # Referência: a liquidação individual (sinais da venda), em ordem de id
+        with transaction.atomic():
+            for sale in Sale.objects.filter(pk__in=self.sales).order_by('pk'):
+                sale.status = 'liquidado'
+                sale.save()
+            expected = self.outcome()
+            transaction.set_rollback(True)
+
+        response = self.transition(list(reversed(self.sales)), 'liquidado')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['locked_costs'], 3)
+        self.assertEqual(self.outcome(), expected)
+
+        locks = dict(ProductionCost.objects.values_list('refinement_code', 'locked_by_sale_id'))
+        self.assertEqual(locks, {'R1': self.sales[1], 'R2': self.sales[0]})
+        snapshot = SaleItem.objects.filter(sale_id=self.sales[2], cost_refinement_code='R1').get().cost_snapshot
+        self.assertEqual(snapshot['total'], 7.5)
+        self.assertEqual(transitions.transition_sales(self.sales, 'liquidado')['updated'], [])
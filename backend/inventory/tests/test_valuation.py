@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from inventory import valuation
+from inventory.models import Product, StockMovement, ValuationEntry
+
+
+class OpeningBalanceTests(APITestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Produto', unit='UN', purchase_price=Decimal('10.00'), current_stock=Decimal('100')
+        )
+
+    def sell(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sales/', {
+                'sale_number': f'V-{ValuationEntry.objects.count()}',
+                'sale_type': 'venda',
+                'sale_date': timezone.now().date().isoformat(),
+                'total_amount': str(quantity * 25),
+                'payment_method': 'pix',
+                'items': [{'product': self.product.pk, 'quantity': str(quantity), 'unit_price': '25.00'}],
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_sale_keeps_purchase_price_from_opening_balance(self):
+        self.sell(1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.purchase_price, Decimal('10.00'))
+
+        opening = ValuationEntry.objects.get(product=self.product, source_type='abertura')
+        self.assertEqual(opening.quantity, Decimal('100'))
+        sale = ValuationEntry.objects.get(product=self.product, source_type='venda')
+        self.assertEqual(sale.unit_cost, Decimal('10.0000'))
+        self.assertEqual(sale.balance_quantity, Decimal('99'))
+
+    def test_replay_and_rebuild_keep_a_single_opening(self):
+        self.sell(2)
+        valuation.replay_from(self.product.pk, timezone.now().date())
+        valuation.rebuild_all()
+        self.assertEqual(ValuationEntry.objects.filter(product=self.product, source_type='abertura').count(), 1)
+        self.assertEqual(ValuationEntry.objects.filter(product=self.product).count(), 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.purchase_price, Decimal('10.00'))
+
+    def test_no_cost_basis_keeps_purchase_price(self):
+        # Abertura sem custo; o preço é informado depois, à mão
+        Product.objects.filter(pk=self.product.pk).update(purchase_price=0)
+        valuation.replay_from(self.product.pk, timezone.now().date())
+        Product.objects.filter(pk=self.product.pk).update(purchase_price=Decimal('10.00'))
+        self.sell(1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.purchase_price, Decimal('10.00'))
+
+
+class MovedSourceTests(APITestCase):
+    def test_movement_moved_to_another_product(self):
+        first = Product.objects.create(name='A', unit='UN', purchase_price=Decimal('10.00'))
+        second = Product.objects.create(name='B', unit='UN', purchase_price=Decimal('10.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            movement = StockMovement.objects.create(
+                product=first, movement_type='entrada', reference_type='compra',
+                quantity=Decimal('5'), unit_price=Decimal('12.00'),
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            movement.product = second
+            movement.save()
+
+        entries = ValuationEntry.objects.filter(source_type='movimentacao', source_id=movement.pk)
+        self.assertEqual(list(entries.values_list('product_id', flat=True)), [second.pk])
+        self.assertFalse(ValuationEntry.objects.filter(product=first).exclude(source_type='abertura').exists())
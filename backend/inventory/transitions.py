@@ -0,0 +1,143 @@
+"""
+Transições de status de vendas em lote.
+
+As transições permitidas estão declaradas em `SALE_TRANSITIONS`. O lote é
+validado inteiro antes de qualquer gravação e aplicado com UPDATEs por
+conjunto, sem passar pelo `SaleCreateSerializer` (que refaz o estoque dos
+itens) nem pelos sinais de `Sale`. A trava dos custos de produção e os
+snapshots de custo da liquidação são feitos uma única vez para o lote.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import ProductionCost, Sale, SaleItem
+
+# Status atual -> status para os quais a venda pode ir
+SALE_TRANSITIONS = {
+    'disputa': {'aguardando_julgamento', 'homologado'},
+    'aguardando_julgamento': {'disputa', 'homologado'},
+    'homologado': {'em_producao', 'em_transito', 'aguardando_pagamento', 'liquidado'},
+    'em_producao': {'homologado', 'em_transito', 'aguardando_pagamento', 'liquidado'},
+    'em_transito': {'em_producao', 'aguardando_pagamento', 'liquidado'},
+    'aguardando_pagamento': {'em_transito', 'liquidado'},
+    # Liquidada trava os custos; só volta por edição individual da venda
+    'liquidado': set(),
+}
+
+
+class TransitionError(ValueError):
+
+    def __init__(self, message, rejected=None):
+        super().__init__(message)
+        self.rejected = rejected or []
+
+
+def can_transition(current, target):
+    return target in SALE_TRANSITIONS.get(current, ())
+
+
+def build_cost_snapshots(items, now=None):
+    """
+    Preenche `cost_snapshot` dos itens com uma consulta para todos os
+    refinamentos envolvidos. Retorna os itens alterados (sem gravar).
+    """
+    from .signals import build_cost_snapshot
+
+    codes = {item.cost_refinement_code for item in items if item.cost_refinement_code}
+    if not codes:
+        return []
+    costs_by_code = {code: [] for code in codes}
+    for cost in ProductionCost.objects.filter(refinement_code__in=codes).order_by('id'):
+        costs_by_code[cost.refinement_code].append(cost)
+    snapshots = {code: build_cost_snapshot(code, costs) for code, costs in costs_by_code.items()}
+    now = now or timezone.now()
+    changed = []
+    for item in items:
+        if item.cost_refinement_code:
+            item.cost_snapshot = snapshots[item.cost_refinement_code]
+            item.cost_calculated_at = now
+            changed.append(item)
+    return changed
+
+
+def lock_liquidation_costs(sale_ids, now):
+    """
+    Trava os custos de produção dos refinamentos usados nas vendas, num
+    único UPDATE. Um refinamento usado por mais de uma venda fica com a de
+    menor id, como na liquidação individual em ordem.
+    """
+    lock_owner = {}
+    rows = (
+        SaleItem.objects.filter(sale_id__in=sale_ids, cost_refinement_code__isnull=False)
+        .exclude(cost_refinement_code='')
+        .order_by('sale_id', 'id')
+        .values_list('cost_refinement_code', 'sale_id')
+    )
+    for code, sale_id in rows:
+        lock_owner.setdefault(code, sale_id)
+    if not lock_owner:
+        return 0
+    return ProductionCost.objects.filter(refinement_code__in=lock_owner, is_locked=False).update(
+        is_locked=True,
+        locked_by_sale_id=Case(
+            *[When(refinement_code=code, then=Value(sale_id)) for code, sale_id in lock_owner.items()],
+            output_field=IntegerField(),
+        ),
+        locked_at=now,
+    )
+
+
+def transition_sales(sale_ids, target):
+    """
+    Leva as vendas para o status `target`. Tudo ou nada: qualquer venda
+    inexistente ou transição não permitida levanta `TransitionError` com a
+    lista de rejeições. Vendas já no status de destino são ignoradas.
+    """
+    if target not in SALE_TRANSITIONS:
+        raise TransitionError(f'Status inválido: {target}')
+    sale_ids = list(dict.fromkeys(sale_ids))
+
+    with transaction.atomic():
+        # Trava as linhas do lote até o fim da transação
+        current = dict(
+            Sale.objects.select_for_update().filter(pk__in=sale_ids).values_list('pk', 'status')
+        )
+        rejected = []
+        for sale_id in sale_ids:
+            status = current.get(sale_id)
+            if status is None:
+                rejected.append({'id': sale_id, 'error': 'Venda não encontrada'})
+            elif status != target and not can_transition(status, target):
+                rejected.append({
+                    'id': sale_id,
+                    'status': status,
+                    'error': f'Transição não permitida: {status} -> {target}',
+                })
+        if rejected:
+            raise TransitionError('Algumas vendas não podem mudar para este status.', rejected)
+
+        changed = [sale_id for sale_id in sale_ids if current[sale_id] != target]
+        if not changed:
+            return {'updated': [], 'unchanged': sale_ids, 'locked_costs': 0}
+
+        now = timezone.now()
+        Sale.objects.filter(pk__in=changed).update(
+            status=target, version=F('version') + 1, updated_at=now
+        )
+
+        locked = 0
+        if target == 'liquidado':
+            # Mesmo efeito dos sinais de pre_save/post_save da venda liquidada
+            locked = lock_liquidation_costs(changed, now)
+            items = SaleItem.objects.filter(
+                sale_id__in=changed, cost_snapshot__isnull=True, cost_refinement_code__isnull=False
+            ).exclude(cost_refinement_code='')
+            snapshots = build_cost_snapshots(list(items), now)
+            SaleItem.objects.bulk_update(snapshots, ['cost_snapshot', 'cost_calculated_at'], batch_size=500)
+
+    return {
+        'updated': changed,
+        'unchanged': [sale_id for sale_id in sale_ids if current[sale_id] == target],
+        'locked_costs': locked,
+    }
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, ProductViewSet, CustomerViewSet,
     SupplierViewSet, ExpenseViewSet, ProductionCostViewSet, SaleViewSet,
-    StockMovementViewSet, CompanyViewSet
+    StockMovementViewSet, CompanyViewSet, JobViewSet
 )
 from . import views
 
@@ -17,8 +17,10 @@ router.register(r'production-costs', ProductionCostViewSet, basename='production
 router.register(r'sales', SaleViewSet, basename='sale')
 router.register(r'stock-movements', StockMovementViewSet, basename='stockmovement')
 router.register(r'company', CompanyViewSet, basename='company')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('batch/', views.batch_view, name='batch'),
 ]
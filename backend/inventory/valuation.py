@@ -0,0 +1,401 @@
+"""
+Motor de valoração de estoque (custo médio ponderado ou PEPS/FIFO).
+
+O razão de um produto é formado pelas entradas de produção, movimentações de
+estoque e itens de venda, ordenados por (data, prioridade, id). Cada evento
+gera um `ValuationEntry` com o saldo resultante, e o `purchase_price` do
+produto passa a ser o custo unitário do último saldo. As origens são lidas das
+views *History, que incluem os registros arquivados.
+
+O razão começa por um lançamento de abertura ('abertura'), gravado uma única
+vez por produto a partir do estoque e do preço de compra atuais, descontado o
+saldo dos eventos já existentes. Os reprocessamentos nunca o apagam.
+
+Alterações em eventos já lançados marcam o produto como "sujo" a partir da
+data afetada; no commit da transação o razão é reprocessado apenas a partir
+desse ponto. Um evento novo no fim do razão reprocessa só a própria data.
+"""
+import heapq
+import threading
+from collections import deque, namedtuple
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import (
+    Product, ProductionCostHistory, SaleItemHistory, StockMovementHistory, ValuationEntry,
+)
+
+ZERO = Decimal('0')
+UNIT_COST_PLACES = Decimal('0.0001')
+PRICE_PLACES = Decimal('0.01')
+
+# Ordem dos eventos de uma mesma data
+PRIORITY = {'producao': 0, 'movimentacao': 1, 'venda': 2}
+OPENING = 'abertura'
+
+LedgerEvent = namedtuple(
+    'LedgerEvent',
+    ['product_id', 'date', 'priority', 'source_id', 'source_type', 'kind', 'quantity', 'unit_cost']
+)
+
+
+def get_method():
+    return getattr(settings, 'INVENTORY_VALUATION_METHOD', 'average')
+
+
+class ValuationState:
+    """
+    Saldo de um produto. Estoque negativo não carrega valor: as saídas sem
+    saldo são custeadas pelo último custo conhecido.
+    """
+
+    def __init__(self, method, quantity=ZERO, value=ZERO, last_cost=ZERO):
+        self.method = method
+        self.quantity = quantity
+        self.value = value
+        self.last_cost = last_cost
+        # Camadas [quantidade, custo unitário] usadas no método FIFO
+        self.layers = deque()
+
+    @property
+    def unit_cost(self):
+        if self.quantity > 0:
+            return self.value / self.quantity
+        return self.last_cost
+
+    def receive(self, quantity, unit_cost):
+        """Entrada: retorna o custo unitário aplicado"""
+        if unit_cost is None:
+            unit_cost = self.unit_cost
+        if self.quantity < 0:
+            # A entrada primeiro cobre o estoque negativo
+            covered = min(quantity, -self.quantity)
+            self.quantity += covered
+            quantity -= covered
+        if quantity > 0:
+            self.quantity += quantity
+            self.value += quantity * unit_cost
+            if self.method == 'fifo':
+                self.layers.append([quantity, unit_cost])
+        self.last_cost = unit_cost if self.method == 'fifo' else self.unit_cost
+        return unit_cost
+
+    def issue(self, quantity):
+        """Saída: retorna o custo total das unidades baixadas"""
+        available = max(self.quantity, ZERO)
+        taken = min(quantity, available)
+        cost = ZERO
+        if taken > 0:
+            if self.method == 'fifo':
+                remaining = taken
+                while remaining > 0 and self.layers:
+                    layer = self.layers[0]
+                    used = min(remaining, layer[0])
+                    cost += used * layer[1]
+                    layer[0] -= used
+                    remaining -= used
+                    if layer[0] <= 0:
+                        self.layers.popleft()
+            else:
+                cost = taken * self.value / self.quantity
+            self.last_cost = cost / taken
+        self.value -= min(cost, self.value)
+        cost += (quantity - taken) * self.last_cost
+        self.quantity -= quantity
+        if self.quantity <= 0:
+            self.value = ZERO
+            self.layers.clear()
+        return cost
+
+    def apply(self, event):
+        """Aplica um evento e retorna (quantidade com sinal, custo unitário)"""
+        if event.kind == 'set':
+            delta = event.quantity - self.quantity
+            if delta >= 0:
+                return delta, self.receive(delta, None)
+            cost = self.issue(-delta)
+            return delta, cost / -delta
+        if event.kind == 'in':
+            return event.quantity, self.receive(event.quantity, event.unit_cost)
+        cost = self.issue(event.quantity)
+        return -event.quantity, (cost / event.quantity if event.quantity else ZERO)
+
+    def entry_for(self, event):
+        quantity, unit_cost = self.apply(event)
+        return ValuationEntry(
+            product_id=event.product_id,
+            date=event.date,
+            priority=event.priority,
+            source_type=event.source_type,
+            source_id=event.source_id,
+            quantity=quantity,
+            unit_cost=unit_cost.quantize(UNIT_COST_PLACES),
+            balance_quantity=self.quantity,
+            balance_value=self.value.quantize(UNIT_COST_PLACES),
+            balance_unit_cost=self.unit_cost.quantize(UNIT_COST_PLACES),
+        )
+
+
+def production_events(queryset):
+    """Eventos de entrada de produção (uma linha principal por refinement_code)"""
+    group_total = (
+        ProductionCostHistory.objects.filter(
+            cost_category='production', refinement_code=OuterRef('refinement_code')
+        ).order_by().values('refinement_code').annotate(total=Sum('value')).values('total')
+    )
+    mains = (
+        queryset.filter(cost_category='production', quantity__isnull=False)
+        .annotate(group_total=Subquery(group_total))
+        .values('id', 'product_id', 'date', 'quantity', 'group_total')
+    )
+    for main in mains.iterator():
+        yield LedgerEvent(
+            main['product_id'], main['date'], PRIORITY['producao'], main['id'], 'producao',
+            'in', main['quantity'], Decimal(main['group_total'] or 0)
+        )
+
+
+def movement_events(queryset):
+    """
+    Movimentações manuais. As automáticas (vendas e produção) já entram no
+    razão pelos itens de venda e custos de produção.
+    """
+    kinds = {'entrada': 'in', 'saida': 'out', 'ajuste': 'set'}
+    for movement in queryset.values(
+        'id', 'product_id', 'created_at', 'movement_type', 'quantity', 'unit_price'
+    ).iterator():
+        yield LedgerEvent(
+            movement['product_id'], movement['created_at'].date(), PRIORITY['movimentacao'],
+            movement['id'], 'movimentacao', kinds[movement['movement_type']],
+            movement['quantity'], movement['unit_price']
+        )
+
+
+def sale_events(queryset):
+    for item in queryset.values('id', 'product_id', 'sale__sale_date', 'quantity').iterator():
+        yield LedgerEvent(
+            item['product_id'], item['sale__sale_date'], PRIORITY['venda'], item['id'], 'venda',
+            'out', item['quantity'], None
+        )
+
+
+def event_key(event):
+    return (event.date, event.priority, event.source_id)
+
+
+def load_events(product_id, since):
+    events = [
+        *production_events(ProductionCostHistory.objects.filter(product_id=product_id, date__gte=since)),
+        *movement_events(StockMovementHistory.objects.filter(
+            product_id=product_id, created_at__date__gte=since, automatic=False
+        )),
+        *sale_events(SaleItemHistory.objects.filter(product_id=product_id, sale__sale_date__gte=since)),
+    ]
+    events.sort(key=event_key)
+    return events
+
+
+def opening_quantity(product_id):
+    """
+    Saldo líquido de todos os eventos do razão e a data do primeiro deles.
+    Ajustes (kind 'set') não entram: o saldo anterior a eles é desconhecido.
+    """
+    production = ProductionCostHistory.objects.filter(
+        product_id=product_id, cost_category='production', quantity__isnull=False
+    ).aggregate(total=Sum('quantity'), first=Min('date'))
+    movements = StockMovementHistory.objects.filter(product_id=product_id, automatic=False)
+    entradas = movements.filter(movement_type='entrada').aggregate(total=Sum('quantity'))
+    saidas = movements.filter(movement_type='saida').aggregate(total=Sum('quantity'))
+    first_movement = movements.aggregate(first=Min('created_at'))['first']
+    sales = SaleItemHistory.objects.filter(product_id=product_id).aggregate(
+        total=Sum('quantity'), first=Min('sale__sale_date')
+    )
+    net = (
+        Decimal(production['total'] or 0) + Decimal(entradas['total'] or 0)
+        - Decimal(saidas['total'] or 0) - Decimal(sales['total'] or 0)
+    )
+    dates = [production['first'], first_movement and first_movement.date(), sales['first']]
+    dates = [date for date in dates if date is not None]
+    return net, min(dates) if dates else timezone.now().date()
+
+
+def opening_entry(product):
+    """
+    Lançamento de abertura do produto (dict com current_stock e
+    purchase_price), criado na primeira vez: estoque atual menos o saldo dos
+    eventos, ao preço de compra atual, datado no primeiro evento.
+    """
+    opening = ValuationEntry.objects.filter(source_type=OPENING, source_id=product['id']).first()
+    if opening is not None:
+        return opening
+    net, date = opening_quantity(product['id'])
+    quantity = Decimal(product['current_stock'] or 0) - net
+    unit_cost = Decimal(product['purchase_price'] or 0).quantize(UNIT_COST_PLACES)
+    return ValuationEntry.objects.create(
+        product_id=product['id'],
+        date=date,
+        priority=0,
+        source_type=OPENING,
+        source_id=product['id'],
+        quantity=quantity,
+        unit_cost=unit_cost,
+        balance_quantity=quantity,
+        balance_value=(quantity * unit_cost if quantity > 0 else ZERO).quantize(UNIT_COST_PLACES),
+        balance_unit_cost=unit_cost,
+    )
+
+
+def opening_state(opening, method):
+    state = ValuationState(method, last_cost=opening.unit_cost)
+    if opening.quantity > 0:
+        state.receive(opening.quantity, opening.unit_cost)
+    else:
+        state.quantity = opening.quantity
+    return state
+
+
+def state_before(product_id, since, method, opening):
+    """Reconstrói o saldo do produto imediatamente antes da data informada"""
+    prior = ValuationEntry.objects.filter(product_id=product_id, date__lt=since).exclude(source_type=OPENING)
+    if method != 'fifo':
+        last = prior.order_by('-date', '-priority', '-source_id').first()
+        if last is None:
+            return opening_state(opening, method)
+        return ValuationState(
+            method, last.balance_quantity, last.balance_value, last.balance_unit_cost
+        )
+    # FIFO: as camadas são refeitas a partir dos lançamentos já gravados,
+    # sem consultar novamente as tabelas de origem
+    state = opening_state(opening, method)
+    for quantity, unit_cost in prior.order_by('date', 'priority', 'source_id').values_list(
+        'quantity', 'unit_cost'
+    ).iterator():
+        if quantity >= 0:
+            state.receive(quantity, unit_cost)
+        else:
+            state.issue(-quantity)
+    return state
+
+
+def update_purchase_price(product_id, state):
+    if state.unit_cost <= 0:
+        # Sem base de custo (nenhuma entrada com custo): mantém o preço atual
+        return
+    Product.objects.filter(pk=product_id).update(
+        purchase_price=state.unit_cost.quantize(PRICE_PLACES),
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+def replay_from(product_id, since):
+    """Reprocessa o razão de um produto a partir de uma data"""
+    method = get_method()
+    with transaction.atomic():
+        # Trava o produto: reprocessamentos simultâneos do mesmo produto
+        # (workers diferentes) não gravam lançamentos duplicados
+        product = Product.objects.select_for_update().filter(pk=product_id).values(
+            'id', 'current_stock', 'purchase_price'
+        ).first()
+        if product is None:
+            return None
+        opening = opening_entry(product)
+        state = state_before(product_id, since, method, opening)
+        ValuationEntry.objects.filter(product_id=product_id, date__gte=since).exclude(source_type=OPENING).delete()
+        entries = [state.entry_for(event) for event in load_events(product_id, since)]
+        ValuationEntry.objects.bulk_create(entries, batch_size=1000)
+        update_purchase_price(product_id, state)
+    return state
+
+
+_pending = threading.local()
+
+
+def mark_dirty(product_id, date, source_type=None, source_id=None):
+    """
+    Marca o razão do produto para reprocessamento a partir de `date` (ou da
+    data já lançada para a origem, se anterior). O reprocessamento acontece
+    uma única vez por produto, no commit da transação corrente.
+
+    Se a origem foi movida para outro produto, o lançamento antigo é apagado
+    e o razão do produto anterior também é reprocessado.
+    """
+    if isinstance(date, str):
+        date = parse_date(date)
+    if source_type is not None:
+        entries = ValuationEntry.objects.filter(source_type=source_type, source_id=source_id)
+        for previous_product, previous in entries.values_list('product_id', 'date'):
+            if previous_product != product_id:
+                entries.filter(product_id=previous_product).delete()
+                _schedule(previous_product, previous)
+            elif date is None or previous < date:
+                date = previous
+    if date is not None:
+        _schedule(product_id, date)
+
+
+def _schedule(product_id, date):
+    pending = getattr(_pending, 'products', None)
+    if pending is None:
+        pending = _pending.products = {}
+    if product_id not in pending or date < pending[product_id]:
+        pending[product_id] = date
+    transaction.on_commit(flush_pending)
+
+
+def flush_pending():
+    pending = getattr(_pending, 'products', None)
+    _pending.products = None
+    for product_id, since in (pending or {}).items():
+        replay_from(product_id, since)
+
+
+def rebuild_all(batch_size=5000, stdout=None):
+    """
+    Refaz a valoração de todos os produtos numa única passada pelo razão
+    ordenado (produto, data, prioridade, id), com memória limitada ao lote.
+    Os lançamentos de abertura são mantidos (ou criados, se faltarem).
+    """
+    method = get_method()
+    streams = [
+        production_events(ProductionCostHistory.objects.order_by('product_id', 'date', 'id')),
+        movement_events(
+            StockMovementHistory.objects.filter(automatic=False).order_by('product_id', TruncDate('created_at'), 'id')
+        ),
+        sale_events(SaleItemHistory.objects.order_by('product_id', 'sale__sale_date', 'id')),
+    ]
+    ledger = heapq.merge(*streams, key=lambda event: (event.product_id, *event_key(event)))
+
+    products = 0
+    entries = 0
+    with transaction.atomic():
+        ValuationEntry.objects.exclude(source_type=OPENING).delete()
+        openings = {entry.source_id: entry for entry in ValuationEntry.objects.filter(source_type=OPENING)}
+        buffer = []
+        for product_id, events in groupby(ledger, key=lambda event: event.product_id):
+            opening = openings.get(product_id)
+            if opening is None:
+                opening = opening_entry(
+                    Product.objects.values('id', 'current_stock', 'purchase_price').get(pk=product_id)
+                )
+            state = opening_state(opening, method)
+            for event in events:
+                buffer.append(state.entry_for(event))
+                if len(buffer) >= batch_size:
+                    ValuationEntry.objects.bulk_create(buffer)
+                    entries += len(buffer)
+                    buffer = []
+            update_purchase_price(product_id, state)
+            products += 1
+            if stdout and products % 1000 == 0:
+                stdout.write(f'{products} produtos processados...')
+        ValuationEntry.objects.bulk_create(buffer)
+        entries += len(buffer)
+    return products, entries
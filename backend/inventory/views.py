@@ -1,16 +1,35 @@
+import logging
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Count, Q, F
-from .models import Category, Product, Customer, Supplier, Expense, ProductionCost, Sale, SaleItem, StockMovement, Company
+from django.db.models import Count, Q, F, Sum
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from .models import (
+    Category, Product, Customer, Supplier, Expense, ProductionCost, Sale, SaleHistory, SaleItem, StockMovement,
+    Company, Job
+)
 from .serializers import (
     CategorySerializer, ProductSerializer, CustomerSerializer,
     SupplierSerializer, ExpenseSerializer, ProductionCostSerializer, SaleSerializer,
-    SaleCreateSerializer, StockMovementSerializer, CompanySerializer
+    SaleCreateSerializer, SaleListSerializer, StockAtDateSerializer, StockMovementSerializer, CompanySerializer,
+    JobSerializer
 )
+from . import batch, jobs, parallel, routers, singleflight, stock, transitions
+from .routers import replica_reads
+from .mixins import (
+    DeltaSyncMixin, FastListMixin, IdempotencyMixin, OptimisticLockMixin, SparseFieldsetMixin,
+)
+
+logger = logging.getLogger(__name__)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -19,7 +38,8 @@ class CategoryViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SparseFieldsetMixin, FastListMixin, DeltaSyncMixin, OptimisticLockMixin, viewsets.ModelViewSet):
+    replica_actions = ('list', 'low_stock', 'stock_at')
     queryset = Product.objects.select_related('category').all()
     serializer_class = ProductSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -50,6 +70,10 @@ class ProductViewSet(viewsets.ModelViewSet):
             current_stock__lt=F('min_stock')
         ).order_by('current_stock')
         
+        response = self.fast_list(products, self.get_serializer())
+        if response is not None:
+            return response
+        
         page = self.paginate_queryset(products)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -57,9 +81,78 @@ class ProductViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def stock_at(self, request):
+        """
+        Estoque, custo unitário e valor de cada produto no fim de uma data:
+        snapshot mais recente + movimentações desde então, numa única consulta.
+        Parâmetro obrigatório: date (AAAA-MM-DD). Aceita os filtros da listagem.
+        """
+        from django.utils.dateparse import parse_date
+
+        date = parse_date(request.query_params.get('date') or '')
+        if date is None:
+            return Response({'error': 'Informe date no formato AAAA-MM-DD'}, status=400)
+
+        products = stock.stock_at(date, self.get_queryset().select_related(None)).order_by('name')
+        rows = products.values(
+            'id', 'code', 'name', 'unit', 'stock_quantity', 'stock_unit_cost', 'stock_value'
+        )
+        # Página (COUNT + linhas) e totais são consultas independentes: rodam em paralelo
+        results = parallel.gather_sync(
+            page=lambda: self.paginate_queryset(rows),
+            totals=lambda: products.aggregate(
+                total_quantity=Sum('stock_quantity'), total_value=Sum('stock_value')
+            ),
+        )
+        page, totals = results['page'], results['totals']
+        if page is not None:
+            response = self.get_paginated_response(StockAtDateSerializer(page, many=True).data)
+        else:
+            response = Response({'results': StockAtDateSerializer(rows, many=True).data})
+        totals_field = StockAtDateSerializer().fields
+        response.data['date'] = date
+        response.data['total_quantity'] = totals_field['stock_quantity'].to_representation(
+            totals['total_quantity'] or 0
+        )
+        response.data['total_value'] = totals_field['stock_value'].to_representation(totals['total_value'] or 0)
+        return response
 
+    @action(detail=True, methods=['post'])
+    def adjust_stock(self, request, pk=None):
+        """
+        Ajuste de inventário: o estoque passa a ser a quantidade contada e o
+        ajuste fica no razão. Payload: {quantity, notes}; aceita If-Match.
+        """
+        from decimal import Decimal, InvalidOperation
 
-class CustomerViewSet(viewsets.ModelViewSet):
+        try:
+            quantity = Decimal(str(request.data.get('quantity')))
+            if not quantity.is_finite() or quantity < 0:
+                raise InvalidOperation
+        except InvalidOperation:
+            return Response({'error': 'Informe quantity (maior ou igual a zero)'}, status=400)
+        expected = self.get_expected_version(request)
+        with transaction.atomic():
+            product = Product.objects.select_for_update().get(pk=self.get_object().pk)
+            if expected is not None and product.version != expected:
+                return Response({
+                    'error': 'O registro foi alterado por outro usuário. Recarregue e tente novamente.',
+                    'current': self.get_serializer(product).data,
+                }, status=status.HTTP_409_CONFLICT)
+            StockMovement.objects.create(
+                product=product,
+                movement_type='ajuste',
+                quantity=quantity,
+                reference_type='ajuste_inventario',
+                notes=request.data.get('notes') or 'Ajuste de estoque',
+            )
+        product.refresh_from_db()
+        return self.set_etag(Response(self.get_serializer(product).data), product.version)
+
+
+class CustomerViewSet(SparseFieldsetMixin, FastListMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -77,7 +170,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(SparseFieldsetMixin, FastListMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -95,7 +188,7 @@ class SupplierViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(SparseFieldsetMixin, FastListMixin, DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -117,7 +210,11 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ProductionCostViewSet(viewsets.ModelViewSet):
+class ProductionCostViewSet(
+    IdempotencyMixin, SparseFieldsetMixin, FastListMixin, OptimisticLockMixin, viewsets.ModelViewSet
+):
+    replica_actions = ('list', 'refinements')
+    idempotent_actions = ('create', 'save_production_entry')
     queryset = ProductionCost.objects.select_related('product', 'customer', 'locked_by_sale').all()
     serializer_class = ProductionCostSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -150,61 +247,118 @@ class ProductionCostViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-    def _update_product_stock_and_price(self, product, qty, unit_cost, reverse=False):
-        """Update product stock and weighted average purchase_price."""
-        from decimal import Decimal
-        qty = Decimal(str(qty)) if qty else Decimal('0')
-        unit_cost = Decimal(str(unit_cost)) if unit_cost else Decimal('0')
-        if reverse:
-            new_stock = max(Decimal('0'), product.current_stock - qty)
-            product.current_stock = new_stock
-        else:
-            old_stock = product.current_stock
-            old_price = product.purchase_price
-            new_stock = old_stock + qty
-            if new_stock > 0:
-                product.purchase_price = ((old_stock * old_price) + (qty * unit_cost)) / new_stock
-            product.current_stock = new_stock
-        product.save(update_fields=['current_stock', 'purchase_price'])
-
     @action(detail=False, methods=['post'])
     def save_production_entry(self, request):
         """
-        Cria um grupo de custos de produção e atualiza estoque/preço do produto.
+        Cria um ou vários grupos de custos de produção numa única transação e
+        atualiza o estoque de cada produto uma única vez.
         Payload: {product_id, date, quantity, costs: [{cost_type, value}], notes}
+             ou: {entries: [{product_id, date, quantity, costs, notes}, ...]}
         """
-        from decimal import Decimal
-        import time
-        product_id = request.data.get('product_id')
-        date = request.data.get('date')
-        quantity = request.data.get('quantity')
-        costs = request.data.get('costs', [])
-        notes = request.data.get('notes', '')
-        if not product_id or not date or not quantity or not costs:
+        from decimal import Decimal, InvalidOperation
+        from django.utils.dateparse import parse_date
+        from . import valuation
+        from .models import Sequence
+
+        single = 'entries' not in request.data
+        entries = [request.data] if single else request.data.get('entries')
+        if not isinstance(entries, list):
+            return Response({'error': 'entries deve ser uma lista'}, status=400)
+        if not entries:
             return Response({'error': 'Campos obrigatórios faltando'}, status=400)
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            return Response({'error': 'Produto não encontrado'}, status=404)
-        qty = Decimal(str(quantity))
-        timestamp = str(int(time.time()))[-6:]
-        ref_code = f'PROD-{product.code}-{timestamp}'
-        for i, cost in enumerate(costs):
-            ProductionCost.objects.create(
-                product=product,
-                cost_type=cost['cost_type'],
-                value=Decimal(str(cost['value'])),
-                date=date,
-                quantity=qty if i == 0 else None,
-                refinement_code=ref_code,
-                refinement_name=ref_code,
-                notes=notes if notes and i == 0 else None,
-                cost_category='production',
-                description='',
-            )
-        total_unit_cost = sum(Decimal(str(c['value'])) for c in costs)
-        self._update_product_stock_and_price(product, qty, total_unit_cost)
-        return Response({'status': 'ok', 'refinement_code': ref_code})
+
+        # Toda a validação acontece antes de qualquer gravação
+        product_ids = {
+            int(entry['product_id']) for entry in entries
+            if isinstance(entry, dict) and str(entry.get('product_id', '')).isdigit()
+        }
+        products = Product.objects.in_bulk(product_ids)
+        errors = []
+        parsed = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                errors.append({'index': index, 'error': 'Entrada inválida', 'status': 400})
+                continue
+            product_id = entry.get('product_id')
+            quantity = entry.get('quantity')
+            costs = entry.get('costs', [])
+            if not product_id or not entry.get('date') or not quantity or not costs:
+                errors.append({'index': index, 'error': 'Campos obrigatórios faltando', 'status': 400})
+                continue
+            if not str(product_id).isdigit():
+                errors.append({'index': index, 'error': 'product_id inválido', 'status': 400})
+                continue
+            try:
+                date = parse_date(str(entry['date']))
+            except ValueError:
+                date = None
+            if date is None:
+                errors.append({'index': index, 'error': 'Data inválida (use AAAA-MM-DD)', 'status': 400})
+                continue
+            try:
+                qty = Decimal(str(quantity))
+                if not qty.is_finite() or qty <= 0:
+                    raise InvalidOperation
+            except InvalidOperation:
+                errors.append({'index': index, 'error': 'Quantidade deve ser maior que zero', 'status': 400})
+                continue
+            try:
+                if not isinstance(costs, list):
+                    raise TypeError
+                values = [(cost['cost_type'], Decimal(str(cost['value']))) for cost in costs]
+                if not all(value.is_finite() for _, value in values):
+                    raise InvalidOperation
+            except (KeyError, TypeError, InvalidOperation):
+                errors.append({'index': index, 'error': 'Custos inválidos', 'status': 400})
+                continue
+            product = products.get(int(product_id))
+            if product is None:
+                errors.append({'index': index, 'error': 'Produto não encontrado', 'status': 404})
+                continue
+            parsed.append((product, date, qty, values, entry.get('notes', '')))
+
+        if errors:
+            if single:
+                return Response({'error': errors[0]['error']}, status=errors[0]['status'])
+            return Response({'errors': errors}, status=400)
+
+        with transaction.atomic():
+            # Códigos de refinamento reservados de uma vez: sem colisão entre
+            # requisições simultâneas (7 dígitos, distintos do formato antigo)
+            numbers = Sequence.allocate('production_entry', len(parsed))
+            rows = []
+            ref_codes = []
+            entries_by_main = []
+            for number, (product, date, qty, values, notes) in zip(numbers, parsed):
+                ref_code = f'PROD-{product.code}-{number:07d}'
+                ref_codes.append(ref_code)
+                for i, (cost_type, value) in enumerate(values):
+                    rows.append(ProductionCost(
+                        product=product,
+                        cost_type=cost_type,
+                        value=value,
+                        date=date,
+                        quantity=qty if i == 0 else None,
+                        refinement_code=ref_code,
+                        refinement_name=ref_code,
+                        notes=notes if notes and i == 0 else None,
+                        cost_category='production',
+                        description='',
+                    ))
+                entries_by_main.append((rows[-len(values)], qty))
+                # bulk_create não dispara sinais: a valoração é marcada aqui
+                valuation.mark_dirty(product.id, date)
+            ProductionCost.objects.bulk_create(rows, batch_size=500)
+
+            # Entradas no razão de estoque (um UPDATE de estoque por produto);
+            # o preço médio é recalculado pelo motor de valoração no commit
+            stock.record_movements([
+                stock.production_movement(main, qty) for main, qty in entries_by_main
+            ])
+
+        if single:
+            return Response({'status': 'ok', 'refinement_code': ref_codes[0]})
+        return Response({'status': 'ok', 'refinement_codes': ref_codes, 'cost_rows': len(rows)})
 
     @action(detail=False, methods=['post'])
     def delete_production_group(self, request):
@@ -212,18 +366,16 @@ class ProductionCostViewSet(viewsets.ModelViewSet):
         Exclui todos os custos de um grupo de produção e reverte o estoque.
         Payload: {refinement_code}
         """
-        from decimal import Decimal
         ref_code = request.data.get('refinement_code')
         if not ref_code:
             return Response({'error': 'refinement_code obrigatório'}, status=400)
         costs = ProductionCost.objects.filter(refinement_code=ref_code, cost_category='production')
-        main = costs.filter(quantity__isnull=False).select_related('product').first()
-        if main and main.quantity:
-            product = main.product
-            qty = Decimal(str(main.quantity))
-            product.current_stock = max(Decimal('0'), product.current_stock - qty)
-            product.save(update_fields=['current_stock'])
-        costs.delete()
+        with transaction.atomic():
+            main = costs.filter(quantity__isnull=False).first()
+            if main and main.quantity:
+                stock.record_movements([stock.production_movement(main, main.quantity, reverse=True)])
+            # A exclusão dispara o reprocessamento da valoração (preço revertido)
+            costs.delete()
         return Response({'status': 'ok'})
     
     @action(detail=False, methods=['get'])
@@ -242,6 +394,13 @@ class ProductionCostViewSet(viewsets.ModelViewSet):
         if not include_locked:
             queryset = queryset.filter(is_locked=False)
         
+        # Operadores com a mesma tela aberta esperam um único agrupamento
+        key = singleflight.make_key('refinements', {
+            **dict(request.query_params.lists()), 'replica': routers.reading_from_replica(),
+        })
+        return Response(singleflight.do(key, lambda: self.group_refinements(queryset)))
+
+    def group_refinements(self, queryset):
         # Agrupa por refinement_code
         refinements = {}
         for cost in queryset.filter(refinement_code__isnull=False).select_related('product', 'locked_by_sale'):
@@ -272,15 +431,20 @@ class ProductionCostViewSet(viewsets.ModelViewSet):
             })
             refinements[code]['total'] += float(cost.value)
         
-        return Response(list(refinements.values()))
+        return list(refinements.values())
 
 
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(
+    IdempotencyMixin, SparseFieldsetMixin, FastListMixin, DeltaSyncMixin, OptimisticLockMixin, viewsets.ModelViewSet
+):
+    replica_actions = ('list', 'recent')
+    idempotent_actions = ('create',)
     queryset = Sale.objects.select_related('customer').prefetch_related('items__product').all()
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['sale_number', 'customer__name']
-    ordering_fields = ['sale_date', 'final_amount', 'created_at']
+    ordering_fields = ['sale_date', 'final_amount', 'total_profit', 'total_cost', 'created_at']
     ordering = ['-sale_date', '-created_at']
+    expandable_fields = ('items',)
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -298,19 +462,66 @@ class SaleViewSet(viewsets.ModelViewSet):
         if customer:
             queryset = queryset.filter(customer_id=customer)
         
+        profit_min = self.request.query_params.get('profit_min', None)
+        if profit_min:
+            queryset = queryset.filter(total_profit__gte=profit_min)
+        
+        profit_max = self.request.query_params.get('profit_max', None)
+        if profit_max:
+            queryset = queryset.filter(total_profit__lte=profit_max)
+        
+        # Mês da venda (AAAA-MM): limita o período de listagens com ?expand=items
+        month = self.request.query_params.get('month', None)
+        if month:
+            try:
+                year, month_number = (int(part) for part in month.split('-'))
+            except ValueError:
+                raise ValidationError({'month': 'Informe o mês no formato AAAA-MM.'})
+            queryset = queryset.filter(sale_date__year=year, sale_date__month=month_number)
+        
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        """
+        Sem ?expand=items a listagem usa o caminho compacto: linhas de
+        `.values_list()` sem prefetch de itens (nem cost_snapshot)
+        """
+        if 'items' not in self.get_expand():
+            response = self.fast_list(
+                self.filter_queryset(self.get_queryset()), self._compact_serializer()
+            )
+            if response is not None:
+                return response
+        return super().list(request, *args, **kwargs)
+    
+    def _compact_serializer(self):
+        return SaleListSerializer(fields=self.get_sparse_fields())
+    
+    def get_conflict_serializer(self, instance):
+        return SaleSerializer(instance, context=self.get_serializer_context())
+    
+    def get_sync_serializer(self):
+        if 'items' in self.get_expand():
+            return self.get_serializer()
+        return self._compact_serializer()
+    
     @action(detail=False, methods=['get'])
     def recent(self, request):
-        sales = self.get_queryset()[:10]
-        serializer = self.get_serializer(sales, many=True)
-        return Response(serializer.data)
+        plan = None
+        if 'items' not in self.get_expand():
+            plan = self.get_row_plan(self._compact_serializer())
+        if plan is None:
+            sales = self.get_queryset()[:10]
+            serializer = self.get_serializer(sales, many=True)
+            return Response(serializer.data)
+        rows = self.get_queryset().prefetch_related(None).values_list(*plan.columns)[:10]
+        return Response([plan.build(row) for row in rows])
     
     @action(detail=False, methods=['get'])
     def next_number(self, request):
         """Gera o próximo número de venda sequencial"""
-        # Busca a última venda criada
-        last_sale = Sale.objects.order_by('-id').first()
+        # Busca a última venda criada (incluindo as arquivadas)
+        last_sale = SaleHistory.objects.order_by('-id').first()
         
         if last_sale and last_sale.sale_number.isdigit():
             # Se o último número é numérico, incrementa
@@ -324,36 +535,42 @@ class SaleViewSet(viewsets.ModelViewSet):
         
         return Response({'next_number': next_sale_number})
     
+    @action(detail=False, methods=['post'])
+    def transition(self, request):
+        """
+        Muda o status de várias vendas de uma vez.
+        Body: {"ids": [1, 2, 3], "status": "liquidado"}
+        """
+        ids = request.data.get('ids')
+        target = request.data.get('status')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({'error': 'Informe a lista de ids das vendas'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = transitions.transition_sales(ids, target)
+        except transitions.TransitionError as e:
+            return Response({'error': str(e), 'rejected': e.rejected}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'status': target, **result})
+    
     def perform_destroy(self, instance):
-        for item in instance.items.all():
-            product = item.product
-            product.current_stock = float(product.current_stock) + float(item.quantity)
-            product.save()
-        instance.delete()
+        with transaction.atomic():
+            # Estorno dos itens no razão de estoque
+            stock.record_movements(stock.sale_movements(instance, instance.items.all(), reverse=True))
+            instance.delete()
 
     @action(detail=False, methods=['post'])
     def recalculate_profits(self, request):
-        """Recalcula o lucro de todos os itens de venda"""
-        items = SaleItem.objects.all()
-        total_items = items.count()
-        
-        updated = 0
-        for item in items:
-            old_profit = item.profit
-            # Força o recálculo chamando save()
-            item.save()
-            
-            if old_profit != item.profit:
-                updated += 1
-        
+        """Enfileira o recálculo do lucro de todos os itens de venda"""
+        job = jobs.enqueue('recalculate_profits')
         return Response({
-            'message': f'Lucros recalculados com sucesso!',
-            'total_items': total_items,
-            'updated_items': updated
-        })
+            'message': 'Recálculo de lucros enfileirado',
+            'job_id': job.id,
+            'status_url': request.build_absolute_uri(f'/api/jobs/{job.id}/'),
+        }, status=status.HTTP_202_ACCEPTED)
 
 
-class StockMovementViewSet(viewsets.ModelViewSet):
+class StockMovementViewSet(IdempotencyMixin, SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
+    replica_actions = ('list', 'recent')
+    idempotent_actions = ('create',)
     queryset = StockMovement.objects.select_related('product').all()
     serializer_class = StockMovementSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -381,7 +598,7 @@ class StockMovementViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(SparseFieldsetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -399,89 +616,150 @@ class CompanyViewSet(viewsets.ModelViewSet):
         return queryset
 
 
+class JobViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    # O andamento das tarefas é acompanhado logo após enfileirar: sempre no primário
+    replica_actions = ()
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['created_at', 'status']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        status_param = self.request.query_params.get('status', None)
+        if status_param:
+            queryset = queryset.filter(status=status_param)
+        
+        name = self.request.query_params.get('name', None)
+        if name:
+            queryset = queryset.filter(name=name)
+        
+        return queryset
+
+    def create(self, request):
+        """
+        Enfileira uma tarefa registrada.
+        Payload: {name, payload: {...}}
+        """
+        name = request.data.get('name')
+        payload = request.data.get('payload')
+        if payload is None:
+            payload = {}
+        if name not in jobs.JOB_HANDLERS:
+            return Response(
+                {'error': f'Tarefa desconhecida: {name}', 'available': sorted(jobs.JOB_HANDLERS)},
+                status=400
+            )
+        try:
+            jobs.validate_payload(name, payload)
+        except ValueError as e:
+            return Response(
+                {'error': str(e), 'allowed': sorted(jobs.JOB_PAYLOADS[name])},
+                status=400
+            )
+        job = jobs.enqueue(name, **payload)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@replica_reads
 @api_view(['GET'])
 def dashboard_view(request):
     """
     Endpoint para retornar dados do dashboard
     Aceita parâmetros opcionais: month (1-12) e year (YYYY)
+
+    As contagens, listas e somas são independentes e rodam em paralelo (veja
+    inventory/parallel.py). Requisições simultâneas com o mesmo mês/ano
+    esperam um único cálculo (veja inventory/singleflight.py)
     """
     from datetime import datetime
-    from django.db.models import Sum
     
     try:
-        total_products = Product.objects.count()
-        total_customers = Customer.objects.filter(active=True).count()
-        total_suppliers = Supplier.objects.filter(active=True).count()
-        
-        low_stock_products = Product.objects.filter(
-            current_stock__lt=F('min_stock')
-        ).select_related('category')[:10]
-        
-        recent_sales = Sale.objects.select_related('customer')[:5]
-        
         # Obter mês e ano dos parâmetros ou usar mês/ano atual
         now = datetime.now()
         month = int(request.query_params.get('month', now.month))
         year = int(request.query_params.get('year', now.year))
         
-        # Lucro total das vendas do mês (TODAS as vendas, independente do status)
-        monthly_profit = SaleItem.objects.filter(
-            sale__sale_date__month=month,
-            sale__sale_date__year=year
-        ).aggregate(total=Sum('profit'))['total'] or 0
-        
-        # Total de despesas do mês (active = True)
-        try:
-            monthly_expenses = Expense.objects.filter(
-                date__month=month,
-                date__year=year,
-                active=True
-            ).aggregate(total=Sum('amount'))['total'] or 0
-        except Exception as e:
-            print(f"Erro ao buscar despesas: {e}")
-            monthly_expenses = 0
-        
-        # Resultado = Lucro - Despesas
-        monthly_result = float(monthly_profit) - float(monthly_expenses)
-        
-        # Resultado Acumulado (de janeiro até o mês selecionado)
-        cumulative_profit = SaleItem.objects.filter(
-            sale__sale_date__month__lte=month,
-            sale__sale_date__year=year
-        ).aggregate(total=Sum('profit'))['total'] or 0
-        
-        try:
-            cumulative_expenses = Expense.objects.filter(
-                date__month__lte=month,
-                date__year=year,
-                active=True
-            ).aggregate(total=Sum('amount'))['total'] or 0
-        except Exception as e:
-            print(f"Erro ao buscar despesas acumuladas: {e}")
-            cumulative_expenses = 0
-        
-        cumulative_result = float(cumulative_profit) - float(cumulative_expenses)
-        
-        data = {
-            'totalProducts': total_products,
-            'totalCustomers': total_customers,
-            'totalSuppliers': total_suppliers,
-            'lowStockProducts': ProductSerializer(low_stock_products, many=True).data,
-            'recentSales': SaleSerializer(recent_sales, many=True).data,
-            'monthlyResult': monthly_result,
-            'monthlyProfit': float(monthly_profit),
-            'monthlyExpenses': float(monthly_expenses),
-            'cumulativeResult': cumulative_result,
-            'selectedMonth': month,
-            'selectedYear': year,
-        }
-        
-        return Response(data)
+        # Quem lê do primário (acabou de gravar) não recebe o resultado da réplica
+        key = singleflight.make_key('dashboard', {
+            'month': month, 'year': year, 'replica': routers.reading_from_replica(),
+        })
+        return Response(singleflight.do(key, lambda: dashboard_data(month, year)))
     except Exception as e:
-        print(f"Erro no dashboard_view: {e}")
-        import traceback
-        traceback.print_exc()
-        return Response(
-            {'error': str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        logger.exception('Erro no dashboard_view')
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def dashboard_data(month, year):
+    from django.db.models import Sum
+
+    # Vendas do mês (TODAS as vendas, independente do status) e de janeiro até o mês
+    month_sales = SaleHistory.objects.filter(sale_date__month=month, sale_date__year=year)
+    year_sales = SaleHistory.objects.filter(sale_date__month__lte=month, sale_date__year=year)
+    # Despesas ativas do mês e acumuladas
+    month_expenses = Expense.objects.filter(date__month=month, date__year=year, active=True)
+    year_expenses = Expense.objects.filter(date__month__lte=month, date__year=year, active=True)
+    
+    results = parallel.gather_sync(
+        total_products=Product.objects.count,
+        total_customers=Customer.objects.filter(active=True).count,
+        total_suppliers=Supplier.objects.filter(active=True).count,
+        low_stock_products=lambda: ProductSerializer(
+            Product.objects.filter(current_stock__lt=F('min_stock')).select_related('category')[:10],
+            many=True,
+        ).data,
+        recent_sales=lambda: SaleSerializer(Sale.objects.select_related('customer')[:5], many=True).data,
+        monthly_profit=lambda: month_sales.aggregate(total=Sum('total_profit'))['total'] or 0,
+        monthly_expenses=lambda: month_expenses.aggregate(total=Sum('amount'))['total'] or 0,
+        cumulative_profit=lambda: year_sales.aggregate(total=Sum('total_profit'))['total'] or 0,
+        cumulative_expenses=lambda: year_expenses.aggregate(total=Sum('amount'))['total'] or 0,
+    )
+    
+    # Resultado = Lucro - Despesas
+    monthly_result = float(results['monthly_profit']) - float(results['monthly_expenses'])
+    cumulative_result = float(results['cumulative_profit']) - float(results['cumulative_expenses'])
+    
+    return {
+        'totalProducts': results['total_products'],
+        'totalCustomers': results['total_customers'],
+        'totalSuppliers': results['total_suppliers'],
+        'lowStockProducts': results['low_stock_products'],
+        'recentSales': results['recent_sales'],
+        'monthlyResult': monthly_result,
+        'monthlyProfit': float(results['monthly_profit']),
+        'monthlyExpenses': float(results['monthly_expenses']),
+        'cumulativeResult': cumulative_result,
+        'selectedMonth': month,
+        'selectedYear': year,
+    }
+
+
+@api_view(['POST'])
+def batch_view(request):
+    """
+    Executa várias leituras numa única requisição.
+    Corpo: {"requests": [{"id": "produtos", "path": "/products/?active=true"}, ...],
+            "parallel": false}
+    Retorna {"responses": [{"id", "status", "body"}, ...]} na mesma ordem.
+    """
+    try:
+        responses = batch.run_batch(
+            request._request,
+            request.data.get('requests'),
+            parallel=bool(request.data.get('parallel', False)),
         )
+    except batch.BatchError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'responses': responses})
+
+
+def serve_immutable_media(request, path):
+    """
+    Serve arquivos de mídia com hash do conteúdo no nome (variantes do logo):
+    o conteúdo de uma URL nunca muda, então o cache pode ser permanente
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    return response
@@ -1,10 +1,28 @@
 """
 Script para migrar dados do SQLite para PostgreSQL (Supabase)
 Execute este script após configurar o DATABASE_URL no arquivo .env
+
+Cada tabela é lida do SQLite em blocos por chave primária e enviada ao
+PostgreSQL com um único COPY em streaming, portanto o uso de memória fica
+limitado ao tamanho do bloco. Tabelas sem dependência entre si são copiadas
+em paralelo; como o COPY não passa pelo ORM, nenhum save() ou sinal
+(post_save/post_delete) é disparado durante a carga.
+
+Uso:
+    python migrate_to_postgres.py [--sqlite db.sqlite3] [--workers 4]
+                                  [--chunk-size 5000] [--skip-verify]
 """
 
+import argparse
+import hashlib
+import json
 import os
+import sqlite3
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
 import django
 
 # Configurar Django
@@ -12,58 +30,304 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 sys.path.insert(0, os.path.dirname(__file__))
 django.setup()
 
+from django.apps import apps
 from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, connections, models, transaction
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), 'db.sqlite3')
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def get_models_to_copy():
+    """Todos os models concretos, incluindo as tabelas M2M geradas automaticamente"""
+    return [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+
+
+def build_levels(model_list):
+    """
+    Agrupa os models em níveis de dependência (chaves estrangeiras).
+    Os models de um mesmo nível não dependem entre si e podem ser copiados
+    em paralelo; um nível só começa depois que o anterior foi confirmado.
+    """
+    pending = {
+        model: {
+            field.related_model for field in model._meta.local_concrete_fields
+            if field.is_relation and field.related_model not in (None, model)
+            and field.related_model in model_list
+        }
+        for model in model_list
+    }
+    levels = []
+    done = set()
+    while pending:
+        ready = [model for model, deps in pending.items() if deps <= done]
+        if not ready:
+            # Dependência circular: copia o restante numa única transação,
+            # onde as constraints DEFERRABLE são validadas só no commit
+            levels.append([list(pending)])
+            break
+        levels.append([[model] for model in ready])
+        done.update(ready)
+        for model in ready:
+            del pending[model]
+    return levels
+
+
+def to_text(field, value):
+    """
+    Converte um valor (vindo do SQLite ou do PostgreSQL) para a representação
+    textual canônica usada tanto no COPY quanto no checksum.
+    """
+    if value is None:
+        return None
+    if isinstance(field, models.JSONField):
+        if isinstance(value, str):
+            value = json.loads(value)
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+    if isinstance(field, models.BooleanField):
+        return 't' if field.to_python(value) else 'f'
+    if isinstance(field, models.DecimalField):
+        value = field.to_python(value)
+        return str(value.quantize(Decimal(1).scaleb(-field.decimal_places)))
+    if isinstance(field, (models.DateTimeField, models.DateField, models.TimeField, models.UUIDField)):
+        return str(field.to_python(value))
+    if isinstance(value, (bytes, memoryview)):
+        return '\\x' + bytes(value).hex()
+    return str(value)
+
+
+def row_digest(values):
+    return int.from_bytes(
+        hashlib.sha256('\x1f'.join('\\N' if v is None else v for v in values).encode()).digest()[:16],
+        'big',
+    )
+
+
+class TableCopy:
+    """Copia uma tabela do SQLite para o PostgreSQL em streaming"""
+
+    def __init__(self, model, sqlite_path, chunk_size):
+        self.model = model
+        self.sqlite_path = sqlite_path
+        self.chunk_size = chunk_size
+        self.fields = list(model._meta.local_concrete_fields)
+        self.table = model._meta.db_table
+        self.pk_column = model._meta.pk.column
+        self.rows = 0
+        # Soma dos hashes das linhas: independe da ordem de leitura
+        self.checksum = 0
+
+    def iter_source_rows(self):
+        columns = ', '.join(f'"{f.column}"' for f in self.fields)
+        pk_index = [f.column for f in self.fields].index(self.pk_column)
+        source = sqlite3.connect(f'file:{self.sqlite_path}?mode=ro', uri=True)
+        try:
+            last_pk = None
+            while True:
+                if last_pk is None:
+                    sql = f'SELECT {columns} FROM "{self.table}" ORDER BY "{self.pk_column}" LIMIT ?'
+                    params = (self.chunk_size,)
+                else:
+                    sql = (
+                        f'SELECT {columns} FROM "{self.table}" WHERE "{self.pk_column}" > ? '
+                        f'ORDER BY "{self.pk_column}" LIMIT ?'
+                    )
+                    params = (last_pk, self.chunk_size)
+                chunk = source.execute(sql, params).fetchall()
+                if not chunk:
+                    break
+                yield from chunk
+                last_pk = chunk[-1][pk_index]
+        finally:
+            source.close()
+
+    def iter_copy_lines(self):
+        for row in self.iter_source_rows():
+            values = [to_text(field, value) for field, value in zip(self.fields, row)]
+            self.rows += 1
+            self.checksum += row_digest(values)
+            yield '\t'.join(
+                '\\N' if v is None else v.translate(COPY_ESCAPES) for v in values
+            ) + '\n'
+
+    def source_exists(self):
+        source = sqlite3.connect(f'file:{self.sqlite_path}?mode=ro', uri=True)
+        try:
+            return source.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+            ).fetchone() is not None
+        finally:
+            source.close()
+
+    def load(self):
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in self.fields)
+        sql = f'COPY {connection.ops.quote_name(self.table)} ({columns}) FROM STDIN'
+        with connections['default'].cursor() as cursor:
+            cursor.copy_expert(sql, LineStream(self.iter_copy_lines()))
+
+    def verify(self):
+        """Relê a tabela no PostgreSQL e compara contagem e checksum"""
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(f.column) for f in self.fields)
+        rows = 0
+        checksum = 0
+        target = connections['default']
+        with transaction.atomic(), target.chunked_cursor() as cursor:
+            cursor.execute(f'SELECT {columns} FROM {quote(self.table)}')
+            while True:
+                chunk = cursor.fetchmany(self.chunk_size)
+                if not chunk:
+                    break
+                for row in chunk:
+                    rows += 1
+                    checksum += row_digest(
+                        [to_text(field, value) for field, value in zip(self.fields, row)]
+                    )
+        return rows == self.rows and checksum == self.checksum, rows
+
 
-def migrate_data():
+class LineStream:
+    """Objeto file-like que alimenta o COPY a partir de um gerador de linhas"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.lines)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self.buffer = self.buffer, ''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def copy_group(copies):
+    """Copia um grupo de tabelas numa única transação (executado em uma thread)"""
+    try:
+        started = time.monotonic()
+        with transaction.atomic():
+            for table_copy in copies:
+                table_copy.load()
+        elapsed = time.monotonic() - started
+        for table_copy in copies:
+            print(f"  ✓ {table_copy.table}: {table_copy.rows} linhas ({elapsed:.1f}s)")
+    finally:
+        connections.close_all()
+
+
+def verify_copy(table_copy):
+    try:
+        return table_copy, *table_copy.verify()
+    finally:
+        connections.close_all()
+
+
+def migrate_data(sqlite_path=DEFAULT_SQLITE_PATH, workers=4, chunk_size=5000, verify=True):
     print("=" * 60)
     print("MIGRAÇÃO DE DADOS: SQLite → PostgreSQL (Supabase)")
     print("=" * 60)
-    
+
+    if connection.vendor != 'postgresql':
+        raise RuntimeError('DATABASE_URL deve apontar para um banco PostgreSQL')
+
     # 1. Criar tabelas no PostgreSQL
-    print("\n[1/3] Criando tabelas no PostgreSQL...")
+    print("\n[1/4] Criando tabelas no PostgreSQL...")
     call_command('migrate', '--run-syncdb')
     print("✓ Tabelas criadas com sucesso!")
-    
-    # 2. Exportar dados do SQLite
-    print("\n[2/3] Exportando dados do SQLite...")
-    
+
     # Verificar se existe db.sqlite3
-    sqlite_path = os.path.join(os.path.dirname(__file__), 'db.sqlite3')
     if not os.path.exists(sqlite_path):
         print("⚠ Arquivo db.sqlite3 não encontrado. Pulando exportação de dados.")
         print("✓ Banco PostgreSQL está pronto para uso!")
         return
-    
-    # Fazer backup dos dados
-    backup_file = 'data_backup.json'
-    call_command('dumpdata', 
-                 '--natural-foreign', 
-                 '--natural-primary',
-                 '--exclude=contenttypes',
-                 '--exclude=auth.permission',
-                 '--indent=2',
-                 output=backup_file)
-    print(f"✓ Dados exportados para {backup_file}")
-    
-    # 3. Importar dados no PostgreSQL
-    print("\n[3/3] Importando dados no PostgreSQL...")
-    call_command('loaddata', backup_file)
-    print("✓ Dados importados com sucesso!")
-    
-    # Limpar arquivo de backup
-    if os.path.exists(backup_file):
-        os.remove(backup_file)
-        print(f"✓ Arquivo temporário {backup_file} removido")
-    
+
+    # 2. Copiar dados em streaming
+    print(f"\n[2/4] Copiando dados do SQLite ({workers} workers, blocos de {chunk_size})...")
+    model_list = get_models_to_copy()
+    copies = {model: TableCopy(model, sqlite_path, chunk_size) for model in model_list}
+    missing = [c.table for c in copies.values() if not c.source_exists()]
+    for table in missing:
+        print(f"  ⚠ Tabela {table} não existe no SQLite, ignorada")
+    model_list = [m for m in model_list if copies[m].table not in missing]
+
+    # Remove os dados criados pelo migrate (contenttypes, permissões) para
+    # preservar os ids originais do SQLite
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in connection.ops.sql_flush(
+            no_style(), [copies[m].table for m in model_list], allow_cascade=True
+        ):
+            cursor.execute(sql)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for level in build_levels(model_list):
+            groups = [[copies[model] for model in group] for group in level]
+            list(executor.map(copy_group, groups))
+    total_rows = sum(copies[m].rows for m in model_list)
+    print(f"✓ {total_rows} linhas copiadas em {time.monotonic() - started:.1f}s")
+
+    # 3. Ajustar sequências
+    print("\n[3/4] Ajustando sequências...")
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), model_list):
+            cursor.execute(sql)
+    print("✓ Sequências ajustadas!")
+
+    # 4. Verificar contagens e checksums
+    if not verify:
+        print("\n[4/4] Verificação ignorada (--skip-verify)")
+    else:
+        print("\n[4/4] Verificando contagens e checksums...")
+        failures = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for table_copy, ok, target_rows in executor.map(
+                verify_copy, [copies[m] for m in model_list]
+            ):
+                if not ok:
+                    failures.append(table_copy.table)
+                    print(
+                        f"  ✗ {table_copy.table}: origem {table_copy.rows} linhas, "
+                        f"destino {target_rows} linhas (checksum divergente)"
+                    )
+        if failures:
+            raise RuntimeError(f"Divergência nas tabelas: {', '.join(failures)}")
+        print("✓ Contagens e checksums conferem!")
+
     print("\n" + "=" * 60)
     print("✓ MIGRAÇÃO CONCLUÍDA COM SUCESSO!")
     print("=" * 60)
     print("\nSeus dados agora estão no Supabase.")
     print("Você pode deletar o arquivo db.sqlite3 se quiser.")
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Migra os dados do SQLite para o PostgreSQL')
+    parser.add_argument('--sqlite', default=DEFAULT_SQLITE_PATH, help='Caminho do arquivo SQLite')
+    parser.add_argument('--workers', type=int, default=4, help='Tabelas copiadas em paralelo')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Linhas lidas por bloco')
+    parser.add_argument('--skip-verify', action='store_true', help='Não confere contagens e checksums')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
     try:
-        migrate_data()
+        migrate_data(
+            sqlite_path=args.sqlite,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            verify=not args.skip_verify,
+        )
     except Exception as e:
         print(f"\n✗ Erro durante a migração: {e}")
         print("\nVerifique se:")
@@ -33,7 +33,9 @@ export function CompanyForm({ company, onSave, onCancel }: CompanyFormProps) {
     active: company?.active ?? true,
   })
   const [logoFile, setLogoFile] = useState<File | null>(null)
-  const [logoPreview, setLogoPreview] = useState<string | null>(company?.logo_url || null)
+  const [logoPreview, setLogoPreview] = useState<string | null>(
+    company?.logo_variants?.retina || company?.logo_url || null
+  )
   const [loadingCep, setLoadingCep] = useState(false)
   const [saving, setSaving] = useState(false)
 
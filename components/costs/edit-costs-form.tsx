@@ -4,7 +4,7 @@ import { useState } from "react"
 import { ErpWindow } from "@/components/erp/window"
 import { FieldGroup, FormField } from "@/components/erp/field-group"
 import type { ProductionCost, Customer, Product } from "@/lib/types"
-import { costsApi } from "@/lib/api"
+import { costsApi, isConflict } from "@/lib/api"
 
 
 interface EditCostsFormProps {
@@ -116,13 +116,17 @@ export function EditCostsForm({ costs, customers, products, onSave, onCancel }:
           value: Number(cost.value),
           cost_type: cost.cost_type,
           description: cost.description,
-        })
+        }, originalCost.version)
       }
       alert('Custos atualizados com sucesso!')
       onSave()
     } catch (error) {
       console.error('Erro ao atualizar custos:', error)
-      alert('Erro ao atualizar custos')
+      if (isConflict(error)) {
+        alert('Um dos custos foi alterado por outro usuário. Feche e abra novamente para ver a versão atual.')
+      } else {
+        alert('Erro ao atualizar custos')
+      }
     }
   }
 
@@ -6,7 +6,7 @@ import { useState } from "react"
 import { ErpWindow } from "@/components/erp/window"
 import { FieldGroup, FormField } from "@/components/erp/field-group"
 import type { Product, Category } from "@/lib/types"
-import { productsApi } from "@/lib/api"
+import { isConflict, productsApi } from "@/lib/api"
 
 interface ProductFormProps {
   product: Product | null
@@ -35,31 +35,61 @@ export function ProductForm({ product, categories, onSave, onCancel }: ProductFo
     active: product?.active ?? true,
   })
   const [saving, setSaving] = useState(false)
+  const [version, setVersion] = useState(product?.version)
+
+  // Edição: o estoque só muda por ajuste de inventário (fica no razão)
+  const handleAdjustStock = async () => {
+    if (!product) return
+    const counted = prompt("Quantidade contada em estoque:", String(formData.current_stock || 0))
+    if (counted === null) return
+    const quantity = Number(counted.replace(",", "."))
+    if (counted.trim() === "" || isNaN(quantity) || quantity < 0) {
+      alert("Informe uma quantidade válida")
+      return
+    }
+    try {
+      const updated = await productsApi.adjustStock(product.id, quantity, "Ajuste pelo cadastro de produtos", version)
+      setFormData({ ...formData, current_stock: updated.current_stock })
+      setVersion(updated.version)
+    } catch (error) {
+      console.error("Erro ao ajustar estoque:", error)
+      if (isConflict(error)) {
+        alert("Este produto foi alterado por outro usuário. Feche e abra novamente para ver a versão atual.")
+      } else {
+        alert("Erro ao ajustar estoque")
+      }
+    }
+  }
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     setSaving(true)
 
     try {
+      const { current_stock, ...fields } = formData
       const data = {
-        ...formData,
+        ...fields,
         category: formData.category || null,
         purchase_price: Number(formData.purchase_price),
-        current_stock: formData.current_stock === "" ? 0 : Number(formData.current_stock),
         min_stock: formData.min_stock === "" ? 0 : Number(formData.min_stock),
         max_stock: formData.max_stock === "" ? 0 : Number(formData.max_stock),
       }
 
       if (product) {
-        await productsApi.update(product.id, data)
+        await productsApi.update(product.id, data, version)
       } else {
-        await productsApi.create(data)
+        // Estoque inicial: registrado como ajuste no razão pelo backend
+        await productsApi.create({ ...data, current_stock: current_stock === "" ? 0 : Number(current_stock) })
       }
 
       onSave()
     } catch (error) {
       console.error("Erro ao salvar produto:", error)
-      alert("Erro ao salvar produto")
+      if (isConflict(error)) {
+        alert("Este produto foi alterado por outro usuário. Feche e abra novamente para ver a versão atual.")
+      } else {
+        alert("Erro ao salvar produto")
+      }
     } finally {
       setSaving(false)
     }
@@ -142,14 +172,20 @@ export function ProductForm({ product, categories, onSave, onCancel }: ProductFo
                   placeholder="R$ 0,00"
                 />
               </FormField>
-              <FormField label="Estoque Atual:" inline>
+              <FormField label={product ? "Estoque Atual:" : "Estoque Inicial:"} inline>
                 <input
                   type="number"
                   className="erp-input w-20 text-right"
                   value={formData.current_stock}
                   onChange={(e) => setFormData({ ...formData, current_stock: e.target.value })}
                   placeholder="0"
+                  disabled={!!product}
                 />
+                {product && (
+                  <button type="button" className="erp-button !min-w-0 !px-2" onClick={handleAdjustStock}>
+                    Ajustar
+                  </button>
+                )}
               </FormField>
               <FormField label="Estoque Mín.:" inline>
                 <input
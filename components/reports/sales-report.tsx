@@ -66,7 +66,8 @@ export function SalesReport() {
   const loadSales = async () => {
     try {
       setLoading(true)
-      const data = await salesApi.getAll()
+      // Relatório por item: a única tela que precisa dos itens de todas as vendas
+      const data = await salesApi.getAll({ expand: "items" })
       setSales(Array.isArray(data) ? data : [])
     } catch (error) {
       console.error("Erro ao carregar vendas:", error)
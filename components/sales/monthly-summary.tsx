@@ -5,7 +5,7 @@ import { ErpWindow } from "@/components/erp/window"
 import { DataGrid } from "@/components/erp/data-grid"
 import { StatusBadge } from "@/components/erp/status-badge"
 import type { Sale, Customer } from "@/lib/types"
-import { companyApi, customersApi } from "@/lib/api"
+import { companyApi, customersApi, salesApi } from "@/lib/api"
 import type { Company } from "@/lib/types"
 import { generatePDF } from "@/lib/utils/pdf-generator"
 
@@ -26,11 +26,22 @@ export function MonthlySummary({ sales, selectedSaleId, onSaleSelect }: MonthlyS
   const [selectedStatuses, setSelectedStatuses] = useState<Set<string>>(new Set())
   const [selectedItems, setSelectedItems] = useState<Set<number>>(new Set())
   const [company, setCompany] = useState<Company | null>(null)
+  // A listagem da página é compacta (sem itens): o resumo busca só as vendas
+  // do mês selecionado, com os itens
+  const [monthSales, setMonthSales] = useState<Sale[]>([])
 
   useEffect(() => {
     loadCompany()
   }, [])
 
+  useEffect(() => {
+    let cancelled = false
+    salesApi.getAll({ expand: "items", month: selectedMonth })
+      .then((data) => { if (!cancelled) setMonthSales(data) })
+      .catch((error) => console.error("Erro ao carregar vendas do mês:", error))
+    return () => { cancelled = true }
+  }, [selectedMonth, sales])
+
   const loadCompany = async () => {
     try {
       const companies = await companyApi.getAll()
@@ -179,7 +190,7 @@ export function MonthlySummary({ sales, selectedSaleId, onSaleSelect }: MonthlyS
 
   // Filtra vendas por período e expande os itens
   const monthlyData = useMemo(() => {
-    const filteredSales = sales.filter(sale => {
+    const filteredSales = monthSales.filter(sale => {
       const saleDate = new Date(sale.sale_date)
       const [year, month] = selectedMonth.split('-')
       const saleYear = saleDate.getFullYear()
@@ -256,7 +267,7 @@ export function MonthlySummary({ sales, selectedSaleId, onSaleSelect }: MonthlyS
     }
     
     return { rows, totals, saleMap }
-  }, [sales, selectedMonth, selectedStatuses])
+  }, [monthSales, selectedMonth, selectedStatuses])
 
   const statusOptions = [
     { value: 'disputa', label: 'Disputa' },
@@ -7,7 +7,7 @@ import { ErpWindow } from "@/components/erp/window"
 import { FieldGroup, FormField } from "@/components/erp/field-group"
 import { DataGrid } from "@/components/erp/data-grid"
 import type { Customer, Product, CostRefinement, Sale } from "@/lib/types"
-import { salesApi, productsApi, costsApi } from "@/lib/api"
+import { salesApi, productsApi, costsApi, isConflict } from "@/lib/api"
 
 interface SaleItem {
   product_id: number
@@ -241,7 +241,7 @@ export function SaleForm({ customers, products, sale, onSave, onCancel }: SaleFo
       // Create or update sale
       let createdSale
       if (sale) {
-        createdSale = await salesApi.update(sale.id, saleData)
+        createdSale = await salesApi.update(sale.id, saleData, sale.version)
       } else {
         createdSale = await salesApi.create(saleData)
       }
@@ -291,7 +291,9 @@ export function SaleForm({ customers, products, sale, onSave, onCancel }: SaleFo
       console.error("Erro ao criar venda:", error)
       
       const responseData = error.response?.data
-      if (responseData?.stock) {
+      if (isConflict(error)) {
+        alert("Esta venda foi alterada por outro usuário. Feche e abra novamente para ver a versão atual.")
+      } else if (responseData?.stock) {
         const msgs = Array.isArray(responseData.stock) ? responseData.stock : [responseData.stock]
         alert(msgs.join('\n'))
       } else {
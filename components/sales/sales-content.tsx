@@ -33,9 +33,16 @@ export function SalesContent({ initialSales, customers, products }: SalesContent
     setShowForm(true)
   }
 
-  const handleEdit = () => {
+  const handleEdit = async () => {
     if (selectedSale) {
-      setShowForm(true)
+      try {
+        // A listagem não traz os itens: o formulário usa o detalhe da venda
+        setSelectedSale(await salesApi.getById(selectedSale.id))
+        setShowForm(true)
+      } catch (error) {
+        console.error("Erro ao carregar venda:", error)
+        alert("Erro ao carregar venda")
+      }
     }
   }
 
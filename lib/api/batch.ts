@@ -0,0 +1,40 @@
+import apiClient from "./client"
+
+export interface BatchResponse<T = any> {
+  id: string | number
+  status: number
+  body: T
+}
+
+/**
+ * Executa várias leituras numa única requisição (/api/batch/).
+ * `requests` mapeia um nome para o caminho relativo à API (ex.: "/products/").
+ */
+export async function batchGet<K extends string>(
+  requests: Record<K, string>,
+  options: { parallel?: boolean } = {}
+): Promise<Record<K, BatchResponse>> {
+  const response = await apiClient.post<{ responses: BatchResponse[] }>("/batch/", {
+    requests: Object.entries(requests).map(([id, path]) => ({ id, path })),
+    parallel: options.parallel ?? false,
+  })
+  const result = {} as Record<K, BatchResponse>
+  for (const item of response.data.responses) {
+    if (item.status >= 400) {
+      throw new Error(`Erro ${item.status} em ${requests[item.id as K]}`)
+    }
+    result[item.id as K] = item
+  }
+  return result
+}
+
+/** Extrai a lista de uma resposta paginada, de sincronização ou simples */
+export function listFrom<T>(body: any): T[] {
+  if (body && typeof body === "object" && "results" in body) {
+    return body.results as T[]
+  }
+  if (body && typeof body === "object" && "changed" in body) {
+    return body.changed as T[]
+  }
+  return Array.isArray(body) ? body : []
+}
@@ -15,6 +15,9 @@ const getBaseURL = () => {
 
 const apiClient = axios.create({
   baseURL: getBaseURL(),
+  // Envia os cookies da API (ex.: primary_pin, que mantém a leitura no banco
+  // principal logo após uma gravação)
+  withCredentials: true,
   headers: {
     "Content-Type": "application/json",
   },
@@ -29,16 +32,44 @@ apiClient.interceptors.request.use(
   }
 )
 
+// Tentativas extras de um POST com Idempotency-Key quando a rede falha:
+// o backend devolve a resposta da primeira execução em vez de repetir
+const MAX_IDEMPOTENT_RETRIES = 2
+const RETRYABLE_STATUS = [502, 503, 504]
+
 apiClient.interceptors.response.use(
   (response: AxiosResponse) => {
     return response
   },
-  (error: AxiosError) => {
+  async (error: AxiosError) => {
     if (error.response?.status === 401) {
       console.error("Unauthorized access")
     }
+    const config = error.config as (InternalAxiosRequestConfig & { retries?: number }) | undefined
+    const retryable = !error.response || RETRYABLE_STATUS.includes(error.response.status)
+    if (config?.headers?.["Idempotency-Key"] && retryable && (config.retries ?? 0) < MAX_IDEMPOTENT_RETRIES) {
+      config.retries = (config.retries ?? 0) + 1
+      await new Promise((resolve) => setTimeout(resolve, 500 * config.retries!))
+      return apiClient(config)
+    }
     return Promise.reject(error)
   }
 )
 
+// Controle de concorrência otimista: envia a versão lida no If-Match
+export const ifMatch = (version?: number) =>
+  version === undefined ? {} : { headers: { "If-Match": `"${version}"` } }
+
+// Chave única por operação: as repetições do mesmo POST não criam registros
+// duplicados (crypto.randomUUID só existe em contexto seguro)
+const newIdempotencyKey = () =>
+  typeof crypto !== "undefined" && "randomUUID" in crypto
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+
+export const idempotent = (key: string = newIdempotencyKey()) => ({ headers: { "Idempotency-Key": key } })
+
+// 409: o registro foi alterado por outro usuário depois de carregado
+export const isConflict = (error: any) => error?.response?.status === 409
+
 export default apiClient
@@ -1,4 +1,4 @@
-import apiClient from "./client"
+import apiClient, { idempotent, ifMatch } from "./client"
 import type { ProductionCost, CostRefinement } from "@/lib/types"
 
 export const costsApi = {
@@ -35,10 +35,21 @@ export const costsApi = {
     costs: { cost_type: string; value: number }[]
     notes?: string
   }) => {
-    const response = await apiClient.post('/production-costs/save_production_entry/', data)
+    const response = await apiClient.post('/production-costs/save_production_entry/', data, idempotent())
     return response.data
   },
 
+  saveProductionEntries: async (entries: {
+    product_id: number
+    date: string
+    quantity: number
+    costs: { cost_type: string; value: number }[]
+    notes?: string
+  }[]) => {
+    const response = await apiClient.post('/production-costs/save_production_entry/', { entries }, idempotent())
+    return response.data as { status: string; refinement_codes: string[]; cost_rows: number }
+  },
+
   deleteProductionGroup: async (refinementCode: string) => {
     const response = await apiClient.post('/production-costs/delete_production_group/', { refinement_code: refinementCode })
     return response.data
@@ -49,8 +60,8 @@ export const costsApi = {
     return response.data
   },
 
-  update: async (id: number, data: Partial<ProductionCost>) => {
-    const response = await apiClient.put<ProductionCost>(`/production-costs/${id}/`, data)
+  update: async (id: number, data: Partial<ProductionCost>, version?: number) => {
+    const response = await apiClient.put<ProductionCost>(`/production-costs/${id}/`, data, ifMatch(version))
     return response.data
   },
 
@@ -1,13 +1,10 @@
 import apiClient from "./client"
+import { syncCollection } from "./sync"
 import type { Customer } from "@/lib/types"
 
 export const customersApi = {
   getAll: async () => {
-    const response = await apiClient.get<any>("/customers/")
-    if (response.data && typeof response.data === 'object' && 'results' in response.data) {
-      return response.data.results as Customer[]
-    }
-    return Array.isArray(response.data) ? response.data : []
+    return syncCollection<Customer>("/customers/", (a, b) => a.name.localeCompare(b.name))
   },
 
   getById: async (id: number) => {
@@ -1,4 +1,4 @@
-export { default as apiClient } from "./client"
+export { default as apiClient, isConflict } from "./client"
 export { productsApi } from "./products"
 export { categoriesApi } from "./categories"
 export { customersApi } from "./customers"
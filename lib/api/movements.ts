@@ -1,4 +1,4 @@
-import apiClient from "./client"
+import apiClient, { idempotent } from "./client"
 import type { StockMovement } from "@/lib/types"
 
 export const movementsApi = {
@@ -16,7 +16,7 @@ export const movementsApi = {
   },
 
   create: async (data: Partial<StockMovement>) => {
-    const response = await apiClient.post<StockMovement>("/stock-movements/", data)
+    const response = await apiClient.post<StockMovement>("/stock-movements/", data, idempotent())
     return response.data
   },
 
@@ -1,4 +1,4 @@
-import apiClient from "./client"
+import apiClient, { ifMatch } from "./client"
 import type { Product } from "@/lib/types"
 
 export const productsApi = {
@@ -20,12 +20,32 @@ export const productsApi = {
     return response.data
   },
 
-  update: async (id: number, data: Partial<Product>) => {
-    const response = await apiClient.put<Product>(`/products/${id}/`, data)
+  update: async (id: number, data: Partial<Product>, version?: number) => {
+    const response = await apiClient.put<Product>(`/products/${id}/`, data, ifMatch(version))
     return response.data
   },
 
   delete: async (id: number) => {
     await apiClient.delete(`/products/${id}/`)
   },
+
+  // O estoque não é editável no cadastro: ajustes de inventário ficam no razão
+  adjustStock: async (id: number, quantity: number, notes?: string, version?: number) => {
+    const response = await apiClient.post<Product>(
+      `/products/${id}/adjust_stock/`, { quantity, notes }, ifMatch(version)
+    )
+    return response.data
+  },
+
+  getStockAt: async (date: string, page: number = 1) => {
+    const response = await apiClient.get<any>("/products/stock_at/", { params: { date, page } })
+    return response.data as {
+      date: string
+      count: number
+      next: string | null
+      total_quantity: string
+      total_value: string
+      results: { id: number; code: string; name: string; unit: string; stock_quantity: string; stock_unit_cost: string; stock_value: string }[]
+    }
+  },
 }
@@ -1,9 +1,12 @@
-import apiClient from "./client"
+import apiClient, { idempotent, ifMatch } from "./client"
 import type { Sale } from "@/lib/types"
 
 export const salesApi = {
-  getAll: async () => {
-    const response = await apiClient.get<any>("/sales/")
+  // Sem expand a listagem é compacta (sem itens); os itens de uma venda vêm
+  // de getById. { expand: "items" } só com o período limitado (month: "AAAA-MM")
+  // ou no relatório por item
+  getAll: async (params?: { expand?: string; fields?: string; month?: string }) => {
+    const response = await apiClient.get<any>("/sales/", { params })
     if (response.data && typeof response.data === 'object' && 'results' in response.data) {
       return response.data.results as Sale[]
     }
@@ -16,12 +19,12 @@ export const salesApi = {
   },
 
   create: async (data: Partial<Sale>) => {
-    const response = await apiClient.post<Sale>("/sales/", data)
+    const response = await apiClient.post<Sale>("/sales/", data, idempotent())
     return response.data
   },
 
-  update: async (id: number, data: Partial<Sale>) => {
-    const response = await apiClient.put<Sale>(`/sales/${id}/`, data)
+  update: async (id: number, data: Partial<Sale>, version?: number) => {
+    const response = await apiClient.put<Sale>(`/sales/${id}/`, data, ifMatch(version))
     return response.data
   },
 
@@ -29,6 +32,17 @@ export const salesApi = {
     await apiClient.delete(`/sales/${id}/`)
   },
 
+  // Muda o status de várias vendas de uma vez (tudo ou nada)
+  transition: async (ids: number[], status: string) => {
+    const response = await apiClient.post<{
+      status: string
+      updated: number[]
+      unchanged: number[]
+      locked_costs: number
+    }>("/sales/transition/", { ids, status })
+    return response.data
+  },
+
   getNextNumber: async () => {
     const response = await apiClient.get<{ next_number: string }>("/sales/next_number/")
     return response.data.next_number
@@ -1,13 +1,10 @@
 import apiClient from "./client"
+import { syncCollection } from "./sync"
 import type { Supplier } from "@/lib/types"
 
 export const suppliersApi = {
   getAll: async () => {
-    const response = await apiClient.get<any>("/suppliers/")
-    if (response.data && typeof response.data === 'object' && 'results' in response.data) {
-      return response.data.results as Supplier[]
-    }
-    return Array.isArray(response.data) ? response.data : []
+    return syncCollection<Supplier>("/suppliers/", (a, b) => a.name.localeCompare(b.name))
   },
 
   getById: async (id: number) => {
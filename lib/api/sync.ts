@@ -0,0 +1,45 @@
+import apiClient from "./client"
+
+interface SyncResponse<T> {
+  cursor: string
+  reset: boolean
+  changed: T[]
+  deleted: number[]
+}
+
+interface SyncCache {
+  cursor: string
+  rows: Map<number, any>
+}
+
+// Cache local por recurso; só existe no navegador (no servidor cada
+// chamada busca a lista completa)
+const caches = new Map<string, SyncCache>()
+
+/**
+ * Busca só o que mudou desde a última chamada (/<recurso>/sync/?changed_since=)
+ * e aplica sobre o cache local, retornando a lista completa.
+ */
+export async function syncCollection<T extends { id: number }>(
+  path: string,
+  compare?: (a: T, b: T) => number
+): Promise<T[]> {
+  const inBrowser = typeof window !== "undefined"
+  const cache = inBrowser ? caches.get(path) : undefined
+  const response = await apiClient.get<SyncResponse<T>>(`${path}sync/`, {
+    params: cache ? { changed_since: cache.cursor } : undefined,
+  })
+  const { cursor, reset, changed, deleted } = response.data
+  const rows: Map<number, T> = reset || !cache ? new Map() : cache.rows
+  for (const id of deleted) {
+    rows.delete(id)
+  }
+  for (const row of changed) {
+    rows.set(row.id, row)
+  }
+  if (inBrowser) {
+    caches.set(path, { cursor, rows })
+  }
+  const result = Array.from(rows.values())
+  return compare ? result.sort(compare) : result
+}
@@ -21,6 +21,7 @@ export interface Product {
   location: string | null
   supplier_name?: string | null
   active: boolean
+  version?: number
   created_at: string
   updated_at: string
   category?: Category
@@ -41,6 +42,7 @@ export interface Customer {
   notes: string | null
   active: boolean
   created_at: string
+  updated_at?: string
 }
 
 export interface Supplier {
@@ -59,6 +61,7 @@ export interface Supplier {
   notes: string | null
   active: boolean
   created_at: string
+  updated_at?: string
 }
 
 export interface Expense {
@@ -95,6 +98,7 @@ export interface ProductionCost {
   locked_by_sale_number?: string | null
   locked_by_sale_customer?: string | null
   locked_at?: string | null
+  version?: number
   created_at: string
 }
 
@@ -133,7 +137,14 @@ export interface Sale {
   tax_percentage: number
   status: string
   notes: string | null
+  total_cost?: number
+  total_profit?: number
+  total_tax?: number
+  total_freight?: number
+  item_count?: number
+  version?: number
   created_at: string
+  updated_at?: string
   items?: SaleItem[]
 }
 
@@ -168,6 +179,7 @@ export interface StockMovement {
   total_price: number | null
   reference_type: string | null
   reference_id: number | null
+  automatic?: boolean
   notes: string | null
   created_at: string
 }
@@ -191,6 +203,7 @@ export interface Company {
   responsavel: string
   logo: string | null
   logo_url: string | null
+  logo_variants?: { thumbnail?: string; pdf?: string; retina?: string }
   active: boolean
   created_at: string
   updated_at: string